@@ -0,0 +1,59 @@
+"""
+Measure N-Triples load throughput of rdflib's parser and the parallel bulk
+loader with a growing number of worker processes.
+
+    python benchmarks/bench_bulkload.py --triples 500000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import tempfile
+
+from rdflib import Graph as RDFGraph
+
+from common import synthetic_triples, timed, print_table
+from models.bulkload import bulk_load
+from models.ntriples import triple_to_nt
+import models.store  # noqa: F401
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--triples", type=int, default=500000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chunk-mb", type=int, default=4)
+    parser.add_argument("--skip-rdflib", action="store_true")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "bench.nt")
+        with open(path, "w", encoding="utf-8") as f:
+            for triple in synthetic_triples(args.triples):
+                f.write(triple_to_nt(triple) + "\n")
+        size = os.path.getsize(path) / 2**20
+
+        if not args.skip_rdflib:
+            graph = RDFGraph(store="VibeGraph")
+            with timed(results, "rdflib parse"):
+                graph.parse(path, format="nt")
+            assert len(graph) == args.triples
+        for workers in args.workers:
+            graph = RDFGraph(store="VibeGraph")
+            with timed(results, f"bulk load, {workers} workers"):
+                bulk_load([path], graph, workers=workers, chunk_bytes=args.chunk_mb * 2**20)
+            assert len(graph) == args.triples
+
+    print_table(
+        f"Bulk load benchmark ({args.triples} triples, {size:.1f} MiB, {os.cpu_count()} CPUs)",
+        list(results.items()),
+    )
+    print_table(
+        "Throughput",
+        [(name, args.triples / seconds / 1000) for name, seconds in results.items()],
+        unit="k triples/s",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare save and cold-load times of Turtle and binary graph snapshots.
+
+    python benchmarks/bench_snapshot.py --triples 200000
+"""
+
+import argparse
+import os
+import tempfile
+
+from common import synthetic_triples, timed, print_table
+from models.graph import Graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--triples", type=int, default=200000)
+    args = parser.parse_args()
+
+    graph = Graph("bench", "bench", "")
+    for triple in synthetic_triples(args.triples):
+        graph.graph.add(triple)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for fmt in ("turtle", "binary"):
+            with timed(results, f"{fmt} save"):
+                path = graph.serialize(temp_dir, fmt=fmt)
+            with timed(results, f"{fmt} load"):
+                loaded = Graph.load_from_file(path, "bench", "bench", "")
+            assert len(loaded.graph) == len(graph.graph)
+            results[f"{fmt} size"] = os.path.getsize(path) / 2**20
+
+    print_table(
+        f"Snapshot benchmark ({len(graph.graph)} triples)",
+        [(name, value) for name, value in results.items() if not name.endswith("size")],
+    )
+    print_table(
+        "Snapshot size",
+        [(name, value) for name, value in results.items() if name.endswith("size")],
+        unit="MiB",
+    )
+    for op in ("save", "load"):
+        speedup = results[f"turtle {op}"] / results[f"binary {op}"]
+        print(f"  binary {op} speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare per-triple memory and load time of rdflib's Memory store and VibeStore.
+
+    python benchmarks/bench_store.py --triples 200000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from common import synthetic_triples, print_table
+from rdflib import Graph as RDFGraph
+from models.store import STORE_PLUGIN_NAME
+
+
+def measure(store, triples):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = RDFGraph(store=store)
+    for triple in triples:
+        graph.add(triple)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--triples", type=int, default=200000)
+    args = parser.parse_args()
+
+    # Materialize fresh term objects per store, as a parser would
+    sizes = {}
+    times = {}
+    for store in ("Memory", STORE_PLUGIN_NAME):
+        triples = list(synthetic_triples(args.triples))
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        graph, size, elapsed = measure(store, triples)
+        sizes[store] = (size - baseline) / len(graph)
+        times[store] = elapsed
+        del graph, triples
+
+    print_table(f"Bytes per triple ({args.triples} triples)", list(sizes.items()), unit="B")
+    print_table("Load time", list(times.items()))
+    print(f"  memory reduction: {sizes['Memory'] / sizes[STORE_PLUGIN_NAME]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
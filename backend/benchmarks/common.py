@@ -0,0 +1,47 @@
+"""
+Shared helpers for the VibeGraph benchmarks.
+Run the scripts from the backend directory, e.g. ``python benchmarks/bench_snapshot.py``.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import URIRef, Literal, RDF, RDFS, XSD
+
+EX = "http://example.org/bench/"
+
+
+def synthetic_triples(count):
+    """Yield ``count`` distinct deterministic triples with a realistic term mix."""
+    entities = count // 10 + 1
+    for i in range(count):
+        subject = URIRef(f"{EX}entity/{i // 10}")
+        kind = i % 5
+        if kind == 0:
+            yield subject, RDF.type, URIRef(f"{EX}Class{i % 17}")
+        elif kind == 1:
+            yield subject, RDFS.label, Literal(f"Entity {i}", lang="en")
+        elif kind == 2:
+            yield subject, URIRef(f"{EX}value"), Literal(str(i), datatype=XSD.integer)
+        elif kind == 3:
+            yield subject, URIRef(f"{EX}note"), Literal(f"note number {i}")
+        else:
+            yield subject, URIRef(f"{EX}linksTo"), URIRef(f"{EX}entity/{(i * 7) % entities}")
+
+
+@contextmanager
+def timed(results, name):
+    start = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - start
+
+
+def print_table(title, rows, unit="s"):
+    print(title)
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name:<{width}}  {value:10.3f} {unit}")
@@ -45,6 +45,150 @@ DEFAULT_NAMESPACES = {
     "vg": "http://vibe.graph/default/"
 }
 
+# rdflib store plugin holding local graphs: "VibeGraph" (integer-encoded
+# indexes, see models/store.py) or any registered store such as "Memory"
+TRIPLE_STORE = os.environ.get("VIBEGRAPH_TRIPLE_STORE", "VibeGraph")
+
+# On-disk snapshot format for graphs: "binary" (.vgb) or "turtle" (.ttl)
+SNAPSHOT_FORMAT = os.environ.get("VIBEGRAPH_SNAPSHOT_FORMAT", "binary")
+
+# Change log settings: triple mutations are appended to "<graph_id>.log" and
+# folded into a fresh snapshot once the log grows past the threshold.
+CHANGELOG_COMPACT_BYTES = int(os.environ.get("VIBEGRAPH_CHANGELOG_COMPACT_BYTES", 8 * 1024 * 1024))
+CHANGELOG_FSYNC = os.environ.get("VIBEGRAPH_CHANGELOG_FSYNC", "1") != "0"
+
+# Snapshots, metadata and other persisted files are replaced atomically
+# (models/atomic.py). PERSIST_FSYNC flushes them to disk before the rename;
+# without it a power loss may lose the latest write, but a crash never
+# leaves a torn file. VERIFY_CHECKSUMS checks the CRC-32 trailer of binary
+# snapshots when they are loaded.
+PERSIST_FSYNC = os.environ.get("VIBEGRAPH_PERSIST_FSYNC", "1") != "0"
+VERIFY_CHECKSUMS = os.environ.get("VIBEGRAPH_VERIFY_CHECKSUMS", "1") != "0"
+
+# Maximum number of graphs kept parsed in memory (0 = unlimited). Graphs are
+# loaded on first access and the least recently used ones are evicted.
+MAX_RESIDENT_GRAPHS = int(os.environ.get("VIBEGRAPH_MAX_RESIDENT_GRAPHS", 0))
+
+# Predicates whose literal objects are indexed as entity labels, in order of
+# preference for the primary label (comma-separated full IRIs)
+LABEL_PREDICATES = [
+    iri.strip()
+    for iri in os.environ.get(
+        "VIBEGRAPH_LABEL_PREDICATES",
+        "http://www.w3.org/2000/01/rdf-schema#label,"
+        "http://www.w3.org/2004/02/skos/core#prefLabel,"
+        "http://schema.org/name,"
+        "https://schema.org/name",
+    ).split(",")
+    if iri.strip()
+]
+
+# Whoosh writer options for bulk indexing (see WhooshSearchEngine.add_entities)
+INDEX_PROCS = int(os.environ.get("VIBEGRAPH_INDEX_PROCS", 1))
+INDEX_LIMITMB = int(os.environ.get("VIBEGRAPH_INDEX_LIMITMB", 256))
+INDEX_MULTISEGMENT = os.environ.get("VIBEGRAPH_INDEX_MULTISEGMENT", "0") == "1"
+
+# Seconds an index write waits for the index lock held by another process
+# (workers share the index directory)
+INDEX_WRITER_TIMEOUT = float(os.environ.get("VIBEGRAPH_INDEX_WRITER_TIMEOUT", 30))
+
+# When an index update fails after its triples were committed, the graph's
+# search documents are rebuilt in the background: seconds between attempts
+# and attempts before giving up until the graph changes again
+INDEX_RETRY_DELAY = float(os.environ.get("VIBEGRAPH_INDEX_RETRY_DELAY", 5))
+INDEX_RETRY_ATTEMPTS = int(os.environ.get("VIBEGRAPH_INDEX_RETRY_ATTEMPTS", 5))
+
+# Worker processes used by a full reindex, one graph per task (0 = CPU count)
+REINDEX_WORKERS = int(os.environ.get("VIBEGRAPH_REINDEX_WORKERS", 0))
+
+# Streaming ingest of N-Triples/N-Quads uploads: read size per chunk and
+# number of triples inserted (and indexed) per batch
+INGEST_CHUNK_BYTES = int(os.environ.get("VIBEGRAPH_INGEST_CHUNK_BYTES", 1024 * 1024))
+INGEST_BATCH_SIZE = int(os.environ.get("VIBEGRAPH_INGEST_BATCH_SIZE", 50000))
+
+# Parallel bulk loader for .nt/.nq files (models/bulkload.py): worker
+# processes (0 = CPU count) and the byte range parsed per task
+BULKLOAD_WORKERS = int(os.environ.get("VIBEGRAPH_BULKLOAD_WORKERS", 0))
+BULKLOAD_CHUNK_BYTES = int(os.environ.get("VIBEGRAPH_BULKLOAD_CHUNK_BYTES", 16 * 1024 * 1024))
+
+# Triple listing API: default and maximum page size
+TRIPLES_PAGE_SIZE = int(os.environ.get("VIBEGRAPH_TRIPLES_PAGE_SIZE", 100))
+TRIPLES_MAX_PAGE_SIZE = int(os.environ.get("VIBEGRAPH_TRIPLES_MAX_PAGE_SIZE", 5000))
+
+# Neighborhood expansion API: default and maximum edges per expanded node,
+# maximum depth, and the node cap of one response
+NEIGHBORS_FANOUT = int(os.environ.get("VIBEGRAPH_NEIGHBORS_FANOUT", 50))
+NEIGHBORS_MAX_FANOUT = int(os.environ.get("VIBEGRAPH_NEIGHBORS_MAX_FANOUT", 1000))
+NEIGHBORS_MAX_DEPTH = int(os.environ.get("VIBEGRAPH_NEIGHBORS_MAX_DEPTH", 3))
+NEIGHBORS_MAX_NODES = int(os.environ.get("VIBEGRAPH_NEIGHBORS_MAX_NODES", 2000))
+
+# SPARQL query plan cache: number of prepared queries kept (0 disables it)
+QUERY_PLAN_CACHE_SIZE = int(os.environ.get("VIBEGRAPH_QUERY_PLAN_CACHE_SIZE", 256))
+
+# SPARQL read result cache: total size of cached bodies (0 disables it)
+# and seconds an entry may be served
+RESULT_CACHE_BYTES = int(os.environ.get("VIBEGRAPH_RESULT_CACHE_BYTES", 64 * 1024 * 1024))
+RESULT_CACHE_TTL = float(os.environ.get("VIBEGRAPH_RESULT_CACHE_TTL", 300))
+
+# SPARQL execution budgets (models/budget.py): default wall-clock timeout
+# in seconds, result rows and intermediate bindings per query for the
+# SPARQL endpoint and the /api/queries endpoint (0 = unlimited), and the
+# admin ceilings that per-request overrides are capped at
+SPARQL_QUERY_LIMITS = {
+    "timeout": float(os.environ.get("VIBEGRAPH_SPARQL_TIMEOUT", 30)),
+    "max_rows": int(os.environ.get("VIBEGRAPH_SPARQL_MAX_ROWS", 100000)),
+    "max_bindings": int(os.environ.get("VIBEGRAPH_SPARQL_MAX_BINDINGS", 10000000)),
+}
+API_QUERY_LIMITS = {
+    "timeout": float(os.environ.get("VIBEGRAPH_API_QUERY_TIMEOUT", 30)),
+    "max_rows": int(os.environ.get("VIBEGRAPH_API_QUERY_MAX_ROWS", 10000)),
+    "max_bindings": int(os.environ.get("VIBEGRAPH_API_QUERY_MAX_BINDINGS", 10000000)),
+}
+QUERY_LIMIT_CEILINGS = {
+    "timeout": float(os.environ.get("VIBEGRAPH_QUERY_TIMEOUT_CEILING", 300)),
+    "max_rows": int(os.environ.get("VIBEGRAPH_QUERY_MAX_ROWS_CEILING", 1000000)),
+    "max_bindings": int(os.environ.get("VIBEGRAPH_QUERY_MAX_BINDINGS_CEILING", 100000000)),
+}
+
+# Query history (models/history.py): SQLite database, largest result set
+# (bytes of JSON) stored with an entry unless the client asks to keep it,
+# entries kept per graph and days an entry is kept (0 = no limit)
+QUERY_HISTORY_DB = os.environ.get(
+    "VIBEGRAPH_QUERY_HISTORY_DB", os.path.join(DATA_DIR, "query_history.sqlite3")
+)
+QUERY_HISTORY_RESULT_BYTES = int(os.environ.get("VIBEGRAPH_QUERY_HISTORY_RESULT_BYTES", 64 * 1024))
+QUERY_HISTORY_MAX_ENTRIES = int(os.environ.get("VIBEGRAPH_QUERY_HISTORY_MAX_ENTRIES", 10000))
+QUERY_HISTORY_RETENTION_DAYS = float(os.environ.get("VIBEGRAPH_QUERY_HISTORY_RETENTION_DAYS", 90))
+
+# Query history listing: default and maximum page size
+QUERY_HISTORY_PAGE_SIZE = int(os.environ.get("VIBEGRAPH_QUERY_HISTORY_PAGE_SIZE", 50))
+QUERY_HISTORY_MAX_PAGE_SIZE = int(os.environ.get("VIBEGRAPH_QUERY_HISTORY_MAX_PAGE_SIZE", 1000))
+
+# Multi-worker mode (models/shared.py): set when several processes, e.g.
+# gunicorn workers, serve the same data directory. Each worker then takes
+# cross-process file locks for writes and picks up the changes of the
+# others (change log tails, compacted snapshots, metadata) on access.
+MULTI_WORKER = os.environ.get("VIBEGRAPH_MULTI_WORKER", "0") == "1"
+
+# Streaming export: size of the chunks written to the response
+EXPORT_CHUNK_BYTES = int(os.environ.get("VIBEGRAPH_EXPORT_CHUNK_BYTES", 64 * 1024))
+
+# SPARQL endpoint results are serialized under the graph's read lock by a
+# background thread and sent while they are spooled; the response starts
+# once the result is complete or this many bytes are spooled, and larger
+# bodies continue in a temporary file instead of memory
+RESULT_SPOOL_BYTES = int(os.environ.get("VIBEGRAPH_RESULT_SPOOL_BYTES", 8 * 1024 * 1024))
+
+# Background jobs: job table location, worker threads, and the SPARQL UPDATE
+# size (bytes) above which an update runs as a job instead of inline
+JOBS_FILE = os.environ.get("VIBEGRAPH_JOBS_FILE", os.path.join(DATA_DIR, "jobs.json"))
+JOB_WORKERS = int(os.environ.get("VIBEGRAPH_JOB_WORKERS", 2))
+# Finished jobs kept in the job table and days one is kept (0 = no limit);
+# older ones are pruned whenever the table is saved
+JOB_MAX_FINISHED = int(os.environ.get("VIBEGRAPH_JOB_MAX_FINISHED", 1000))
+JOB_RETENTION_DAYS = float(os.environ.get("VIBEGRAPH_JOB_RETENTION_DAYS", 7))
+SPARQL_UPDATE_ASYNC_BYTES = int(os.environ.get("VIBEGRAPH_SPARQL_UPDATE_ASYNC_BYTES", 64 * 1024))
+
 # API constants
 API_VERSION = "v1"
 
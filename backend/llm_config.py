@@ -3,6 +3,7 @@ import os
 from typing import Any, Dict
 
 from config import BACKEND_DIR
+from models.atomic import atomic_write
 
 CONFIG_PATH = os.path.join(BACKEND_DIR, "llm_config.json")
 
@@ -42,8 +43,7 @@ def save_config(new_data: Dict[str, Any]) -> Dict[str, Any]:
             continue
         updated[key] = value
 
-    os.makedirs(os.path.dirname(CONFIG_PATH), exist_ok=True)
-    with open(CONFIG_PATH, "w", encoding="utf-8") as handle:
+    with atomic_write(CONFIG_PATH, "w", encoding="utf-8") as handle:
         json.dump(updated, handle, indent=2)
     return updated
 
@@ -0,0 +1,90 @@
+"""
+Crash-safe file replacement.
+Persisted files are written to a temporary file in the target's directory,
+flushed to disk and renamed over the target, so a crash or kill at any
+point leaves either the previous file or the complete new one, never a
+truncated mix. Readers that have the old file open (e.g. a memory-mapped
+index in another worker) keep reading the old contents.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from config import PERSIST_FSYNC
+
+# Suffix of temporary files; left-overs of a crash carry it and are ignored
+TEMP_SUFFIX = ".tmp"
+
+# The umask can only be read by setting it; do that once, at import, rather
+# than while other threads may be creating files
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+def _file_mode(path):
+    """Return the permission bits a replacement of ``path`` gets: those of
+    the existing file, else the usual 0666 less the umask."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def fsync_directory(directory):
+    """Make a rename or unlink in ``directory`` durable."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. platforms that cannot open directories
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_write(path, mode="wb", encoding=None, fsync=PERSIST_FSYNC):
+    """Open a temporary file that replaces ``path`` when the block exits.
+
+    If the block raises, the temporary file is removed and ``path`` is left
+    untouched. With ``fsync`` the data and the rename reach the disk before
+    returning; without it the replacement is still atomic for readers and
+    process crashes, but not across power loss. The new file keeps the
+    permissions of the file it replaces; mkstemp alone would leave it 0600.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=TEMP_SUFFIX, dir=directory
+    )
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.chmod(temp_path, _file_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        fsync_directory(directory)
+
+
+def remove_temp_files(directory):
+    """Delete temporary files a crash left behind in ``directory``."""
+    if not os.path.isdir(directory):
+        return
+    for fname in os.listdir(directory):
+        if fname.startswith(".") and fname.endswith(TEMP_SUFFIX):
+            try:
+                os.unlink(os.path.join(directory, fname))
+            except OSError:
+                pass
@@ -0,0 +1,116 @@
+"""
+Execution budgets for SPARQL queries.
+A QueryBudget bounds a query's wall-clock time, the number of result rows
+and the number of intermediate bindings (triple pattern matches). rdflib
+evaluates queries lazily in Python, so the budget is enforced
+cooperatively: the graph handed to the evaluator counts every pattern
+match and checks the budget as it goes, and result iteration counts rows.
+When a limit is hit, evaluation unwinds with QueryLimitExceeded and the
+rows produced so far can still be returned; closing the result iterator
+(e.g. when a client disconnects) stops evaluation as well.
+"""
+
+import time
+
+from rdflib import Graph as RDFGraph
+
+# The clock is read once per this many pattern matches
+_CHECK_INTERVAL = 256
+
+LIMIT_NAMES = ("timeout", "max_rows", "max_bindings")
+
+
+class QueryLimitExceeded(Exception):
+    """Raised inside query evaluation once a budget limit was hit."""
+
+    def __init__(self, limit):
+        super().__init__(f"Query exceeded its {limit} limit")
+        self.limit = limit
+
+
+class QueryBudget:
+    """Limits for one query execution; ``None`` or 0 disables a limit."""
+
+    def __init__(self, timeout=None, max_rows=None, max_bindings=None):
+        self.timeout = timeout or None
+        self.max_rows = max_rows or None
+        self.max_bindings = max_bindings or None
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout else None
+        self.rows = 0
+        self.bindings = 0
+        self.exceeded = None  # name of the limit that stopped the query
+
+    @classmethod
+    def from_request(cls, defaults, ceilings, overrides):
+        """Build a budget from endpoint defaults and per-request overrides.
+
+        Overrides that are missing or not positive keep the default; all
+        values are capped at the admin ``ceilings``.
+        """
+        limits = {}
+        for name in LIMIT_NAMES:
+            value = defaults.get(name)
+            requested = overrides.get(name)
+            if requested is not None and float(requested) > 0:
+                value = float(requested) if name == "timeout" else int(requested)
+            ceiling = ceilings.get(name)
+            if ceiling:
+                value = min(value, ceiling) if value else ceiling
+            limits[name] = value
+        return cls(**limits)
+
+    def _exceed(self, limit):
+        self.exceeded = limit
+        raise QueryLimitExceeded(limit)
+
+    def check(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self._exceed("timeout")
+
+    def tick(self):
+        """Account for one intermediate binding (a triple pattern match)."""
+        self.bindings += 1
+        if self.max_bindings is not None and self.bindings > self.max_bindings:
+            self._exceed("max_bindings")
+        if self.bindings % _CHECK_INTERVAL == 0:
+            self.check()
+
+    def row(self):
+        """Account for one result row; returns False once max_rows is reached."""
+        self.check()
+        if self.max_rows is not None and self.rows >= self.max_rows:
+            return False
+        self.rows += 1
+        return True
+
+    def to_dict(self):
+        return {
+            "limit": self.exceeded,
+            "rows": self.rows,
+            "bindings": self.bindings,
+            "elapsed": round(time.monotonic() - self.started, 3),
+        }
+
+
+class BudgetedGraph(RDFGraph):
+    """View of an rdflib graph that charges every triple match to a budget.
+
+    It shares the wrapped graph's store and namespace bindings; SPARQL
+    evaluation reads all triple patterns (including property paths)
+    through ``triples``.
+    """
+
+    def __init__(self, graph, budget):
+        super().__init__(
+            store=graph.store,
+            identifier=graph.identifier,
+            namespace_manager=graph.namespace_manager,
+        )
+        self.budget = budget
+
+    def triples(self, triple):
+        tick = self.budget.tick
+        for match in super().triples(triple):
+            tick()
+            yield match
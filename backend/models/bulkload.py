@@ -0,0 +1,272 @@
+"""
+Parallel bulk loader for N-Triples and N-Quads files.
+A file is split into byte ranges aligned to line boundaries; each range is
+parsed in a worker process into a dictionary-encoded batch (a term table of
+(kind, text) pairs plus an integer id array, as in models.snapshot). The
+parent merges each batch's term table into the store's dictionary, which
+decodes every distinct term once per load, and a worker translates the
+batch's ids to store ids. The parent then only inserts id triples.
+
+Load files offline into the graph store, and index them for search, with:
+
+    python -m models.bulkload --name "DBpedia" dump.nt more.nq
+"""
+
+import argparse
+import os
+import sys
+import uuid
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from config import BULKLOAD_WORKERS, BULKLOAD_CHUNK_BYTES, SEARCH_INDEX_DIR
+from models.ntriples import scan_terms, unescape
+from models.snapshot import (
+    TERM_URI,
+    TERM_BNODE,
+    TERM_LITERAL,
+    TERM_LANG_LITERAL,
+    TERM_TYPED_LITERAL,
+    decode_term,
+)
+
+
+def split_ranges(file_path, chunk_bytes=BULKLOAD_CHUNK_BYTES):
+    """Split a file into (start, end) byte ranges that begin and end on line boundaries."""
+    size = os.path.getsize(file_path)
+    ranges = []
+    start = 0
+    with open(file_path, "rb") as f:
+        while start < size:
+            end = start + chunk_bytes
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _encode_match(match, bnode_prefix):
+    """Return the (kind, text) snapshot encoding of a scanned term."""
+    iri, bnode, literal, lang, datatype = match.groups()
+    if iri is not None:
+        return TERM_URI, unescape(iri)
+    if bnode is not None:
+        return TERM_BNODE, f"{bnode_prefix}{unescape(bnode)}"
+    if lang:
+        return TERM_LANG_LITERAL, f"{unescape(literal)}\x00{lang}"
+    if datatype is not None:
+        return TERM_TYPED_LITERAL, f"{unescape(literal)}\x00{datatype}"
+    return TERM_LITERAL, unescape(literal)
+
+
+def parse_range(file_path, start, end, bnode_prefix):
+    """Parse one byte range into a dictionary-encoded batch (runs in a worker).
+
+    Returns (encoded terms, id bytes, id typecode, triple count). Terms are
+    (kind, text) pairs as in models.snapshot: no rdflib objects are built
+    here, and each distinct term is decoded once in the parent. Blank node
+    labels are prefixed with ``bnode_prefix`` so equal labels in different
+    ranges of the same file still denote the same node.
+    """
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    term_ids = {}  # key: term as written in the file
+    terms = []
+    ids = array("Q")
+    for lineno, line in enumerate(data.decode("utf-8").split("\n"), 1):
+        try:
+            matches = scan_terms(line)
+        except ValueError as e:
+            raise ValueError(f"{file_path} at byte {start}, line {lineno}: {e}") from None
+        if matches is None:
+            continue
+        for match in matches[:3]:
+            raw = match.group(0)
+            tid = term_ids.get(raw)
+            if tid is None:
+                tid = term_ids[raw] = len(terms)
+                terms.append(_encode_match(match, bnode_prefix))
+            ids.append(tid)
+    typecode = "I" if len(terms) < 2**32 else "Q"
+    if typecode != "Q":
+        ids = array(typecode, ids)
+    return terms, ids.tobytes(), typecode, len(ids) // 3
+
+
+def remap_ids(id_bytes, typecode, mapping_bytes):
+    """Translate a batch's local term ids to store ids (runs in a worker).
+
+    ``mapping_bytes`` is an ``array("Q")`` of store ids indexed by local id.
+    Returns the store ids as ``array("Q")`` bytes.
+    """
+    ids = array(typecode)
+    ids.frombytes(id_bytes)
+    mapping = array("Q")
+    mapping.frombytes(mapping_bytes)
+    return array("Q", map(mapping.__getitem__, ids)).tobytes()
+
+
+class _TermDictionary:
+    """Maps the encoded terms of a bulk load to the ids of a VibeStore."""
+
+    def __init__(self, store):
+        self._store = store
+        self._ids = {}  # key: (kind, text), value: store id
+
+    def mapping(self, encoded):
+        """Return the store ids of a batch's term table as ``array("Q")`` bytes."""
+        ids = self._ids
+        mapping = array("Q")
+        for key in encoded:
+            tid = ids.get(key)
+            if tid is None:
+                tid = ids[key] = self._store.intern(decode_term(*key))
+            mapping.append(tid)
+        return mapping.tobytes()
+
+
+def merge_batch(rdf_graph, terms, ids):
+    """Add a decoded batch to an rdflib graph. Returns the number of new triples
+    when the store reports it, else the batch size."""
+    add_encoded = getattr(rdf_graph.store, "add_encoded", None)
+    if add_encoded is not None:
+        return add_encoded(terms, ids)
+    it = iter(ids)
+    rdf_graph.store.addN(
+        (terms[s], terms[p], terms[o], rdf_graph) for s, p, o in zip(it, it, it)
+    )
+    return len(ids) // 3
+
+
+def bulk_load(file_paths, rdf_graph, workers=BULKLOAD_WORKERS, chunk_bytes=BULKLOAD_CHUNK_BYTES, progress=None):
+    """Load N-Triples/N-Quads files into an rdflib graph using a process pool.
+
+    ``progress`` is called with (ranges done, ranges total, triples parsed)
+    after each merged batch. Returns the number of triples parsed.
+    """
+    workers = workers or os.cpu_count() or 1
+    bnode_prefix = f"bulk{uuid.uuid4().hex[:8]}"
+    tasks = [
+        (file_path, start, end, f"{bnode_prefix}f{i}")
+        for i, file_path in enumerate(file_paths)
+        for start, end in split_ranges(file_path, chunk_bytes)
+    ]
+    store = rdf_graph.store
+    dictionary = _TermDictionary(store) if hasattr(store, "add_ids") else None
+    parsed = 0
+    done = 0
+
+    def merged(count):
+        nonlocal parsed, done
+        parsed += count
+        done += 1
+        if progress is not None:
+            progress(done, len(tasks), parsed)
+
+    def insert(id_bytes, count):
+        ids = array("Q")
+        ids.frombytes(id_bytes)
+        it = iter(ids)
+        store.add_ids(zip(it, it, it))
+        merged(count)
+
+    def merge(result):
+        # Stores without integer ids get decoded terms
+        encoded, id_bytes, typecode, count = result
+        terms = [decode_term(kind, text) for kind, text in encoded]
+        ids = array(typecode)
+        ids.frombytes(id_bytes)
+        merge_batch(rdf_graph, terms, ids)
+        merged(count)
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            encoded, id_bytes, typecode, count = result = parse_range(*task)
+            if dictionary is None:
+                merge(result)
+            else:
+                insert(remap_ids(id_bytes, typecode, dictionary.mapping(encoded)), count)
+        return parsed
+    workers = min(workers, len(tasks))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if dictionary is None:
+            for result in pool.map(parse_range, *zip(*tasks)):
+                merge(result)
+            return parsed
+        # A bounded window of ranges is parsed ahead, so the id translation
+        # of merged batches is not queued behind every remaining range
+        pending = iter(tasks)
+        parsing = deque(pool.submit(parse_range, *task) for task in islice(pending, 2 * workers))
+        remapping = deque()
+        try:
+            while parsing:
+                encoded, id_bytes, typecode, count = parsing.popleft().result()
+                for task in islice(pending, 1):
+                    parsing.append(pool.submit(parse_range, *task))
+                mapping = dictionary.mapping(encoded)
+                remapping.append((pool.submit(remap_ids, id_bytes, typecode, mapping), count))
+                while remapping and (remapping[0][0].done() or len(remapping) > workers):
+                    future, count = remapping.popleft()
+                    insert(future.result(), count)
+            while remapping:
+                future, count = remapping.popleft()
+                insert(future.result(), count)
+        except BaseException:
+            for future in list(parsing) + [future for future, _ in remapping]:
+                future.cancel()
+            raise
+    return parsed
+
+
+def main(argv=None):
+    from models.graph import GraphManager
+    from models.search import WhooshSearchEngine
+
+    parser = argparse.ArgumentParser(
+        description="Bulk-load N-Triples/N-Quads files into a VibeGraph graph."
+    )
+    parser.add_argument("files", nargs="+", help=".nt or .nq files")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--graph-id", help="load into an existing graph")
+    target.add_argument("--name", help="create a new graph with this name")
+    parser.add_argument("--data-file", default="graph_data.json", help="graph metadata file")
+    parser.add_argument("--data-dir", default=None, help="graph data directory (GRAPHS_DATA_DIR)")
+    parser.add_argument("--index-dir", default=SEARCH_INDEX_DIR, help="search index directory")
+    parser.add_argument("--no-index", action="store_true", help="do not index the loaded graph")
+    parser.add_argument("--workers", type=int, default=BULKLOAD_WORKERS, help="worker processes (0 = CPU count)")
+    parser.add_argument("--chunk-mb", type=int, default=BULKLOAD_CHUNK_BYTES // 2**20, help="byte range size per task")
+    args = parser.parse_args(argv)
+
+    manager = GraphManager(args.data_file, data_dir=args.data_dir)
+    graph_id = args.graph_id or manager.create_graph(args.name)["graph_id"]
+    if manager.get_graph(graph_id) is None:
+        parser.error(f"Graph {graph_id} not found")
+    search_engine = None if args.no_index else WhooshSearchEngine(args.index_dir)
+
+    def progress(done, total, triples):
+        print(f"\r{done}/{total} ranges, {triples} triples", end="", file=sys.stderr)
+
+    count = manager.bulk_load(
+        graph_id,
+        args.files,
+        search_engine=search_engine,
+        workers=args.workers,
+        chunk_bytes=max(1, args.chunk_mb) * 2**20,
+        progress=progress,
+    )
+    print(file=sys.stderr)
+    total = len(manager.get_graph_object(graph_id).graph)
+    print(f"Loaded {count} triples into graph {graph_id} ({total} total)")
+    return graph_id
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Append-only change log for graph triple mutations.
+Each graph gets a "<graph_id>.log" file next to its snapshot. Every line is an
+operation ("+" to add, "-" to remove) followed by the triple in N-Triples
+syntax. Replaying the log on top of the last snapshot restores the graph.
+Blank node labels are kept exactly so entries apply to the nodes already in
+the graph: whitespace and backslashes are escaped as in string literals
+(\\uXXXX, \\\\), which the N-Triples reader resolves.
+"""
+
+import os
+import re
+import logging
+
+from rdflib import BNode
+
+from models.ntriples import term_to_nt, parse_triple
+
+logger = logging.getLogger(__name__)
+
+_LABEL_ESCAPE_RE = re.compile(r"[\s\\]")
+
+ADD = "+"
+REMOVE = "-"
+
+
+def _escape_label_match(match):
+    ch = match.group(0)
+    return "\\\\" if ch == "\\" else f"\\u{ord(ch):04X}"
+
+
+def _term_to_log(term):
+    if isinstance(term, BNode):
+        return f"_:{_LABEL_ESCAPE_RE.sub(_escape_label_match, str(term))}"
+    return term_to_nt(term)
+
+
+def _triple_to_log(triple):
+    return " ".join(_term_to_log(term) for term in triple) + " ."
+
+
+class ChangeLog:
+    def __init__(self, directory, fsync=True):
+        self.directory = directory
+        self.fsync = fsync
+
+    def path(self, graph_id):
+        return os.path.join(self.directory, f"{graph_id}.log")
+
+    def append(self, graph_id, ops):
+        """Append a batch of (op, triple) mutations and sync them to disk once."""
+        lines = "".join(f"{op} {_triple_to_log(triple)}\n" for op, triple in ops)
+        if not lines:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(graph_id), "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def replay(self, graph_id, rdf_graph):
+        """Apply the logged mutations to an rdflib graph. Returns the number applied."""
+        return self.replay_from(graph_id, rdf_graph)[0]
+
+    def replay_from(self, graph_id, rdf_graph, offset=0):
+        """Apply the mutations logged after byte ``offset``.
+
+        Returns ``(applied, end)`` where ``end`` is the offset just past the
+        last complete entry, so another process's appends can be picked up
+        incrementally by replaying from ``end`` later.
+        """
+        file_path = self.path(graph_id)
+        if not os.path.exists(file_path):
+            return 0, 0
+        applied = 0
+        end = offset
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            for lineno, raw in enumerate(f, 1):
+                if not raw.endswith(b"\n"):
+                    # A torn write at the tail never reached its fsync, or
+                    # another process is still writing it
+                    logger.warning(f"Ignoring incomplete entry in {file_path} at byte {end}")
+                    break
+                end += len(raw)
+                op, _, statement = raw.decode("utf-8").partition(" ")
+                try:
+                    triple = parse_triple(statement)
+                except ValueError as e:
+                    logger.warning(f"Skipping entry in {file_path}:{lineno}: {e}")
+                    continue
+                if triple is None:
+                    continue
+                if op == ADD:
+                    rdf_graph.add(triple)
+                elif op == REMOVE:
+                    rdf_graph.remove(triple)
+                else:
+                    continue
+                applied += 1
+        return applied, end
+
+    def size(self, graph_id):
+        """Return the log size in bytes (0 when no log exists)."""
+        try:
+            return os.path.getsize(self.path(graph_id))
+        except OSError:
+            return 0
+
+    def truncate(self, graph_id):
+        """Drop the log once its changes are folded into a snapshot."""
+        file_path = self.path(graph_id)
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+
+
+class ChangeRecorder:
+    """Record the triples added to and removed from an rdflib store.
+
+    Used as a context manager around operations that mutate a graph
+    indirectly, such as SPARQL UPDATE. Only effective changes are kept:
+    adding a triple that exists or removing one that does not is ignored.
+    The collected (op, triple) pairs are in ``ops``, ready for
+    ``ChangeLog.append``.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def _contains(self, triple):
+        for _ in self.store.triples(triple):
+            return True
+        return False
+
+    def __enter__(self):
+        store = self.store
+        add, add_n, remove = store.add, store.addN, store.remove
+
+        def record_add(triple, context, quoted=False):
+            if not quoted and not self._contains(triple):
+                self.ops.append((ADD, triple))
+            return add(triple, context, quoted)
+
+        def record_add_n(quads):
+            quads = list(quads)
+            fresh = set()
+            for s, p, o, _ in quads:
+                triple = (s, p, o)
+                if triple not in fresh and not self._contains(triple):
+                    fresh.add(triple)
+                    self.ops.append((ADD, triple))
+            return add_n(quads)
+
+        def record_remove(triple_pattern, context=None):
+            for triple, _ in list(store.triples(triple_pattern, context)):
+                self.ops.append((REMOVE, triple))
+            return remove(triple_pattern, context)
+
+        # Shadow the bound methods on this instance only
+        store.add, store.addN, store.remove = record_add, record_add_n, record_remove
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for name in ("add", "addN", "remove"):
+            self.store.__dict__.pop(name, None)
+        return False
@@ -0,0 +1,157 @@
+"""
+Streaming graph export.
+Statements are serialized one at a time from the store and yielded as byte
+chunks of about ``EXPORT_CHUNK_BYTES``, so exporting a graph needs a
+constant amount of memory whatever its size. N-Triples, N-Quads, Turtle
+and TriG are streamed; other formats fall back to rdflib's serializers.
+"""
+
+import re
+import zlib
+
+from rdflib import Literal, URIRef
+from rdflib.namespace import RDF
+
+from config import EXPORT_CHUNK_BYTES
+from models.ntriples import term_to_nt, triple_to_nt
+
+# Named graph IRI used for the graph column of N-Quads and TriG exports
+GRAPH_IRI_BASE = "http://vibe.graph/graphs/"
+
+# Conservative PN_LOCAL subset: names outside it are written as full IRIs
+_LOCAL_NAME_RE = re.compile(r"[A-Za-z0-9_](?:[A-Za-z0-9_-]*)\Z")
+
+STREAMING_FORMATS = ("nt", "nquads", "turtle", "trig")
+
+
+def graph_iri(graph_id):
+    return URIRef(f"{GRAPH_IRI_BASE}{graph_id}")
+
+
+def encode_chunks(lines, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Join text lines into UTF-8 chunks of at least ``chunk_bytes``."""
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def iter_ntriples(rdf_graph, graph_name=None):
+    """Yield N-Triples lines, or N-Quads lines when ``graph_name`` is given."""
+    if graph_name is None:
+        for triple in rdf_graph:
+            yield triple_to_nt(triple) + "\n"
+        return
+    suffix = f" {term_to_nt(graph_name)} .\n"
+    for s, p, o in rdf_graph:
+        yield f"{term_to_nt(s)} {term_to_nt(p)} {term_to_nt(o)}{suffix}"
+
+
+class _Compactor:
+    """Writes Turtle terms, using prefixed names where the prefix is bound."""
+
+    def __init__(self, namespaces):
+        # Longest namespaces first so the most specific prefix wins
+        self.namespaces = sorted(
+            ((str(uri), prefix) for prefix, uri in namespaces),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self._cache = {}
+
+    def iri(self, iri):
+        name = self._cache.get(iri)
+        if name is not None:
+            return name
+        name = f"<{iri}>"
+        for namespace, prefix in self.namespaces:
+            if iri.startswith(namespace) and _LOCAL_NAME_RE.match(iri, len(namespace)):
+                name = f"{prefix}:{iri[len(namespace):]}"
+                break
+        # Predicates and classes repeat on almost every line
+        if len(self._cache) < 10000:
+            self._cache[iri] = name
+        return name
+
+    def term(self, term):
+        if isinstance(term, URIRef):
+            return self.iri(str(term))
+        if isinstance(term, Literal) and term.datatype and not term.language:
+            value = term_to_nt(Literal(str(term)))
+            return f"{value}^^{self.iri(str(term.datatype))}"
+        return term_to_nt(term)
+
+
+def iter_turtle(rdf_graph, graph_name=None, indent=""):
+    """Yield Turtle lines grouped by subject and predicate.
+
+    Statements are written in store order: a subject is repeated if its
+    triples are not adjacent, which is valid Turtle and keeps memory flat.
+    With ``graph_name`` the statements are wrapped in a TriG graph block.
+    """
+    namespaces = [
+        (prefix, uri) for prefix, uri in rdf_graph.namespaces() if prefix
+    ]
+    compactor = _Compactor(namespaces)
+    for prefix, uri in namespaces:
+        yield f"@prefix {prefix}: <{uri}> .\n"
+    if namespaces:
+        yield "\n"
+    if graph_name is not None:
+        yield f"{compactor.term(graph_name)} {{\n"
+        indent = indent + "    "
+    last_s = last_p = None
+    for s, p, o in rdf_graph:
+        obj = compactor.term(o)
+        if s == last_s:
+            if p == last_p:
+                yield f" ,\n{indent}        {obj}"
+            else:
+                pred = "a" if p == RDF.type else compactor.term(p)
+                yield f" ;\n{indent}    {pred} {obj}"
+        else:
+            if last_s is not None:
+                yield " .\n\n"
+            pred = "a" if p == RDF.type else compactor.term(p)
+            yield f"{indent}{compactor.term(s)} {pred} {obj}"
+        last_s, last_p = s, p
+    if last_s is not None:
+        yield " .\n"
+    if graph_name is not None:
+        yield "}\n"
+
+
+def stream_graph(rdf_graph, rdf_format, graph_name=None, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Yield an rdflib graph serialized to ``rdf_format`` as byte chunks.
+
+    ``graph_name`` names the graph in N-Quads and TriG output.
+    """
+    if rdf_format == "nt":
+        lines = iter_ntriples(rdf_graph)
+    elif rdf_format == "nquads":
+        lines = iter_ntriples(rdf_graph, graph_name)
+    elif rdf_format == "turtle":
+        lines = iter_turtle(rdf_graph)
+    elif rdf_format == "trig":
+        lines = iter_turtle(rdf_graph, graph_name)
+    else:
+        yield rdf_graph.serialize(format=rdf_format, encoding="utf-8")
+        return
+    yield from encode_chunks(lines, chunk_bytes)
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte chunk iterator into a gzip stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
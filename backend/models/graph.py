@@ -2,6 +2,16 @@ from datetime import datetime
 import uuid
 import os
 import json
+import threading
+import queue
+import tempfile
+import time
+import base64
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from rdflib import Graph as RDFGraph
 from rdflib import URIRef, Literal, BNode, Namespace
 from rdflib import RDF, RDFS, OWL
@@ -9,8 +19,38 @@ from rdflib import RDF, RDFS, OWL
 # Import configuration
 from config import GRAPHS_DATA_DIR, GRAPH_DATA_FILE
 from config import QUERY_HISTORY_DIR
+from config import CHANGELOG_COMPACT_BYTES, CHANGELOG_FSYNC, MAX_RESIDENT_GRAPHS
+from config import SNAPSHOT_FORMAT, LABEL_PREDICATES, REINDEX_WORKERS
+from config import INGEST_BATCH_SIZE, INGEST_CHUNK_BYTES, BULKLOAD_CHUNK_BYTES
+from config import TRIPLES_PAGE_SIZE, TRIPLES_MAX_PAGE_SIZE
+from config import NEIGHBORS_FANOUT, NEIGHBORS_MAX_FANOUT, NEIGHBORS_MAX_DEPTH
+from config import NEIGHBORS_MAX_NODES
+from config import MULTI_WORKER, VERIFY_CHECKSUMS
+from config import INDEX_RETRY_DELAY, INDEX_RETRY_ATTEMPTS
+from models.changelog import ChangeLog, ChangeRecorder, ADD, REMOVE
+from models.snapshot import SNAPSHOT_EXTENSION, write_snapshot, read_snapshot
+from models.search import WhooshSearchEngine
+from models.ingest import iter_batches
+from models.bulkload import bulk_load
+from models.ntriples import term_to_nt
+from models.plancache import QueryPlanCache, prepare_update
+from models.resultcache import ResultCache
+from models.budget import BudgetedGraph
+from models.locks import LockTable
+from models.shared import FileLock, file_state
+from models.atomic import atomic_write, remove_temp_files
+from config import TRIPLE_STORE
+import models.store  # noqa: F401  registers the "VibeGraph" rdflib store plugin
+from models.mapped import (
+    MAPPED_EXTENSION,
+    MappedStore,
+    ReadOnlyGraphError,
+    build_mapped_index,
+)
 import shutil
 
+logger = logging.getLogger(__name__)
+
 # Global namespace prefixes loaded from nsprefixes.json
 import json
 import os
@@ -29,7 +69,7 @@ PREFIXE_FILE = os.path.join(
 
 
 def save_prefixes(prefixes=NS_PREFIXES, file_path=PREFIXE_FILE):
-    with open(file_path, "w", encoding="utf-8") as f:
+    with atomic_write(file_path, "w", encoding="utf-8") as f:
         json.dump({k: str(v) for k, v in prefixes.items()}, f, indent=2)
 
 
@@ -48,9 +88,70 @@ def load_global_prefixes(file_path=PREFIXE_FILE):
 load_global_prefixes()
 
 
+# Snapshot file extensions recognised in the graphs data directory, in order
+# of preference. Turtle snapshots from older versions are still loaded.
+SNAPSHOT_EXTENSIONS = (SNAPSHOT_EXTENSION, ".ttl")
+
+# Disk state of a graph without snapshot or change log (see GraphManager._disk)
+_NO_FILES = (None, None, 0)
+
+
 # Graph Management Model
 
 
+def _encode_cursor(position):
+    """Encode a store position as an opaque, URL-safe page cursor."""
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def _primary_label(labels):
+    """Prefer a plain label, then the first label in predicate order."""
+    primary = next((lbl for lbl in labels if not lbl.language), None)
+    if primary is None and labels:
+        primary = labels[0]
+    return primary
+
+
+def _entity(iri, labels, graph_id):
+    """Build the search entity of an IRI from its label literals."""
+    primary = _primary_label(labels)
+    return {
+        "iri": str(iri),
+        "label": str(primary) if primary is not None else str(iri),
+        "labels": [{"value": str(lbl), "lang": lbl.language} for lbl in labels],
+        "graph_id": graph_id,
+    }
+
+
+def _node_id(term):
+    """Identify a visualization node: IRIs as-is, other terms in N-Triples form."""
+    if isinstance(term, URIRef):
+        return str(term)
+    return term_to_nt(term)
+
+
+def _node(term, labels):
+    if isinstance(term, URIRef):
+        kind = "iri"
+    elif isinstance(term, BNode):
+        kind = "bnode"
+    else:
+        kind = "literal"
+    primary = _primary_label(labels)
+    return {
+        "id": _node_id(term),
+        "kind": kind,
+        "label": str(primary) if primary is not None else str(term),
+    }
+
+
 class Graph:
     def __init__(
         self,
@@ -66,6 +167,8 @@ class Graph:
         self.name = name
         self.created_at = created_at
         self.data = {}
+        # Read-only graphs are served from a memory-mapped index
+        self.read_only = False
         # Metadata for SPARQL data source
         self.sparql_read = sparql_read
         self.sparql_update = sparql_update
@@ -90,9 +193,9 @@ class Graph:
                 self.graph = RDFGraph(store=store)
             except Exception:
                 # Fallback to default graph if SPARQLStore fails
-                self.graph = RDFGraph()
+                self.graph = RDFGraph(store=TRIPLE_STORE)
         else:
-            self.graph = RDFGraph()
+            self.graph = RDFGraph(store=TRIPLE_STORE)
 
     def to_dict(self):
         return {
@@ -106,12 +209,23 @@ class Graph:
             "auth_info": self.auth_info,
         }
 
-    def serialize(self, directory):
-        """Persist the RDF graph to a Turtle file inside the given directory."""
+    def serialize(self, directory, fmt=SNAPSHOT_FORMAT):
+        """Persist the RDF graph inside the given directory.
+
+        ``fmt`` is "binary" for a ``.vgb`` snapshot or "turtle" for a ``.ttl``
+        file. Returns the path written.
+        """
         if not os.path.isdir(directory):
             os.makedirs(directory, exist_ok=True)
-        file_path = os.path.join(directory, f"{self.graph_id}.ttl")
-        self.graph.serialize(file_path, format="turtle")
+        if fmt == "binary":
+            file_path = os.path.join(directory, f"{self.graph_id}{SNAPSHOT_EXTENSION}")
+            with atomic_write(file_path) as f:
+                write_snapshot(f, self.graph)
+        else:
+            file_path = os.path.join(directory, f"{self.graph_id}.ttl")
+            with atomic_write(file_path) as f:
+                self.graph.serialize(f, format="turtle")
+        return file_path
 
     def add_triple(self, triple, prefixNS=NS_PREFIXES):
         triple = (
@@ -121,6 +235,7 @@ class Graph:
         )
         print("add ", triple)
         self.graph.add(triple)
+        return triple
 
     def wrap(self, value: str, pos="p", prefixNS=NS_PREFIXES):
         defaultNs = Namespace("http://vibe.graph/default/")
@@ -158,26 +273,146 @@ class Graph:
             else:
                 return defaultNs[value]
 
-    def index(self, search_engine, graph_id):
-        # Index new triples
-        numtris = 0
-        for s, p, o in self.graph:
-            for term in (s, p, o):
-                if not isinstance(term, URIRef):
+    def label_map(self, predicates=LABEL_PREDICATES):
+        """Map every labelled IRI to its label literals.
+
+        Labels are collected with one pass per label predicate; the lists
+        keep the order of ``predicates`` so the first entry is preferred.
+        """
+        labels = {}
+        for predicate in predicates:
+            for subject, label in self.graph.subject_objects(URIRef(predicate)):
+                if isinstance(subject, URIRef) and isinstance(label, Literal):
+                    labels.setdefault(subject, []).append(label)
+        return labels
+
+    def labels(self, iri, predicates=LABEL_PREDICATES):
+        """Return the label literals of a single IRI in predicate order."""
+        return [
+            label
+            for predicate in predicates
+            for label in self.graph.objects(iri, URIRef(predicate))
+            if isinstance(label, Literal)
+        ]
+
+    def _match(self, pattern, limit):
+        """Return at most ``limit`` triples matching a pattern without scanning past them."""
+        store = self.graph.store
+        if hasattr(store, "triples_page"):
+            return store.triples_page(pattern, limit)[0]
+        return list(islice(self.graph.triples(pattern), limit))
+
+    def _degree(self, term, predicates):
+        """Count a node's outgoing and incoming edges when the store can do so cheaply."""
+        count = getattr(self.graph.store, "count", None)
+        if count is None:
+            return None
+        return {
+            "out": sum(count((term, p, None)) for p in predicates),
+            "in": sum(count((None, p, term)) for p in predicates),
+        }
+
+    def neighbors(
+        self,
+        terms,
+        depth=1,
+        direction="both",
+        fanout=NEIGHBORS_FANOUT,
+        predicates=None,
+        max_nodes=NEIGHBORS_MAX_NODES,
+    ):
+        """Expand nodes breadth-first into a node/edge payload for visualization.
+
+        Each expanded node contributes at most ``fanout`` edges, taken from
+        the SPO (outgoing) and OSP (incoming) indexes without reading the rest
+        of its edges, so hubs cost no more than small nodes. ``truncated`` is
+        set when a fanout or the ``max_nodes`` cap cut the expansion short.
+        """
+        if direction not in ("out", "in", "both"):
+            raise ValueError("direction must be 'out', 'in' or 'both'")
+        predicates = list(predicates) if predicates else [None]
+        nodes = {}  # key: term, value: node payload
+        edges = []
+        seen_edges = set()
+        truncated = False
+
+        def node(term):
+            payload = nodes.get(term)
+            if payload is None:
+                payload = nodes[term] = _node(term, self.labels(term) if isinstance(term, URIRef) else [])
+            return payload
+
+        frontier = [term for term in terms if term is not None]
+        for term in frontier:
+            node(term)
+        for _ in range(depth):
+            next_frontier = []
+            for term in frontier:
+                if isinstance(term, Literal):
                     continue
-                label = None
-                for lbl in self.graph.objects(term, RDFS.label):
-                    label = str(lbl)
-                    break
-                search_engine.add_entity(
-                    {
-                        "iri": str(term),
-                        "label": label or str(term),
-                        "graph_id": graph_id,
-                    }
-                )
-            numtris += 1
-        print(f"indexed {numtris} triples")
+                node(term)["degree"] = self._degree(term, predicates)
+                patterns = []
+                if direction in ("out", "both"):
+                    patterns += [(term, p, None) for p in predicates]
+                if direction in ("in", "both"):
+                    patterns += [(None, p, term) for p in predicates]
+                remaining = fanout
+                for pattern in patterns:
+                    if remaining <= 0:
+                        truncated = True
+                        break
+                    matches = self._match(pattern, remaining + 1)
+                    if len(matches) > remaining:
+                        matches = matches[:remaining]
+                        truncated = True
+                    remaining -= len(matches)
+                    for s, p, o in matches:
+                        other = o if pattern[0] is not None else s
+                        if other not in nodes:
+                            if len(nodes) >= max_nodes:
+                                truncated = True
+                                continue
+                            node(other)
+                            next_frontier.append(other)
+                        if (s, p, o) not in seen_edges:
+                            seen_edges.add((s, p, o))
+                            edges.append(
+                                {"source": _node_id(s), "predicate": str(p), "target": _node_id(o)}
+                            )
+            frontier = next_frontier
+        return {"nodes": list(nodes.values()), "edges": edges, "truncated": truncated}
+
+    def mentions(self, term):
+        """Return True when the term appears in any position of a triple."""
+        for pattern in ((term, None, None), (None, term, None), (None, None, term)):
+            for _ in self.graph.triples(pattern):
+                return True
+        return False
+
+    def entities(self, graph_id, predicates=LABEL_PREDICATES, stats=None):
+        """Yield the search entity of every distinct IRI of the graph.
+
+        When a ``stats`` dict is given its "triples" entry counts the
+        triples scanned.
+        """
+        # Index every distinct IRI once, using the precomputed label map
+        labels = self.label_map(predicates)
+        seen = set()
+        for triple in self.graph:
+            if stats is not None:
+                stats["triples"] = stats.get("triples", 0) + 1
+            for term in triple:
+                if not isinstance(term, URIRef) or term in seen:
+                    continue
+                seen.add(term)
+                yield _entity(term, labels.get(term, ()), graph_id)
+
+    def index(self, search_engine, graph_id, predicates=LABEL_PREDICATES):
+        stats = {"triples": 0}
+        count = search_engine.add_entities(self.entities(graph_id, predicates, stats))
+        numtris = stats["triples"]
+        print(f"indexed {numtris} triples, {count} entities")
+        return count
 
     def _parse_literal(self, value: str, prefixes):
         """Parse a typed or language-tagged literal using a quoted form."""
@@ -221,94 +456,611 @@ class Graph:
         auth_type="None",
         auth_info=None,
     ):
-        """Load an RDF graph from a Turtle file and return a Graph instance."""
+        """Load an RDF graph from a binary snapshot or Turtle file and return a Graph instance.
+
+        A ``.vgm`` path opens the memory-mapped index as a read-only graph.
+        """
         graph = Graph(
             graph_id, name, created_at, sparql_read, sparql_update, auth_type, auth_info
         )
         if os.path.exists(file_path):
-            graph.graph.parse(file_path, format="turtle")
+            if file_path.endswith(MAPPED_EXTENSION):
+                graph.graph = RDFGraph(store=MappedStore(file_path))
+                graph.read_only = True
+            elif file_path.endswith(SNAPSHOT_EXTENSION):
+                with open(file_path, "rb") as f:
+                    read_snapshot(f, graph.graph, verify=VERIFY_CHECKSUMS)
+            else:
+                graph.graph.parse(file_path, format="turtle")
         return graph
 
 
+def _index_graph_worker(file_path, data_dir, graph_id, index_dir):
+    """Index one graph from disk into its own Whoosh index (runs in a subprocess).
+
+    Returns (graph_id, index_dir, triple count, entity count).
+    """
+    graph = Graph.load_from_file(file_path, graph_id, "", "")
+    if not graph.read_only:
+        ChangeLog(data_dir).replay(graph_id, graph.graph)
+    entities = graph.index(WhooshSearchEngine(index_dir), graph_id)
+    return graph_id, index_dir, len(graph.graph), entities
+
+
 class GraphManager:
-    def __init__(self, data_file="graph_data.json"):
+    def __init__(
+        self,
+        data_file="graph_data.json",
+        data_dir=None,
+        max_resident=None,
+        search_engine=None,
+        history=None,
+        multi_worker=None,
+    ):
         # Store metadata and actual Graph objects separately
         self.graphs = {}  # key: graph_id, value: metadata dict
-        self.graph_objs = {}  # key: graph_id, value: Graph instance
+        # Graphs parsed into memory, least recently used first
+        self.graph_objs = OrderedDict()  # key: graph_id, value: Graph instance
+        self.max_resident = (
+            MAX_RESIDENT_GRAPHS if max_resident is None else max_resident
+        )
         self.graph_id_counter = 0
         self.prefixes = NS_PREFIXES
         self.data_file = data_file
+        self.data_dir = data_dir or GRAPHS_DATA_DIR
+        # Graphs whose triples changed since the last flush, with the number
+        # of mutations applied to each; metadata changes are tracked apart so
+        # a rename never rewrites RDF data.
+        self._dirty = {}  # key: graph_id, value: pending change count
+        self._metadata_dirty = False
+        # Triple mutations go to an append-only log per graph; a background
+        # compactor folds it into the snapshot once it grows too large.
+        self.changelog = ChangeLog(self.data_dir, fsync=CHANGELOG_FSYNC)
+        self._compacting = set()
+        # Graphs whose search documents must be rebuilt because an index
+        # update failed after their changes were committed, with the search
+        # engine to rebuild them in; _reindexing holds the running rebuilds
+        self._stale_index = {}
+        self._reindexing = set()
+        # The registry lock guards graphs, graph_objs and the metadata file
+        # and is only held briefly; triples are guarded per graph, so many
+        # queries read a graph at once while its mutations are serialized
+        self._registry_lock = threading.RLock()
+        self._locks = LockTable()
+        self._load_locks = LockTable()
+        # Search index kept in sync with triple mutations, if any
+        self.search_engine = search_engine
+        # Query history (models.history.QueryHistory), if any
+        self.history = history
+        self._reindex_status = {"state": "idle"}
+        # Parsed SPARQL queries shared by all graphs
+        self.plan_cache = QueryPlanCache()
+        # Serialized SPARQL read results; entries of deleted graphs are dropped
+        self.result_cache = ResultCache()
+        # Bumped on every mutation of a graph's triples; result caches key on it
+        self._versions = {}  # key: graph_id, value: version counter
+        # In multi-worker mode other processes share the data directory:
+        # writes hold cross-process file locks and each resident graph
+        # remembers the disk state it reflects, to catch up when it changes
+        self.multi_worker = MULTI_WORKER if multi_worker is None else multi_worker
+        self._file_locks = {}  # key: graph_id (None for metadata), value: FileLock
+        self._disk = {}  # key: graph_id, value: (snapshot state, log inode, log offset)
+        self._metadata_state = None
         self._load()
 
     def _load(self):
-        """Load graph metadata and RDF data from storage."""
-        # Load metadata
+        """Register graphs from stored metadata without parsing their RDF data.
+
+        Graph data is parsed on first access through ``get_graph_object``.
+        """
+        with self._updating_metadata():
+            # Load metadata
+            if not os.path.exists(self.data_file):
+                self._metadata_dirty = True
+            elif self._metadata_state is None:
+                self._read_metadata()
+            # Discover RDF data files and sync metadata
+            data_dir = self.data_dir
+            if not os.path.isdir(data_dir):
+                os.makedirs(data_dir, exist_ok=True)
+            if not self.multi_worker:
+                # Left over by a crash; with several workers they may
+                # belong to a write in progress
+                remove_temp_files(data_dir)
+            existing_files = set()
+            for fname in os.listdir(data_dir):
+                gid, ext = os.path.splitext(fname)
+                if ext in SNAPSHOT_EXTENSIONS:
+                    existing_files.add(gid)
+                    # Create metadata if missing
+                    if gid not in self.graphs:
+                        created_at = datetime.now().isoformat()
+                        self.graphs[gid] = {
+                            "graph_id": gid,
+                            "name": gid,
+                            "created_at": created_at,
+                            "sparql_read": None,
+                            "sparql_update": None,
+                            "auth_type": "None",
+                            "auth_info": None,
+                        }
+                        self._metadata_dirty = True
+            # Remove metadata entries for missing files
+            for gid in list(self.graphs.keys()):
+                if gid not in existing_files:
+                    del self.graphs[gid]
+                    self._metadata_dirty = True
+        # Persist metadata changes
+        self._save()
+
+    def _read_metadata(self):
+        """Replace the registry with the contents of the metadata file.
+
+        Resident graphs that are no longer listed, or whose read-only flag
+        (and with it their store) changed, are dropped.
+        """
+        data = {}
         if os.path.exists(self.data_file):
             with open(self.data_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                for graph_id, meta in data.items():
-                    graph = Graph(
-                        graph_id,
-                        meta.get("name", ""),
-                        meta.get("created_at", ""),
-                        meta.get("sparql_read"),
-                        meta.get("sparql_update"),
-                        meta.get("auth_type", "None"),
-                        meta.get("auth_info"),
-                    )
-                    self.graphs[graph_id] = meta
-                    self.graph_objs[graph_id] = graph
-        # Load RDF data files and sync metadata
-        data_dir = GRAPHS_DATA_DIR
-        if not os.path.isdir(data_dir):
-            os.makedirs(data_dir, exist_ok=True)
-        existing_files = set()
-        for fname in os.listdir(data_dir):
-            if fname.endswith(".ttl"):
-                gid = fname[:-4]
-                existing_files.add(gid)
-                # Create metadata if missing
-                if gid not in self.graphs:
-                    created_at = datetime.now().isoformat()
-                    self.graphs[gid] = {
-                        "graph_id": gid,
-                        "name": gid,
-                        "created_at": created_at,
-                        "sparql_read": None,
-                        "sparql_update": None,
-                        "auth_type": "None",
-                        "auth_info": None,
-                    }
-                file_path = os.path.join(data_dir, fname)
-                self.graph_objs[gid] = Graph.load_from_file(
-                    file_path,
-                    gid,
-                    self.graphs[gid].get("name", ""),
-                    self.graphs[gid].get("created_at", ""),
-                    self.graphs[gid].get("sparql_read"),
-                    self.graphs[gid].get("sparql_update"),
-                    self.graphs[gid].get("auth_type", "None"),
-                    self.graphs[gid].get("auth_info"),
-                )
-        # Remove metadata entries for missing files
-        for gid in list(self.graphs.keys()):
-            if gid not in existing_files:
-                del self.graphs[gid]
+        for gid, graph in list(self.graph_objs.items()):
+            meta = data.get(gid)
+            if meta is None or bool(meta.get("read_only")) != graph.read_only:
                 self.graph_objs.pop(gid, None)
-        # Persist changes
-        self._save()
+                self._dirty.pop(gid, None)
+                self._disk.pop(gid, None)
+                self._bump_version(gid)
+            else:
+                graph.name = meta.get("name", graph.name)
+        self.graphs = data
+        self._metadata_state = file_state(self.data_file)
+
+    def _write_metadata(self):
+        with atomic_write(self.data_file, "w", encoding="utf-8") as f:
+            json.dump(self.graphs, f, indent=2)
+        self._metadata_dirty = False
+        self._metadata_state = file_state(self.data_file)
+
+    def _sync_metadata(self):
+        """Reload the metadata file when another worker changed it."""
+        if not self.multi_worker or file_state(self.data_file) == self._metadata_state:
+            return
+        with self._registry_lock, self._shared_lock(None):
+            if file_state(self.data_file) != self._metadata_state:
+                self._read_metadata()
+
+    @contextmanager
+    def _updating_metadata(self):
+        """Hold the registry lock while changing graph metadata.
+
+        In multi-worker mode the metadata file lock is held as well: the
+        changes of other workers are read first and the file is rewritten
+        before the lock is released, so concurrent changes are not lost.
+        """
+        with self._registry_lock:
+            if not self.multi_worker:
+                yield
+                return
+            with self._shared_lock(None):
+                self._sync_metadata()
+                yield
+                if self._metadata_dirty:
+                    self._write_metadata()
+
+    def _shared_lock(self, graph_id):
+        """Return the cross-process lock of a graph, or of the metadata file
+        for ``graph_id=None``; a no-op outside multi-worker mode."""
+        if not self.multi_worker:
+            return nullcontext()
+        lock = self._file_locks.get(graph_id)
+        if lock is None:
+            if graph_id is None:
+                path = self.data_file + ".lock"
+            else:
+                path = os.path.join(self.data_dir, ".locks", f"{graph_id}.lock")
+            lock = self._file_locks.setdefault(graph_id, FileLock(path))
+        return lock
+
+    def _disk_state(self, graph_id):
+        """Return (snapshot state, log inode, log size) of a graph's files."""
+        log = file_state(self.changelog.path(graph_id))
+        return (
+            file_state(self._snapshot_path(graph_id)),
+            log[0] if log else None,
+            log[2] if log else 0,
+        )
+
+    def _catch_up(self, graph_id, graph):
+        """Apply the changes other workers made to a resident graph.
+
+        The caller holds the graph's write lock and shared lock. Entries
+        appended to the change log since this copy was loaded are replayed;
+        a new snapshot or log (after a compaction) reloads the graph in
+        place, so holders of the Graph object see the new triples.
+        """
+        if graph.read_only or graph.sparql_read or graph_id not in self.graphs:
+            return
+        snapshot, log_inode, offset = self._disk.get(graph_id, _NO_FILES)
+        current = self._disk_state(graph_id)
+        if current == (snapshot, log_inode, offset):
+            return
+        if current[0] != snapshot or log_inode not in (None, current[1]) or current[2] < offset:
+            graph.graph = self._load_graph(graph_id).graph
+        else:
+            _, end = self.changelog.replay_from(graph_id, graph.graph, offset)
+            self._disk[graph_id] = (snapshot, current[1], end)
+        self._bump_version(graph_id)
+
+    def _sync_graph(self, graph_id):
+        """Catch a resident graph up with other workers' changes."""
+        graph = self.graph_objs.get(graph_id)
+        if graph is None or graph.read_only or graph.sparql_read:
+            return
+        if self._disk.get(graph_id, _NO_FILES) == self._disk_state(graph_id):
+            return
+        lock = self._locks.get(graph_id)
+        if lock.owns_read():
+            # This thread is reading the graph and keeps the view it started with
+            return
+        with lock.write(), self._shared_lock(graph_id):
+            self._catch_up(graph_id, graph)
+
+    @contextmanager
+    def _writing(self, graph_id):
+        """Hold a graph's write lock for a mutation.
+
+        In multi-worker mode the graph's shared lock is held as well and
+        the resident graph first catches up with other workers' changes.
+        """
+        with self._locks.write(graph_id), self._shared_lock(graph_id):
+            if self.multi_worker:
+                self._sync_metadata()
+                graph = self.graph_objs.get(graph_id)
+                if graph is not None:
+                    self._catch_up(graph_id, graph)
+            yield
+
+    @contextmanager
+    def _mutating(self, graph_id):
+        """Hold a graph's write lock and yield its Graph object, or None when
+        the graph does not exist.
+
+        The object is fetched under the lock, so eviction cannot replace it
+        with a fresh copy while it is written. Existence and the read-only
+        flag are checked once the lock is held: a writer that waited while
+        the graph was deleted gets None, and one that waited while it was
+        flagged read-only raises ReadOnlyGraphError.
+        """
+        with self._writing(graph_id):
+            if graph_id not in self.graphs:
+                yield None
+                return
+            self._check_writable(graph_id)
+            yield self.get_graph_object(graph_id)
+
+    def _load_graph(self, graph_id):
+        """Parse a registered graph from its snapshot and change log."""
+        meta = self.graphs[graph_id]
+        with self._shared_lock(graph_id):
+            file_path = self._snapshot_path(graph_id)
+            if meta.get("read_only"):
+                mapped_path = os.path.join(self.data_dir, f"{graph_id}{MAPPED_EXTENSION}")
+                if not os.path.exists(mapped_path):
+                    self._build_mapped(graph_id, file_path, mapped_path)
+                file_path = mapped_path
+            graph = Graph.load_from_file(
+                file_path,
+                graph_id,
+                meta.get("name", ""),
+                meta.get("created_at", ""),
+                meta.get("sparql_read"),
+                meta.get("sparql_update"),
+                meta.get("auth_type", "None"),
+                meta.get("auth_info"),
+            )
+            if not graph.sparql_read and not graph.read_only:
+                _, end = self.changelog.replay_from(graph_id, graph.graph)
+                if self.multi_worker:
+                    snapshot, log_inode, _ = self._disk_state(graph_id)
+                    self._disk[graph_id] = (snapshot, log_inode, end)
+                if self.changelog.size(graph_id) >= CHANGELOG_COMPACT_BYTES:
+                    self._schedule_compaction(graph_id)
+        return graph
+
+    def _build_mapped(self, graph_id, snapshot_path, mapped_path):
+        """Build the memory-mapped index of a graph from its snapshot and log."""
+        source = Graph.load_from_file(snapshot_path, graph_id, "", "")
+        self.changelog.replay(graph_id, source.graph)
+        build_mapped_index(source.graph, mapped_path)
+
+    def set_read_only(self, graph_id, read_only=True):
+        """Flag a graph read-only and serve it from a memory-mapped index.
+
+        The regular snapshot stays the source of truth; clearing the flag
+        drops the mapped index and reloads the graph from the snapshot.
+        """
+        self._sync_metadata()
+        meta = self.graphs.get(graph_id)
+        if meta is None:
+            return False
+        if meta.get("sparql_read"):
+            raise ValueError("Remote SPARQL graphs cannot be memory-mapped")
+        mapped_path = os.path.join(self.data_dir, f"{graph_id}{MAPPED_EXTENSION}")
+        with self._writing(graph_id):
+            # The next access loads the graph with the matching store
+            with self._registry_lock:
+                graph = self.graph_objs.pop(graph_id, None)
+            if read_only and not meta.get("read_only"):
+                # Fold pending changes so the snapshot is complete
+                if graph is not None:
+                    self._write_snapshot(graph)
+                self._build_mapped(graph_id, self._snapshot_path(graph_id), mapped_path)
+            elif not read_only:
+                if graph is not None and graph.read_only:
+                    graph.graph.close()
+                if os.path.exists(mapped_path):
+                    os.unlink(mapped_path)
+            with self._updating_metadata():
+                self.graphs[graph_id]["read_only"] = bool(read_only)
+                self._metadata_dirty = True
+            self._save()
+        return True
+
+    def _evict(self):
+        """Drop least recently used graphs beyond the resident cap.
+
+        Graphs that are being read or written are skipped; they are evicted
+        by a later call once they are idle. Victims are detached under the
+        registry lock and their snapshots written after releasing it; each
+        keeps its write and load locks until then, so the graph is neither
+        changed nor reloaded from a snapshot still being written.
+        """
+        if not self.max_resident:
+            return
+        victims = []
+        with self._registry_lock:
+            for gid in list(self.graph_objs):
+                if len(self.graph_objs) <= self.max_resident:
+                    break
+                lock = self._locks.get(gid)
+                if not lock.acquire_write(blocking=False):
+                    continue
+                load_lock = self._load_locks.get(gid)
+                if not load_lock.acquire_write(blocking=False):
+                    lock.release_write()
+                    continue
+                victims.append((self.graph_objs.pop(gid), lock, load_lock))
+        for graph, lock, load_lock in victims:
+            try:
+                if graph.graph_id in self._dirty:
+                    self._write_snapshot(graph)
+            finally:
+                load_lock.release_write()
+                lock.release_write()
+
+    def _snapshot_path(self, graph_id):
+        """Return the snapshot file of a graph, preferring the binary format."""
+        for ext in SNAPSHOT_EXTENSIONS:
+            file_path = os.path.join(self.data_dir, f"{graph_id}{ext}")
+            if os.path.exists(file_path):
+                return file_path
+        return os.path.join(self.data_dir, f"{graph_id}{SNAPSHOT_EXTENSION}")
+
+    def _write_snapshot(self, graph):
+        """Write a fresh snapshot of a graph and retire its change log.
 
-    def _save(self):
-        """Persist current graph metadata and RDF data to storage."""
+        In multi-worker mode nothing is written, and False returned, when
+        another worker changed the graph since this copy caught up: the
+        snapshot would drop those changes.
+        """
+        graph_id = graph.graph_id
+        with self._shared_lock(graph_id):
+            if self.multi_worker and self._disk.get(graph_id, _NO_FILES) != self._disk_state(graph_id):
+                return False
+            file_path = graph.serialize(self.data_dir)
+            # Drop a snapshot left over in the other format, e.g. legacy Turtle
+            for ext in SNAPSHOT_EXTENSIONS:
+                stale = os.path.join(self.data_dir, f"{graph_id}{ext}")
+                if stale != file_path and os.path.exists(stale):
+                    os.unlink(stale)
+            # The snapshot now contains every logged mutation
+            self.changelog.truncate(graph_id)
+            self._dirty.pop(graph_id, None)
+            if self.multi_worker:
+                self._disk[graph_id] = self._disk_state(graph_id)
+        return True
+
+    def is_resident(self, graph_id):
+        """Return True when the graph's triples are currently held in memory."""
+        return graph_id in self.graph_objs
+
+    def mark_dirty(self, graph_id, changes=1):
+        """Record that the triples of a graph changed since the last flush."""
+        self._dirty[graph_id] = self._dirty.get(graph_id, 0) + changes
+        self._bump_version(graph_id)
+
+    def _bump_version(self, graph_id):
+        self._versions[graph_id] = self._versions.get(graph_id, 0) + 1
+
+    def graph_version(self, graph_id):
+        """Return a counter that changes whenever the graph's triples change."""
+        if self.multi_worker:
+            self._sync_graph(graph_id)
+        return self._versions.get(graph_id, 0)
+
+    def pending_changes(self):
+        """Return the number of unflushed mutations per dirty graph."""
+        return dict(self._dirty)
+
+    def _save(self, full=False):
+        """Persist graph metadata and the RDF data of changed graphs.
+
+        Only graphs marked dirty since the last flush are re-serialized and
+        the metadata file is only rewritten when it changed. Pass
+        ``full=True`` to rewrite everything.
+        """
         # Ensure data directory exists
-        data_dir = GRAPHS_DATA_DIR
+        data_dir = self.data_dir
         os.makedirs(data_dir, exist_ok=True)
-        # Save metadata
-        with open(self.data_file, "w", encoding="utf-8") as f:
-            json.dump(self.graphs, f, indent=2)
-        # Save each graph's RDF data
-        for gid, graph in self.graph_objs.items():
-            graph.serialize(data_dir)
+        with self._updating_metadata():
+            # Save metadata
+            if full or self._metadata_dirty:
+                self._write_metadata()
+            targets = list(self.graph_objs) if full else list(self._dirty)
+        # Save RDF data of the graphs that changed. A graph that another
+        # thread is writing is left dirty: its changes are in the change
+        # log, and that writer saves it when it is done.
+        for gid in targets:
+            graph = self.graph_objs.get(gid)
+            if graph is None or graph.read_only:
+                self._dirty.pop(gid, None)
+                continue
+            lock = self._locks.get(gid)
+            if not lock.acquire_read(blocking=False):
+                continue
+            try:
+                self._write_snapshot(graph)
+            finally:
+                lock.release_read()
+
+    def _log_changes(self, graph_id, ops):
+        """Persist triple mutations by appending them to the graph's change log."""
+        self._bump_version(graph_id)
+        graph = self.graph_objs.get(graph_id)
+        if graph is not None and graph.sparql_read:
+            # Remote graphs are not replayed locally; keep the snapshot path
+            self.mark_dirty(graph_id, len(ops))
+            self._save()
+            return
+        self.changelog.append(graph_id, ops)
+        if self.multi_worker:
+            # The graph was caught up before this append (see _writing)
+            self._disk[graph_id] = self._disk_state(graph_id)
+        if self.changelog.size(graph_id) >= CHANGELOG_COMPACT_BYTES:
+            self._schedule_compaction(graph_id)
+
+    def _index_changes(self, graph_id, ops):
+        """Apply the search-index delta of a batch of triple mutations.
+
+        Every IRI touched by the batch is re-indexed with its current
+        labels, or dropped from the index when the graph no longer
+        mentions it.
+        """
+        if self.search_engine is None or not ops:
+            return
+        graph = self.graph_objs.get(graph_id)
+        if graph is None or graph.sparql_read:
+            return
+        if graph_id in self._stale_index:
+            # A rebuild is pending and picks these changes up as well
+            self._schedule_reindex(graph_id, self.search_engine)
+            return
+        affected = {
+            term for _, triple in ops for term in triple if isinstance(term, URIRef)
+        }
+        entities = []
+        removed = []
+        for iri in affected:
+            if graph.mentions(iri):
+                entities.append(_entity(iri, graph.labels(iri), graph_id))
+            else:
+                removed.append(str(iri))
+        self._index_or_defer(
+            graph_id,
+            self.search_engine,
+            lambda: self.search_engine.update_entities(entities, removed, graph_id),
+        )
+
+    def _index_or_defer(self, graph_id, search_engine, update):
+        """Run the index update of changes that were already committed.
+
+        A failure (e.g. another worker holding the index lock for too
+        long) must not fail the mutation, so it is logged and the graph's
+        documents are rebuilt in the background instead.
+        """
+        try:
+            update()
+        except Exception:
+            logger.warning(
+                "Indexing graph %s failed; rebuilding its documents later",
+                graph_id,
+                exc_info=True,
+            )
+            self._schedule_reindex(graph_id, search_engine)
+
+    def _schedule_reindex(self, graph_id, search_engine):
+        with self._registry_lock:
+            self._stale_index[graph_id] = search_engine
+            if graph_id in self._reindexing:
+                return
+            self._reindexing.add(graph_id)
+        thread = threading.Thread(
+            target=self._reindex_stale,
+            args=(graph_id,),
+            name=f"reindex-{graph_id}",
+            daemon=True,
+        )
+        thread.start()
+
+    def _reindex_stale(self, graph_id):
+        """Rebuild the search documents of a graph marked stale.
+
+        Retries every INDEX_RETRY_DELAY seconds; after INDEX_RETRY_ATTEMPTS
+        failures in a row the graph stays marked and the next mutation
+        schedules another rebuild.
+        """
+        failures = 0
+        while True:
+            with self._registry_lock:
+                if graph_id not in self._stale_index or failures >= INDEX_RETRY_ATTEMPTS:
+                    self._reindexing.discard(graph_id)
+                    return
+                search_engine = self._stale_index.pop(graph_id)
+            try:
+                # Entities are collected under the lock so they match one
+                # version of the graph; the index is written after releasing it
+                with self._locks.read(graph_id):
+                    graph = self.get_graph_object(graph_id)
+                    entities = [] if graph is None else list(graph.entities(graph_id))
+                count = search_engine.replace_graph(graph_id, entities)
+                failures = 0
+                logger.info("Rebuilt %d search documents of graph %s", count, graph_id)
+            except Exception:
+                failures += 1
+                with self._registry_lock:
+                    self._stale_index.setdefault(graph_id, search_engine)
+                logger.warning(
+                    "Rebuilding the search documents of graph %s failed (attempt %d)",
+                    graph_id,
+                    failures,
+                    exc_info=True,
+                )
+                if failures < INDEX_RETRY_ATTEMPTS:
+                    time.sleep(INDEX_RETRY_DELAY)
+
+    def _schedule_compaction(self, graph_id):
+        with self._registry_lock:
+            if graph_id in self._compacting:
+                return
+            self._compacting.add(graph_id)
+        thread = threading.Thread(
+            target=self.compact, args=(graph_id,), name=f"compact-{graph_id}", daemon=True
+        )
+        thread.start()
+
+    def compact(self, graph_id):
+        """Fold the change log of a graph into a fresh snapshot."""
+        try:
+            # Readers may continue; appends to the log wait for the snapshot
+            with self._locks.read(graph_id):
+                # Fetched under the lock: an evicted copy may miss later changes
+                graph = self.get_graph_object(graph_id)
+                if graph is None:
+                    return False
+                self._write_snapshot(graph)
+            return True
+        finally:
+            self._compacting.discard(graph_id)
 
     def create_graph(
         self,
@@ -324,103 +1076,561 @@ class GraphManager:
         graph = Graph(
             graph_id, name, created_at, sparql_read, sparql_update, auth_type, auth_info
         )
-        self.graphs[graph_id] = graph.to_dict()
-        self.graph_objs[graph_id] = graph
+        # The snapshot is written before the graph is registered, so a
+        # starting worker never prunes the new entry as a graph without data,
+        # and without holding the registry lock
+        self._write_snapshot(graph)
+        with self._updating_metadata():
+            self.graphs[graph_id] = graph.to_dict()
+            self._metadata_dirty = True
+            self.graph_objs[graph_id] = graph
         self._save()
+        self._evict()
         return graph.to_dict()
 
     def index_graph(self, graph_id, search_engine):
-        self.graph_objs[graph_id].index(search_engine, graph_id)
+        self.get_graph_object(graph_id).index(search_engine, graph_id)
 
     def list_graphs(self):
         """List all available graphs with their metadata"""
+        self._sync_metadata()
         return [graph for graph in self.graphs.values()]
 
-    def reindex_all(self, search_engine):
+    def reindex_all(self, search_engine, workers=None, job=None):
         """Re‑index every stored graph in the search engine.
         Clears the existing index and indexes all graph entities.
+        Local graphs are indexed in parallel worker processes, each into its
+        own temporary index whose segments are merged at the end. Progress
+        is mirrored to ``job`` (see models.jobs), which may cancel the run
+        between graphs.
         Returns the number of graphs indexed.
         """
-        # Reset index – easiest to create a fresh Whoosh index
-        search_engine.create_index()
-        count = 0
-        for graph_id in self.graph_objs:
-            print("indexing ", self.graphs[graph_id]["name"])
-            self.graph_objs[graph_id].index(search_engine, graph_id)
-            count += 1
-        return count
+        workers = workers or REINDEX_WORKERS or os.cpu_count() or 1
+        # Workers read the graphs from disk, so flush pending changes first
+        self._save()
+        local = {}
+        remote = []
+        for graph_id, meta in list(self.graphs.items()):
+            if meta.get("sparql_read"):
+                remote.append(graph_id)
+            elif meta.get("read_only"):
+                # Make sure the mapped index exists before a worker opens it
+                graph = self.get_graph_object(graph_id)
+                local[graph_id] = graph.graph.store.path
+            else:
+                local[graph_id] = self._snapshot_path(graph_id)
+        status = self._reindex_status
+        status.update(
+            state="running",
+            graphs_total=len(self.graphs),
+            graphs_done=0,
+            triples=0,
+            entities=0,
+            started_at=datetime.now().isoformat(),
+            finished_at=None,
+            error=None,
+        )
+        started = time.monotonic()
+
+        def progress(triples, entities):
+            status["graphs_done"] += 1
+            status["triples"] += triples
+            status["entities"] += entities
+            elapsed = time.monotonic() - started
+            status["elapsed_seconds"] = round(elapsed, 3)
+            status["triples_per_second"] = round(status["triples"] / elapsed, 1) if elapsed else 0
+            status["entities_per_second"] = round(status["entities"] / elapsed, 1) if elapsed else 0
+            if job is not None:
+                job.update(
+                    done=status["graphs_done"],
+                    total=status["graphs_total"],
+                    triples=status["triples"],
+                    entities=status["entities"],
+                    triples_per_second=status["triples_per_second"],
+                    entities_per_second=status["entities_per_second"],
+                )
+                job.check_cancelled()
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="vibegraph-reindex-") as temp_dir:
+                shards = []
+                if local:
+                    with ProcessPoolExecutor(max_workers=min(workers, len(local))) as pool:
+                        futures = [
+                            pool.submit(
+                                _index_graph_worker,
+                                file_path,
+                                self.data_dir,
+                                graph_id,
+                                os.path.join(temp_dir, graph_id),
+                            )
+                            for graph_id, file_path in local.items()
+                        ]
+                        try:
+                            for future in as_completed(futures):
+                                graph_id, index_dir, triples, entities = future.result()
+                                print("indexed ", self.graphs.get(graph_id, {}).get("name", graph_id))
+                                shards.append(index_dir)
+                                progress(triples, entities)
+                        except BaseException:
+                            for future in futures:
+                                future.cancel()
+                            raise
+                search_engine.reset_index()
+                search_engine.merge_indexes(shards)
+            # Remote graphs are queried through their endpoint in this process
+            for graph_id in remote:
+                graph = self.get_graph_object(graph_id)
+                entities = graph.index(search_engine, graph_id)
+                progress(0, entities)
+        except Exception as e:
+            state = "cancelled" if job is not None and job.cancelled else "failed"
+            status.update(state=state, error=str(e), finished_at=datetime.now().isoformat())
+            raise
+        status.update(state="done", finished_at=datetime.now().isoformat())
+        return status["graphs_done"]
+
+    def reindex_status(self):
+        """Return the progress and throughput of the last reindex."""
+        return dict(self._reindex_status)
 
     def get_graph(self, graph_id):
         """Retrieve graph metadata for a specific graph ID"""
+        self._sync_metadata()
         return self.graphs.get(graph_id)
 
     def get_graph_object(self, graph_id):
-        """Retrieve the Graph instance for a specific graph ID"""
-        return self.graph_objs.get(graph_id)
+        """Retrieve the Graph instance for a specific graph ID.
+
+        Graphs are parsed on first access; the least recently used ones are
+        evicted once more than ``max_resident`` graphs are in memory. In
+        multi-worker mode a resident graph first catches up with the changes
+        of other workers.
+        """
+        self._sync_metadata()
+        graph = self.graph_objs.get(graph_id)
+        if graph is not None:
+            try:
+                self.graph_objs.move_to_end(graph_id)
+            except KeyError:
+                pass  # evicted concurrently; the caller still gets the object
+            if self.multi_worker:
+                self._sync_graph(graph_id)
+            return graph
+        if graph_id not in self.graphs:
+            return None
+        # Loading holds only a per-graph load lock: other graphs stay
+        # available and readers of this graph may already hold its lock
+        with self._load_locks.write(graph_id):
+            graph = self.graph_objs.get(graph_id)
+            if graph is None:
+                graph = self._load_graph(graph_id)
+                with self._registry_lock:
+                    self.graph_objs[graph_id] = graph
+        self._evict()
+        return graph
 
     def delete_graph(self, graph_id):
         """Delete a graph by its ID"""
+        self._sync_metadata()
         if graph_id in self.graphs:
-            del self.graphs[graph_id]
-            self.graph_objs.pop(graph_id, None)
-            graph_file = os.path.join(
-                os.path.dirname(self.data_file), "graphs_data", f"{graph_id}.ttl"
-            )
-            print(graph_file, "exists?", os.path.exists(graph_file))
-            if os.path.exists(graph_file):
-                os.unlink(graph_file)
+            with self._writing(graph_id), self._updating_metadata():
+                if graph_id not in self.graphs:
+                    return False  # deleted while this thread waited
+                # Dropping the metadata under the write lock marks the graph
+                # deleted for writers still waiting on the lock (see _mutating)
+                self.graphs.pop(graph_id, None)
+                self.graph_objs.pop(graph_id, None)
+                self._dirty.pop(graph_id, None)
+                self._disk.pop(graph_id, None)
+                self._metadata_dirty = True
+                for ext in SNAPSHOT_EXTENSIONS + (MAPPED_EXTENSION,):
+                    graph_file = os.path.join(self.data_dir, f"{graph_id}{ext}")
+                    if os.path.exists(graph_file):
+                        os.unlink(graph_file)
+                self.changelog.truncate(graph_id)
+            self._locks.discard(graph_id)
+            self._load_locks.discard(graph_id)
+            self.result_cache.invalidate(graph_id)
+            if self.history is not None:
+                self.history.clear(graph_id)
             self._save()
             return True
         return False
 
+    def _check_writable(self, graph_id):
+        if self.graphs[graph_id].get("read_only"):
+            raise ReadOnlyGraphError(f"Graph {graph_id} is read-only")
+
     def add_triple(self, graph_id, triple):
-        if graph_id in self.graphs:
-            g = self.get_graph_object(graph_id).add_triple(triple)
-            self._save()
-            return True
-        return False
+        self._sync_metadata()
+        with self._mutating(graph_id) as graph_obj:
+            if graph_obj is None:
+                return False
+            added = graph_obj.add_triple(triple)
+            self._log_changes(graph_id, [(ADD, added)])
+            self._index_changes(graph_id, [(ADD, added)])
+        return True
 
     def remove_triple(self, graph_id, triple):
-        if graph_id in self.graphs:
-            graph_obj = self.get_graph_object(graph_id)
+        self._sync_metadata()
+        with self._mutating(graph_id) as graph_obj:
+            if graph_obj is None:
+                return False
             wrapped = (
                 graph_obj.wrap(triple[0], "s", prefixNS=self.prefixes),
                 graph_obj.wrap(triple[1], "p", prefixNS=self.prefixes),
                 graph_obj.wrap(triple[2], "o", prefixNS=self.prefixes),
             )
             graph_obj.graph.remove(wrapped)
+            self._log_changes(graph_id, [(REMOVE, wrapped)])
+            self._index_changes(graph_id, [(REMOVE, wrapped)])
+        return True
+
+    def sparql_update(self, graph_id, query):
+        """Run a SPARQL UPDATE on a graph and persist and index its changes.
+
+        Returns the number of triples added or removed, or None when the
+        graph does not exist.
+        """
+        self._sync_metadata()
+        with self._mutating(graph_id) as graph_obj:
+            if graph_obj is None:
+                return None
+            if graph_obj.sparql_read:
+                # Remote endpoints apply the update themselves
+                graph_obj.graph.update(query)
+                self.mark_dirty(graph_id)
+                self._save()
+                return 0
+            parsed = prepare_update(query, graph_obj.graph.namespaces())
+            with ChangeRecorder(graph_obj.graph.store) as recorder:
+                graph_obj.graph.update(parsed)
+            self._log_changes(graph_id, recorder.ops)
+            self._index_changes(graph_id, recorder.ops)
+        return len(recorder.ops)
+
+    def query(self, graph_id, query, budget=None):
+        """Run a SPARQL query, reusing the parsed plan of a repeated query.
+
+        With a ``budget`` (models.budget.QueryBudget) the evaluation is
+        charged for every triple pattern match and raises
+        QueryLimitExceeded once a limit is hit.
+        """
+        graph_obj = self.get_graph_object(graph_id)
+        if not graph_obj:
+            raise ValueError(f"Graph {graph_id} not found")
+        plan = self.plan_cache.prepare(query, graph_obj.graph.namespaces())
+        graph = graph_obj.graph
+        if budget is not None:
+            graph = BudgetedGraph(graph, budget)
+        # ASK/CONSTRUCT/DESCRIBE are evaluated here; SELECT rows are evaluated
+        # as they are read, so callers consume them under read_lock()
+        with self._locks.read(graph_id):
+            return graph.query(plan)
+
+    def read_lock(self, graph_id):
+        """Context manager holding a graph's read lock.
+
+        In multi-worker mode the graph first catches up with other
+        workers' changes; the reader then keeps a consistent view.
+        """
+        if self.multi_worker:
+            self._sync_graph(graph_id)
+        return self._locks.read(graph_id)
+
+    def import_file(self, graph_id, file_path, fmt="turtle", search_engine=None, job=None):
+        """Parse an RDF file into a graph, persist it and re-index the graph.
+
+        The file is parsed into a scratch graph first, so a cancelled
+        ``job`` leaves the target graph untouched. Returns the number of
+        parsed triples, or None when the graph does not exist.
+        """
+        self._sync_metadata()
+        if graph_id not in self.graphs:
+            return None
+        self._check_writable(graph_id)
+        if job is not None:
+            job.update(stage="parsing")
+        parsed = RDFGraph(store=TRIPLE_STORE)
+        parsed.parse(file_path, format=fmt)
+        if job is not None:
+            job.update(stage="storing", triples=len(parsed))
+            job.check_cancelled()
+        with self._mutating(graph_id) as graph_obj:
+            if graph_obj is None:
+                return None
+            graph_obj.graph.addN((s, p, o, graph_obj.graph) for s, p, o in parsed)
+            for prefix, namespace in parsed.namespaces():
+                graph_obj.graph.bind(prefix, namespace, override=False)
+            self.mark_dirty(graph_id, len(parsed))
             self._save()
-            return True
-        return False
+        if search_engine is not None:
+            if job is not None:
+                job.update(stage="indexing")
+            self._index_or_defer(
+                graph_id, search_engine, lambda: graph_obj.index(search_engine, graph_id)
+            )
+        return len(parsed)
+
+    def bulk_load(
+        self,
+        graph_id,
+        file_paths,
+        search_engine=None,
+        job=None,
+        workers=None,
+        chunk_bytes=BULKLOAD_CHUNK_BYTES,
+        progress=None,
+    ):
+        """Load N-Triples/N-Quads files into a graph with the parallel bulk loader.
+
+        ``progress`` is called like the loader's (see models.bulkload).
+        The graph is only locked while the loaded triples are merged in.
+        Returns the number of parsed triples, or None when the graph does
+        not exist.
+        """
+        self._sync_metadata()
+        if graph_id not in self.graphs:
+            return None
+        self._check_writable(graph_id)
+
+        def report(done, total, triples):
+            if progress is not None:
+                progress(done, total, triples)
+            if job is not None:
+                job.update(ranges_done=done, ranges_total=total, triples=triples)
+                job.check_cancelled()
+
+        # The files are loaded into a scratch graph without holding the
+        # graph's lock, so the graph stays readable and writable meanwhile;
+        # the write lock is only taken to merge the result in
+        scratch = RDFGraph(store=TRIPLE_STORE)
+        count = 0
+        try:
+            count = bulk_load(
+                file_paths,
+                scratch,
+                workers=workers,
+                chunk_bytes=chunk_bytes,
+                progress=report,
+            )
+        finally:
+            # Keep whatever was loaded before a failure or cancellation
+            graph_obj = self._merge_scratch(graph_id, scratch)
+        if graph_obj is None:
+            return None
+        if search_engine is not None:
+            if job is not None:
+                job.update(stage="indexing")
+            self._index_or_defer(
+                graph_id, search_engine, lambda: graph_obj.index(search_engine, graph_id)
+            )
+        return count
+
+    def _merge_scratch(self, graph_id, scratch):
+        """Merge a scratch graph into a graph under its write lock and persist it.
+
+        VibeStore graphs are merged at the id level, re-encoding the smaller
+        of the two stores. Returns the Graph object, or None when the graph
+        no longer exists.
+        """
+        with self._mutating(graph_id) as graph_obj:
+            if graph_obj is None:
+                return None
+            loaded = len(scratch)
+            if loaded:
+                store = graph_obj.graph.store
+                if hasattr(store, "absorb") and type(scratch.store) is type(store):
+                    store.absorb(scratch.store)
+                else:
+                    graph_obj.graph.addN((s, p, o, graph_obj.graph) for s, p, o in scratch)
+                self.mark_dirty(graph_id, loaded)
+                self._save()
+            return graph_obj
+
+    def ingest_stream(
+        self,
+        graph_id,
+        stream,
+        search_engine=None,
+        job=None,
+        total_bytes=None,
+        batch_size=INGEST_BATCH_SIZE,
+        chunk_size=INGEST_CHUNK_BYTES,
+    ):
+        """Stream an N-Triples/N-Quads document into a graph in batches.
+
+        A parser thread reads ``stream`` in chunks and hands batches of
+        triples to this thread, which inserts them; an indexer thread feeds
+        the same batches to ``search_engine``. Queues between the stages are
+        bounded, so memory stays flat. Batches stored before a failure or
+        cancellation are kept and persisted. Returns the number of triples
+        read, or None when the graph does not exist.
+        """
+        self._sync_metadata()
+        if graph_id not in self.graphs:
+            return None
+        self._check_writable(graph_id)
+        batches = queue.Queue(maxsize=2)
+        to_index = queue.Queue(maxsize=2)
+        stop = threading.Event()
+        errors = []
+        done = object()
+
+        def put(q, item):
+            # Give up when the consumer stopped, instead of blocking forever
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def parse():
+            def progress(consumed):
+                if job is not None:
+                    job.update(bytes_read=consumed, bytes_total=total_bytes)
+
+            try:
+                for batch in iter_batches(stream, batch_size, chunk_size, progress):
+                    if not put(batches, batch):
+                        return
+            except Exception as e:
+                errors.append(e)
+            put(batches, done)
+
+        index_failed = threading.Event()
+
+        def index():
+            seen = set()
+            label_predicates = {URIRef(p) for p in LABEL_PREDICATES}
+            while True:
+                batch = to_index.get()
+                if batch is done:
+                    return
+                if index_failed.is_set():
+                    continue  # the graph is rebuilt once the load is done
+                try:
+                    affected = set()
+                    for s, p, o in batch:
+                        if p in label_predicates and isinstance(s, URIRef):
+                            affected.add(s)
+                        for term in (s, p, o):
+                            if isinstance(term, URIRef) and term not in seen:
+                                affected.add(term)
+                    seen.update(affected)
+                    with self._locks.read(graph_id):
+                        graph_obj = self.get_graph_object(graph_id)
+                        if graph_obj is None:
+                            return  # deleted meanwhile
+                        entities = [
+                            _entity(iri, graph_obj.labels(iri), graph_id) for iri in affected
+                        ]
+                    search_engine.update_entities(entities, [], graph_id)
+                except Exception:
+                    # The batches are already stored; don't fail the load
+                    logger.warning(
+                        "Indexing graph %s failed during ingest", graph_id, exc_info=True
+                    )
+                    index_failed.set()
+
+        threads = [threading.Thread(target=parse, name=f"ingest-parse-{graph_id}", daemon=True)]
+        if search_engine is not None:
+            threads.append(threading.Thread(target=index, name=f"ingest-index-{graph_id}", daemon=True))
+        for thread in threads:
+            thread.start()
+        count = 0
+        try:
+            while True:
+                try:
+                    batch = batches.get(timeout=0.1)
+                except queue.Empty:
+                    # The parser gives up without a sentinel once the
+                    # indexer failed, so check for that on every wakeup
+                    if stop.is_set():
+                        break
+                    continue
+                if batch is done or stop.is_set():
+                    break
+                if job is not None:
+                    job.check_cancelled()
+                with self._mutating(graph_id) as graph_obj:
+                    if graph_obj is None:
+                        break  # deleted meanwhile
+                    graph_obj.graph.addN((s, p, o, graph_obj.graph) for s, p, o in batch)
+                    if self.multi_worker:
+                        # Other workers see each batch, and catching up with
+                        # their changes never reloads over unsaved ones
+                        self._log_changes(graph_id, [(ADD, triple) for triple in batch])
+                    else:
+                        # Dirty from the first batch on, so an eviction
+                        # between batches saves them
+                        self.mark_dirty(graph_id, len(batch))
+                count += len(batch)
+                if job is not None:
+                    job.update(triples=count)
+                if search_engine is not None and not put(to_index, batch):
+                    break
+        finally:
+            if search_engine is not None:
+                put(to_index, done)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            with self._writing(graph_id):
+                if self.multi_worker:
+                    self.mark_dirty(graph_id, count)
+                self._save()
+            if index_failed.is_set():
+                self._schedule_reindex(graph_id, search_engine)
+        if errors:
+            raise errors[0]
+        return count
 
     def clear_all(self, clear_history=True):
         """Remove all graphs and associated data from storage."""
-        self.graphs = {}
-        self.graph_objs = {}
+        with self._updating_metadata():
+            self.graphs = {}
+            self.graph_objs = OrderedDict()
+            self._dirty = {}
+            self._disk = {}
+            self._metadata_dirty = True
+        self.result_cache.clear()
 
         # Remove graph data files
-        if os.path.isdir(GRAPHS_DATA_DIR):
-            for fname in os.listdir(GRAPHS_DATA_DIR):
-                file_path = os.path.join(GRAPHS_DATA_DIR, fname)
+        if os.path.isdir(self.data_dir):
+            for fname in os.listdir(self.data_dir):
+                file_path = os.path.join(self.data_dir, fname)
                 if os.path.isfile(file_path):
                     os.unlink(file_path)
         # Reset metadata file
         if os.path.exists(GRAPH_DATA_FILE):
-            with open(GRAPH_DATA_FILE, "w", encoding="utf-8") as f:
+            with atomic_write(GRAPH_DATA_FILE, "w", encoding="utf-8") as f:
                 json.dump({}, f, indent=2)
 
         # Optionally clear query history
         if clear_history:
             shutil.rmtree(QUERY_HISTORY_DIR, ignore_errors=True)
             os.makedirs(QUERY_HISTORY_DIR, exist_ok=True)
+            if self.history is not None:
+                self.history.clear()
 
         self._save()
 
-    def update_graph(self, graph_id, name=None):
-        """Update the name of an existing graph"""
+    def update_graph(self, graph_id, name=None, read_only=None):
+        """Update the name or read-only flag of an existing graph"""
+        self._sync_metadata()
         if graph_id in self.graphs:
             if name is not None:
-                self.graphs[graph_id]["name"] = name
+                with self._updating_metadata():
+                    self.graphs[graph_id]["name"] = name
+                    self._metadata_dirty = True
+            if read_only is not None and bool(read_only) != bool(
+                self.graphs[graph_id].get("read_only")
+            ):
+                self.set_read_only(graph_id, read_only)
             self._save()
             return True
         return False
@@ -434,10 +1644,89 @@ class GraphManager:
             raise ValueError(f"Graph {graph_id} not found")
         # for s, p, o in graph_obj.graph:
         #     print(s, p, o)
-        return [
-            {"subject": str(s), "predicate": str(p), "object": str(o)}
-            for s, p, o in graph_obj.graph
-        ]
+        with self._locks.read(graph_id):
+            return [
+                {"subject": str(s), "predicate": str(p), "object": str(o)}
+                for s, p, o in graph_obj.graph
+            ]
+
+    def get_triples_page(
+        self,
+        graph_id,
+        subject=None,
+        predicate=None,
+        obj=None,
+        limit=TRIPLES_PAGE_SIZE,
+        cursor=None,
+    ):
+        """Return one page of the triples matching an optional pattern.
+
+        Only the requested page is materialized: stores that support it
+        resume from the cursor position in their indexes, others fall back to
+        an offset. The result holds ``triples``, ``next_cursor`` (None on the
+        last page) and ``total``, the number of matches when the store can
+        count them cheaply, else None.
+        """
+        graph_obj = self.get_graph_object(graph_id)
+        if not graph_obj:
+            raise ValueError(f"Graph {graph_id} not found")
+        limit = max(1, min(int(limit), TRIPLES_MAX_PAGE_SIZE))
+        pattern = (
+            graph_obj.wrap(subject, "s") if subject else None,
+            graph_obj.wrap(predicate, "p") if predicate else None,
+            graph_obj.wrap(obj, "o") if obj else None,
+        )
+        after = _decode_cursor(cursor) if cursor else None
+        store = graph_obj.graph.store
+        with self._locks.read(graph_id):
+            if hasattr(store, "triples_page"):
+                triples, position = store.triples_page(pattern, limit, after)
+            else:
+                offset = after or 0
+                triples = list(islice(graph_obj.graph.triples(pattern), offset, offset + limit + 1))
+                position = offset + limit if len(triples) > limit else None
+                triples = triples[:limit]
+            if hasattr(store, "count"):
+                total = store.count(pattern)
+            elif pattern == (None, None, None):
+                total = len(graph_obj.graph)
+            else:
+                total = None
+        return {
+            "triples": [
+                {"subject": str(s), "predicate": str(p), "object": str(o)}
+                for s, p, o in triples
+            ],
+            "next_cursor": _encode_cursor(position) if position is not None else None,
+            "total": total,
+            "limit": limit,
+        }
+
+    def get_neighbors(
+        self,
+        graph_id,
+        iris,
+        depth=1,
+        direction="both",
+        fanout=NEIGHBORS_FANOUT,
+        predicates=None,
+    ):
+        """Return the neighborhood of nodes as a node/edge payload (see Graph.neighbors)."""
+        graph_obj = self.get_graph_object(graph_id)
+        if not graph_obj:
+            raise ValueError(f"Graph {graph_id} not found")
+        if not iris:
+            raise ValueError("At least one IRI is required")
+        depth = max(1, min(int(depth), NEIGHBORS_MAX_DEPTH))
+        fanout = max(1, min(int(fanout), NEIGHBORS_MAX_FANOUT))
+        with self._locks.read(graph_id):
+            return graph_obj.neighbors(
+                [graph_obj.wrap(iri, "s") for iri in iris],
+                depth=depth,
+                direction=direction,
+                fanout=fanout,
+                predicates=[graph_obj.wrap(p, "p") for p in predicates or []],
+            )
 
     def save_prefixes(self):
         save_prefixes(self.prefixes)
@@ -459,4 +1748,5 @@ class GraphManager:
         self.save_prefixes()
 
 
-# Each graph's RDF data is stored in "graphs_data/<graph_id>.ttl"
+# Each graph's RDF data is stored in "graphs_data/<graph_id>.vgb", with
+# pending triple mutations in "graphs_data/<graph_id>.log"
@@ -0,0 +1,396 @@
+"""
+Query history store.
+Executed queries are recorded in an SQLite table by a background writer
+thread, so recording a query never delays its response. Each entry keeps
+the query text, timing, row count and a hash of the result set; the rows
+themselves are stored (compressed) only when the client asks for it or
+when they are small. Old entries are evicted by age and by a per-graph
+entry cap. Listings page through the (graph, timestamp) index and never
+load result payloads and never wait for the writer. Query texts are
+searched through a trigram full-text index. History files written by older
+versions are imported on start.
+"""
+
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from contextlib import closing
+from datetime import datetime, timedelta
+
+from config import QUERY_HISTORY_DB, QUERY_HISTORY_DIR
+from config import QUERY_HISTORY_RESULT_BYTES, QUERY_HISTORY_MAX_ENTRIES
+from config import QUERY_HISTORY_RETENTION_DAYS
+from config import QUERY_HISTORY_PAGE_SIZE, QUERY_HISTORY_MAX_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    query_id TEXT PRIMARY KEY,
+    graph_id TEXT NOT NULL,
+    query TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    duration REAL,
+    row_count INTEGER NOT NULL,
+    result_hash TEXT,
+    vars TEXT,
+    truncated TEXT,
+    results BLOB
+);
+CREATE INDEX IF NOT EXISTS history_graph_time ON history (graph_id, timestamp);
+CREATE INDEX IF NOT EXISTS history_time ON history (timestamp);
+"""
+
+# Trigram full-text index over the query texts, kept in step with the
+# history table by triggers (REPLACE fires the delete trigger because
+# connections enable recursive_triggers)
+_TEXT_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS history_text USING fts5("
+    "query, content='history', content_rowid='rowid', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS history_text_insert AFTER INSERT ON history BEGIN "
+    "INSERT INTO history_text (rowid, query) VALUES (new.rowid, new.query); END",
+    "CREATE TRIGGER IF NOT EXISTS history_text_delete AFTER DELETE ON history BEGIN "
+    "INSERT INTO history_text (history_text, rowid, query) "
+    "VALUES ('delete', old.rowid, old.query); END",
+)
+
+# Shortest search text the trigram index can answer
+_MIN_INDEXED_SEARCH = 3
+
+_COLUMNS = (
+    "query_id, graph_id, query, timestamp, duration, row_count, result_hash, vars, truncated"
+)
+
+# Entries written per transaction
+_BATCH_SIZE = 256
+
+# Seconds between sweeps for entries past the retention period
+_SWEEP_INTERVAL = 3600
+
+
+def _timestamp():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    try:
+        timestamp, rowid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(timestamp), int(rowid)
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor") from None
+
+
+def _row_to_entry(row):
+    entry = {
+        "query_id": row[0],
+        "graph_id": row[1],
+        "query": row[2],
+        "timestamp": row[3],
+        "duration": row[4],
+        "count": row[5],
+        "result_hash": row[6],
+        "vars": json.loads(row[7]) if row[7] else [],
+    }
+    if row[8]:
+        entry["truncated"] = json.loads(row[8])
+    return entry
+
+
+class QueryHistory:
+    """Per-graph query history backed by SQLite with an asynchronous writer."""
+
+    def __init__(
+        self,
+        path=QUERY_HISTORY_DB,
+        result_bytes=QUERY_HISTORY_RESULT_BYTES,
+        max_entries=QUERY_HISTORY_MAX_ENTRIES,
+        retention_days=QUERY_HISTORY_RETENTION_DAYS,
+        legacy_dir=QUERY_HISTORY_DIR,
+    ):
+        self.path = path
+        self.result_bytes = result_bytes
+        self.max_entries = max_entries
+        self.retention_days = retention_days
+        self.legacy_dir = legacy_dir
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._text_index = self._create_text_index(conn)
+        # Entries recorded but not yet written, served by get() meanwhile
+        self._pending = {}  # key: query_id, value: record tuple
+        self._pending_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._last_sweep = 0.0
+        self._thread = threading.Thread(target=self._run, name="query-history", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA recursive_triggers=ON")
+        return conn
+
+    @staticmethod
+    def _create_text_index(conn):
+        """Create and fill the full-text index of query texts if missing.
+
+        Returns False when this SQLite build has no FTS5 trigram tokenizer;
+        searches then scan the graph's entries.
+        """
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'history_text'"
+            ).fetchone()
+            if not exists:
+                for statement in _TEXT_SCHEMA:
+                    conn.execute(statement)
+                conn.execute("INSERT INTO history_text (history_text) VALUES ('rebuild')")
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            logger.warning("Query history search falls back to scanning: %s", e)
+            return False
+        return True
+
+    def record(self, graph_id, query, results, vars=None, duration=None,
+               keep_results=False, truncated=None):
+        """Queue a history entry and return its query id.
+
+        ``results`` (a list of row dicts) is serialized by the writer thread
+        and stored only if ``keep_results`` or it is under ``result_bytes``.
+        """
+        query_id = str(uuid.uuid4())
+        record = (
+            query_id,
+            graph_id,
+            query,
+            _timestamp(),
+            duration,
+            [str(var) for var in vars or []],
+            truncated,
+            results,
+            keep_results,
+        )
+        with self._pending_lock:
+            self._pending[query_id] = record
+        self._queue.put(record)
+        return query_id
+
+    def flush(self):
+        """Block until every recorded entry has been written."""
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    # Writer thread
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            self._import_legacy(conn)
+        except Exception:
+            logger.exception("Importing legacy query history failed")
+        while True:
+            record = self._queue.get()
+            if record is None:
+                self._queue.task_done()
+                break
+            batch = [record]
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._queue.put(None)  # stop after this batch
+                    self._queue.task_done()
+                    break
+                batch.append(record)
+            try:
+                self._write(conn, batch)
+            except Exception:
+                logger.exception("Writing %d query history entries failed", len(batch))
+            finally:
+                with self._pending_lock:
+                    for record in batch:
+                        self._pending.pop(record[0], None)
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
+
+    def _encode(self, record):
+        query_id, graph_id, query, timestamp, duration, vars, truncated, results, keep = record
+        payload = json.dumps(results, separators=(",", ":"), default=str).encode("utf-8")
+        stored = None
+        if keep or len(payload) <= self.result_bytes:
+            stored = zlib.compress(payload)
+        return (
+            query_id,
+            graph_id,
+            query,
+            timestamp,
+            duration,
+            len(results),
+            hashlib.sha256(payload).hexdigest(),
+            json.dumps(vars),
+            json.dumps(truncated) if truncated else None,
+            stored,
+        )
+
+    def _write(self, conn, batch):
+        rows = [self._encode(record) for record in batch]
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO history ({_COLUMNS}, results) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn, {row[1] for row in rows})
+
+    def _evict(self, conn, graph_ids):
+        """Apply the per-graph entry cap and, periodically, the retention period."""
+        if self.max_entries > 0:
+            for graph_id in graph_ids:
+                conn.execute(
+                    "DELETE FROM history WHERE graph_id = ? AND timestamp < ("
+                    "SELECT timestamp FROM history WHERE graph_id = ? "
+                    "ORDER BY timestamp DESC LIMIT 1 OFFSET ?)",
+                    (graph_id, graph_id, self.max_entries - 1),
+                )
+        now = time.monotonic()
+        if self.retention_days > 0 and now - self._last_sweep >= _SWEEP_INTERVAL:
+            self._last_sweep = now
+            cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+            conn.execute(
+                "DELETE FROM history WHERE timestamp < ?", (cutoff.isoformat() + "Z",)
+            )
+
+    def _import_legacy(self, conn):
+        """Move per-query JSON files of older versions into the table."""
+        if not self.legacy_dir or not os.path.isdir(self.legacy_dir):
+            return
+        for graph_id in os.listdir(self.legacy_dir):
+            graph_dir = os.path.join(self.legacy_dir, graph_id)
+            if not os.path.isdir(graph_dir):
+                continue
+            batch, paths = [], []
+            for filename in os.listdir(graph_dir):
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(graph_dir, filename)
+                try:
+                    with open(path, "r") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                results = entry.get("results") or []
+                batch.append((
+                    entry.get("query_id") or filename[:-5],
+                    graph_id,
+                    entry.get("query", ""),
+                    entry.get("timestamp") or _timestamp(),
+                    None,
+                    sorted(results[0]) if results else [],
+                    None,
+                    results,
+                    True,  # these results were kept before; keep them
+                ))
+                paths.append(path)
+            if batch:
+                self._write(conn, batch)
+                for path in paths:
+                    os.unlink(path)
+                logger.info("Imported %d legacy history entries of graph %s", len(batch), graph_id)
+
+    # Reads
+
+    def _pending_entry(self, graph_id, query_id):
+        with self._pending_lock:
+            record = self._pending.get(query_id)
+        if record is None or record[1] != graph_id:
+            return None
+        entry = _row_to_entry(self._encode(record)[:9])
+        entry["results"] = record[7]
+        return entry
+
+    def get(self, graph_id, query_id):
+        """Return an entry with its results (None when they were not kept)."""
+        entry = self._pending_entry(graph_id, query_id)
+        if entry is not None:
+            return entry
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS}, results FROM history WHERE graph_id = ? AND query_id = ?",
+                (graph_id, query_id),
+            ).fetchone()
+        if row is None:
+            return None
+        entry = _row_to_entry(row)
+        entry["results"] = json.loads(zlib.decompress(row[9])) if row[9] is not None else None
+        return entry
+
+    def list(self, graph_id, limit=QUERY_HISTORY_PAGE_SIZE, cursor=None, search=None):
+        """Return one page of a graph's entries, newest first, without results.
+
+        Pages are keyed on (timestamp, rowid) through the graph/time index,
+        so deep pages cost the same as the first. Only written entries are
+        listed: one recorded a moment ago shows up once the writer thread
+        has stored it (get() serves it meanwhile). ``search`` keeps the
+        entries whose query text contains it (case-insensitive); it is
+        answered from the trigram index, except for texts shorter than
+        three characters or SQLite builds without FTS5, which scan the
+        graph's entries. Returns ``(entries, next_cursor)``; the cursor is
+        None on the last page.
+        """
+        limit = max(1, min(int(limit), QUERY_HISTORY_MAX_PAGE_SIZE))
+        sql = f"SELECT {_COLUMNS}, rowid FROM history WHERE graph_id = ?"
+        params = [graph_id]
+        if cursor:
+            timestamp, rowid = _decode_cursor(cursor)
+            sql += " AND (timestamp, rowid) < (?, ?)"
+            params += [timestamp, rowid]
+        if search and self._text_index and len(search) >= _MIN_INDEXED_SEARCH:
+            sql += " AND rowid IN (SELECT rowid FROM history_text WHERE history_text MATCH ?)"
+            # One quoted phrase: matches the text as a substring
+            params.append('"' + search.replace('"', '""') + '"')
+        elif search:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql += " AND query LIKE ? ESCAPE '\\'"
+            params.append(f"%{escaped}%")
+        sql += " ORDER BY timestamp DESC, rowid DESC LIMIT ?"
+        params.append(limit + 1)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor([rows[-1][3], rows[-1][9]])
+        return [_row_to_entry(row) for row in rows], next_cursor
+
+    def clear(self, graph_id=None):
+        """Delete the history of one graph, or all history."""
+        self.flush()
+        with closing(self._connect()) as conn, conn:
+            if graph_id is None:
+                conn.execute("DELETE FROM history")
+            else:
+                conn.execute("DELETE FROM history WHERE graph_id = ?", (graph_id,))
@@ -0,0 +1,72 @@
+"""
+Streaming ingest for line-based RDF formats (N-Triples and N-Quads).
+Input is read in fixed-size chunks and parsed line by line into batches of
+triples, so memory stays bounded no matter how large the document is.
+Graph names of N-Quads statements are ignored; every statement lands in
+the target graph.
+"""
+
+from rdflib import BNode
+
+from config import INGEST_BATCH_SIZE, INGEST_CHUNK_BYTES
+from models.ntriples import parse_terms
+
+# rdflib format names handled by the streaming parser
+LINE_FORMATS = ("nt", "nt11", "ntriples", "n-triples", "nquads", "n-quads")
+
+
+def is_line_format(fmt):
+    return (fmt or "").lower() in LINE_FORMATS
+
+
+def iter_lines(stream, chunk_size=INGEST_CHUNK_BYTES, progress=None):
+    """Yield the decoded lines of a binary stream read in chunks.
+
+    ``progress`` is called with the number of bytes consumed so far.
+    """
+    tail = b""
+    consumed = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        consumed += len(chunk)
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8")
+        if progress is not None:
+            progress(consumed)
+    if tail:
+        yield tail.decode("utf-8")
+
+
+def iter_batches(stream, batch_size=INGEST_BATCH_SIZE, chunk_size=INGEST_CHUNK_BYTES, progress=None):
+    """Parse an N-Triples/N-Quads stream into lists of at most ``batch_size`` triples.
+
+    Blank node labels are scoped to the document: each label maps to a fresh
+    blank node, as rdflib's own parsers do.
+    """
+    bnodes = {}
+    batch = []
+    for lineno, line in enumerate(iter_lines(stream, chunk_size, progress), 1):
+        try:
+            terms = parse_terms(line)
+        except ValueError as e:
+            raise ValueError(f"Line {lineno}: {e}") from None
+        if terms is None:
+            continue
+        triple = []
+        for term in terms[:3]:
+            if isinstance(term, BNode):
+                fresh = bnodes.get(term)
+                if fresh is None:
+                    fresh = bnodes[term] = BNode()
+                term = fresh
+            triple.append(term)
+        batch.append(tuple(triple))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
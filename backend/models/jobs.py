@@ -0,0 +1,355 @@
+"""
+Background jobs for long-running graph operations.
+Jobs run on an in-process thread pool; their state is kept in a JSON job
+table on local disk so clients can poll progress, counts and errors, and
+so jobs interrupted by a restart are reported as failed.
+
+In multi-worker mode the workers share the job table: each records itself
+as the owner of the jobs it runs and merges the table from disk under a
+file lock before rewriting it, so any worker can report or cancel a job.
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from config import JOBS_FILE, JOB_WORKERS, JOB_MAX_FINISHED, JOB_RETENTION_DAYS
+from config import MULTI_WORKER
+from models.atomic import atomic_write
+from models.shared import FileLock, file_state
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Progress updates are persisted at most this often (seconds)
+_PROGRESS_FLUSH_INTERVAL = 1.0
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, but belongs to another user
+    return True
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function once the job was cancelled."""
+
+
+class Job:
+    """Handle passed to a job function to report progress and poll cancellation."""
+
+    def __init__(self, manager, job_id):
+        self._manager = manager
+        self.job_id = job_id
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled when cancellation was requested."""
+        self._manager._poll_cancellations()
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+    def update(self, **progress):
+        """Merge counters such as ``done``/``total`` into the job's progress."""
+        self._manager._update_progress(self.job_id, progress)
+
+
+class JobManager:
+    def __init__(
+        self,
+        jobs_file=JOBS_FILE,
+        workers=JOB_WORKERS,
+        max_finished=JOB_MAX_FINISHED,
+        retention_days=JOB_RETENTION_DAYS,
+        multi_worker=None,
+    ):
+        self.jobs_file = jobs_file
+        self.max_finished = max_finished
+        self.retention_days = retention_days
+        self.multi_worker = MULTI_WORKER if multi_worker is None else multi_worker
+        # Recorded as the "owner" of submitted jobs; the pid tells other
+        # workers whether the job can still finish, the random part tells a
+        # restarted process apart from an earlier one with the same pid
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._file_lock = FileLock(jobs_file + ".lock") if self.multi_worker else None
+        self._file_state = None  # state of the job table when last read or written
+        self._last_read = 0.0
+        self.jobs = {}  # key: job_id, value: job record
+        self._handles = {}  # key: job_id, value: Job for queued/running jobs
+        self._futures = {}
+        self._lock = threading.RLock()
+        self._last_flush = 0.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="job"
+        )
+        self._load()
+
+    def _load(self):
+        """Read the job table; jobs left unfinished by a restart are failed."""
+        with self._lock, self._shared():
+            if self._merge(self._read()):
+                self._write()
+
+    def _shared(self):
+        """Hold the job table's file lock; a no-op outside multi-worker mode."""
+        return self._file_lock if self._file_lock is not None else nullcontext()
+
+    def _read(self):
+        self._last_read = time.monotonic()
+        self._file_state = file_state(self.jobs_file)
+        if self._file_state is None:
+            return {}
+        try:
+            with open(self.jobs_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable job table {self.jobs_file}: {e}")
+            return {}
+
+    def _orphaned(self, job):
+        """Return True for a job whose owner can no longer finish it."""
+        owner = job.get("owner")
+        if owner == self.worker_id:
+            return False
+        if not self.multi_worker or not owner:
+            return True
+        pid = int(owner.split(":")[0])
+        return pid == os.getpid() or not _pid_alive(pid)
+
+    def _merge(self, table):
+        """Merge a job table read from disk into ``self.jobs``.
+
+        Records of this worker's jobs are kept (a cancellation requested
+        through another worker is passed on to the job); all others are
+        taken from disk, and unfinished ones whose owner is gone are
+        failed. Returns True when the merged table must be written back.
+        """
+        changed = False
+        for job_id, job in table.items():
+            mine = self.jobs.get(job_id)
+            if mine is not None and mine.get("owner") == self.worker_id:
+                handle = self._handles.get(job_id)
+                if job.get("cancel_requested") and handle is not None:
+                    mine["cancel_requested"] = True
+                    handle._cancel.set()
+                continue
+            if job["state"] not in FINISHED_STATES and self._orphaned(job):
+                job["state"] = FAILED
+                job["error"] = "Interrupted by a server restart"
+                job["finished_at"] = datetime.now().isoformat()
+                changed = True
+            self.jobs[job_id] = job
+        for job_id in [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job_id not in table and job.get("owner") != self.worker_id
+        ]:
+            # Pruned by another worker
+            del self.jobs[job_id]
+        return changed
+
+    def _refresh(self):
+        """Pick up job changes of other workers (multi-worker mode only)."""
+        if not self.multi_worker or file_state(self.jobs_file) == self._file_state:
+            return
+        with self._lock, self._shared():
+            if self._merge(self._read()):
+                self._write()
+
+    def _poll_cancellations(self):
+        """Pick up cancellations requested through other workers, at most
+        once per progress flush interval."""
+        if self.multi_worker and time.monotonic() - self._last_read >= _PROGRESS_FLUSH_INTERVAL:
+            self._last_read = time.monotonic()
+            self._refresh()
+
+    def _prune(self):
+        """Drop finished jobs past the retention period or beyond the
+        ``max_finished`` most recent ones."""
+        finished = sorted(
+            (job.get("finished_at") or "", job_id)
+            for job_id, job in self.jobs.items()
+            if job["state"] in FINISHED_STATES
+        )
+        expired = []
+        if self.retention_days:
+            cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+            expired = [job_id for finished_at, job_id in finished if finished_at < cutoff]
+        if self.max_finished and len(finished) > self.max_finished:
+            expired.extend(job_id for _, job_id in finished[: len(finished) - self.max_finished])
+        for job_id in expired:
+            self.jobs.pop(job_id, None)
+
+    def _save(self):
+        """Prune and persist the job table, replacing the previous file atomically.
+
+        In multi-worker mode the other workers' changes are merged first.
+        """
+        with self._lock, self._shared():
+            if self.multi_worker:
+                self._merge(self._read())
+            self._write()
+
+    def _write(self):
+        self._prune()
+        with atomic_write(self.jobs_file, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, indent=2)
+        self._file_state = file_state(self.jobs_file)
+        self._last_flush = time.monotonic()
+
+    def submit(self, job_type, func, *args, params=None, **kwargs):
+        """Queue ``func(job, *args, **kwargs)`` and return the new job record.
+
+        The return value of ``func`` is stored as the job result and must be
+        JSON serializable.
+        """
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "type": job_type,
+                "params": params or {},
+                "state": QUEUED,
+                "progress": {},
+                "result": None,
+                "error": None,
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "owner": self.worker_id,
+            }
+            handle = self._handles[job_id] = Job(self, job_id)
+            self._save()
+            self._futures[job_id] = self._executor.submit(
+                self._run, handle, func, args, kwargs
+            )
+            return dict(self.jobs[job_id])
+
+    def _run(self, handle, func, args, kwargs):
+        job_id = handle.job_id
+        with self._lock:
+            job = self.jobs[job_id]
+            if handle.cancelled:
+                job.update(state=CANCELLED, finished_at=datetime.now().isoformat())
+                self._handles.pop(job_id, None)
+                self._futures.pop(job_id, None)
+                self._save()
+                return
+            job["state"] = RUNNING
+            job["started_at"] = datetime.now().isoformat()
+            self._save()
+        try:
+            result = func(handle, *args, **kwargs)
+            state, error = DONE, None
+        except JobCancelled:
+            result, state, error = None, CANCELLED, None
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            logger.debug(traceback.format_exc())
+            result, state, error = None, FAILED, str(e)
+        with self._lock:
+            job.update(
+                state=state,
+                result=result,
+                error=error,
+                finished_at=datetime.now().isoformat(),
+            )
+            self._handles.pop(job_id, None)
+            self._futures.pop(job_id, None)
+            self._save()
+
+    def _update_progress(self, job_id, progress):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job["progress"].update(progress)
+            if time.monotonic() - self._last_flush >= _PROGRESS_FLUSH_INTERVAL:
+                self._save()
+
+    def get(self, job_id):
+        """Return a copy of a job record, or None."""
+        self._refresh()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def list_jobs(self, job_type=None):
+        """Return job records, most recent first."""
+        self._refresh()
+        with self._lock:
+            jobs = [
+                json.loads(json.dumps(job))
+                for job in self.jobs.values()
+                if job_type is None or job["type"] == job_type
+            ]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def active(self, job_type):
+        """Return the queued or running job of a type, or None."""
+        self._refresh()
+        with self._lock:
+            for job in self.jobs.values():
+                if job["type"] == job_type and job["state"] not in FINISHED_STATES:
+                    return dict(job)
+        return None
+
+    def cancel(self, job_id):
+        """Request cancellation of a job.
+
+        A queued job is cancelled at once; a running job stops at its next
+        ``check_cancelled`` call. The job of another worker is flagged in the
+        job table and stops once its worker saves the table. Returns False
+        for unknown or finished jobs.
+        """
+        with self._lock, self._shared():
+            if self.multi_worker:
+                self._merge(self._read())
+            job = self.jobs.get(job_id)
+            handle = self._handles.get(job_id)
+            if job is None or job["state"] in FINISHED_STATES:
+                return False
+            if handle is None:
+                job["cancel_requested"] = True
+                self._write()
+                return True
+            handle._cancel.set()
+            future = self._futures.get(job_id)
+            if job["state"] == QUEUED and future is not None and future.cancel():
+                job.update(state=CANCELLED, finished_at=datetime.now().isoformat())
+                self._handles.pop(job_id, None)
+                self._futures.pop(job_id, None)
+            self._save()
+            return True
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job finishes and return its record (used by tests and CLIs)."""
+        future = self._futures.get(job_id)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+        return self.get(job_id)
@@ -0,0 +1,130 @@
+"""
+Readers-writer locks for graphs.
+Each graph gets its own RWLock, so any number of queries can read a graph
+at once while its mutations are serialized, and work on one graph never
+waits for another. Waiting writers block new readers so a stream of
+queries cannot starve an update.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """Writer-preferring readers-writer lock.
+
+    Read locks are re-entrant per thread, and the thread holding the write
+    lock may take it again or read under it. Upgrading a read lock to a
+    write lock would deadlock and raises RuntimeError instead.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = {}  # key: thread ident, value: read depth
+        self._writer = None  # ident of the thread holding the write lock
+        self._write_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self, blocking=True):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me or me in self._readers:
+                self._readers[me] = self._readers.get(me, 0) + 1
+                return True
+            while self._writer is not None or self._waiting_writers:
+                if not blocking:
+                    return False
+                self._cond.wait()
+            self._readers[me] = 1
+            return True
+
+    def release_read(self, owner=None):
+        """Release a read lock; ``owner`` is the ident of the thread that took
+        it, for locks released elsewhere (e.g. by a finalized generator)."""
+        me = threading.get_ident() if owner is None else owner
+        with self._cond:
+            depth = self._readers.get(me)
+            if depth is None:
+                raise RuntimeError("Read lock released by a thread that does not hold it")
+            if depth > 1:
+                self._readers[me] = depth - 1
+            else:
+                del self._readers[me]
+                self._cond.notify_all()
+
+    def acquire_write(self, blocking=True):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return True
+            if not blocking and (self._writer is not None or self._readers):
+                return False
+            if me in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+            return True
+
+    def owns_read(self):
+        """Return True when the calling thread holds a read lock but not the
+        write lock, i.e. when it could not take the write lock."""
+        me = threading.get_ident()
+        with self._cond:
+            return me in self._readers and self._writer != me
+
+    def release_write(self):
+        with self._cond:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Write lock released by a thread that does not hold it")
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class LockTable:
+    """RWLocks created on demand, one per key (graph id)."""
+
+    def __init__(self):
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = RWLock()
+            return lock
+
+    def read(self, key):
+        return self.get(key).read()
+
+    def write(self, key):
+        return self.get(key).write()
+
+    def discard(self, key):
+        with self._lock:
+            self._locks.pop(key, None)
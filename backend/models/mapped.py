@@ -0,0 +1,378 @@
+"""
+Memory-mapped, read-only triple indexes for large reference graphs.
+A ".vgm" file holds a sorted term table and the SPO, POS and OSP indexes as
+sorted rows of three uint32 ids. The file is mapped read-only, so every
+worker process serves lookups from the same OS page cache instead of
+materializing the graph as Python objects.
+
+    header    magic, term count, blob size, triple count
+    prefixes  uint64 size, then namespace bindings (see models.snapshot),
+              padded to 8 bytes
+    kinds     one byte per term, padded to 8 bytes
+    offsets   n_terms + 1 uint64 offsets into the blob
+    blob      UTF-8 term text (see models.snapshot), padded to 8 bytes
+    spo       n_triples rows of (s, p, o)
+    pos       n_triples rows of (p, o, s)
+    osp       n_triples rows of (o, s, p)
+
+Term ids follow the byte order of (kind, text), so a term is resolved to
+its id by binary search over the mapped table. Indexes written by the
+first version ("VGM\\x01") have no prefix section.
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+
+from rdflib.store import Store
+
+from models.atomic import atomic_write
+from models.snapshot import encode_term, decode_term, encode_graph
+from models.snapshot import encode_prefixes, decode_prefixes
+
+MAPPED_MAGIC = b"VGM\x02"
+_MAGIC_V1 = b"VGM\x01"
+MAPPED_EXTENSION = ".vgm"
+
+_HEADER = struct.Struct("<4sQQQ")
+_PREFIXES_SIZE = struct.Struct("<Q")
+_ROW = 3
+_TERM_CACHE_SIZE = 100000
+
+# Rows of an index sorted in memory at once while building it; larger
+# graphs are sorted in runs merged back from temporary files
+_SORT_RUN_ROWS = 1 << 20
+# Rows buffered per read or write of a run or index
+_IO_BLOCK_ROWS = 1 << 16
+_MASK32 = 0xFFFFFFFF
+
+
+class ReadOnlyGraphError(Exception):
+    """Raised when a write targets a graph that is flagged read-only."""
+
+
+def _pad(f, size):
+    remainder = size % 8
+    if remainder:
+        f.write(b"\x00" * (8 - remainder))
+
+
+def _read_run(f):
+    """Yield the packed rows of a sorted run file."""
+    f.seek(0)
+    while True:
+        block = array("I")
+        try:
+            block.fromfile(f, _ROW * _IO_BLOCK_ROWS)
+        except EOFError:
+            pass  # the last block is short
+        if not block:
+            return
+        for i in range(0, len(block), _ROW):
+            yield (block[i] << 64) | (block[i + 1] << 32) | block[i + 2]
+
+
+def _sorted_rows(ids, order, run_rows, directory):
+    """Yield the rows of a flat id array, permuted to ``order``, in sorted
+    order as packed 96-bit integers.
+
+    Runs of ``run_rows`` rows are sorted in memory; more than one run is
+    spilled to temporary files in ``directory`` and merged.
+    """
+    a, b, c = order
+    n_rows = len(ids) // _ROW
+
+    def keys(start, end):
+        for base in range(start * _ROW, end * _ROW, _ROW):
+            yield (ids[base + a] << 64) | (ids[base + b] << 32) | ids[base + c]
+
+    if n_rows <= run_rows:
+        yield from sorted(keys(0, n_rows))
+        return
+    runs = []
+    try:
+        for start in range(0, n_rows, run_rows):
+            run = tempfile.TemporaryFile(dir=directory)
+            runs.append(run)
+            flat = array("I")
+            for key in sorted(keys(start, min(n_rows, start + run_rows))):
+                flat.extend((key >> 64, (key >> 32) & _MASK32, key & _MASK32))
+            flat.tofile(run)
+        yield from heapq.merge(*(_read_run(run) for run in runs))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def build_mapped_index(rdf_graph, file_path, run_rows=_SORT_RUN_ROWS):
+    """Write the sorted, memory-mappable indexes of an rdflib graph.
+
+    Triples are kept as a flat uint32 id array (12 bytes per triple) and
+    each index is sorted in runs of ``run_rows`` rows, so building never
+    materializes the graph as Python tuples.
+    """
+    terms, source_ids = encode_graph(rdf_graph)
+    # Number the terms that occur in a triple in (kind, text) byte order
+    used = bytearray(len(terms))
+    for tid in source_ids:
+        used[tid] = 1
+    keys = []
+    for tid, term in enumerate(terms):
+        if used[tid]:
+            kind, text = encode_term(term)
+            keys.append((kind, text.encode("utf-8"), tid))
+    del used
+    keys.sort()
+    if len(keys) >= 2**32:
+        raise ValueError("Too many terms for a mapped index")
+    remap = array("I", bytes(4 * len(terms)))
+    for new_id, (_, _, tid) in enumerate(keys):
+        remap[tid] = new_id
+    ids = array("I", (remap[tid] for tid in source_ids))
+    del source_ids, remap, terms
+
+    kinds = array("B", (kind for kind, _, _ in keys))
+    offsets = array("Q", [0])
+    position = 0
+    for _, data, _ in keys:
+        position += len(data)
+        offsets.append(position)
+    prefixes = encode_prefixes(rdf_graph.namespaces())
+    directory = os.path.dirname(os.path.abspath(file_path))
+    # Replaced atomically: workers may have the previous index mapped
+    with atomic_write(file_path) as f:
+        f.write(_HEADER.pack(MAPPED_MAGIC, len(keys), position, len(ids) // _ROW))
+        f.write(_PREFIXES_SIZE.pack(len(prefixes)))
+        f.write(prefixes)
+        _pad(f, len(prefixes))
+        kinds.tofile(f)
+        _pad(f, len(kinds))
+        offsets.tofile(f)
+        for _, data, _ in keys:
+            f.write(data)
+        _pad(f, position)
+        del keys, kinds, offsets
+        for order in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+            block = array("I")
+            for key in _sorted_rows(ids, order, run_rows, directory):
+                block.extend((key >> 64, (key >> 32) & _MASK32, key & _MASK32))
+                if len(block) >= _ROW * _IO_BLOCK_ROWS:
+                    block.tofile(f)
+                    block = array("I")
+            block.tofile(f)
+
+
+class MappedStore(Store):
+    """Read-only rdflib store over a memory-mapped ".vgm" index file."""
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        self._mmap = None
+        self._namespace = {}
+        self._prefix = {}
+        self._terms = {}
+        super().__init__(configuration, identifier)
+
+    def open(self, configuration, create=False):
+        self.path = configuration
+        with open(configuration, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_terms, blob_size, n_triples = _HEADER.unpack_from(self._mmap, 0)
+        if magic not in (MAPPED_MAGIC, _MAGIC_V1):
+            raise ValueError("Not a VibeGraph mapped index")
+        position = _HEADER.size
+        if magic == MAPPED_MAGIC:
+            (size,) = _PREFIXES_SIZE.unpack_from(self._mmap, position)
+            position += _PREFIXES_SIZE.size
+            for prefix, namespace in decode_prefixes(self._mmap[position : position + size]):
+                self.bind(prefix, namespace)
+            position += size + (-size % 8)
+        self._view = view = memoryview(self._mmap)
+        self._kinds = view[position : position + n_terms]
+        position += n_terms + (-n_terms % 8)
+        self._offsets = view[position : position + 8 * (n_terms + 1)].cast("Q")
+        position += 8 * (n_terms + 1)
+        self._blob = view[position : position + blob_size]
+        position += blob_size + (-blob_size % 8)
+        size = 4 * _ROW * n_triples
+        self._spo = view[position : position + size].cast("I")
+        self._pos = view[position + size : position + 2 * size].cast("I")
+        self._osp = view[position + 2 * size : position + 3 * size].cast("I")
+        self._n_terms = n_terms
+        self._len = n_triples
+        return None
+
+    def close(self, commit_pending_transaction=False):
+        if self._mmap is not None:
+            for name in ("_kinds", "_offsets", "_blob", "_spo", "_pos", "_osp", "_view"):
+                getattr(self, name).release()
+            self._mmap.close()
+            self._mmap = None
+
+    # Term table
+
+    def _term_key(self, tid):
+        start, end = self._offsets[tid], self._offsets[tid + 1]
+        return self._kinds[tid], bytes(self._blob[start:end])
+
+    def _term(self, tid):
+        term = self._terms.get(tid)
+        if term is None:
+            kind, data = self._term_key(tid)
+            term = decode_term(kind, data.decode("utf-8"))
+            if len(self._terms) >= _TERM_CACHE_SIZE:
+                self._terms.clear()
+            self._terms[tid] = term
+        return term
+
+    def term_id(self, term):
+        """Return the id of a term by binary search, or None when absent."""
+        kind, text = encode_term(term)
+        key = (kind, text.encode("utf-8"))
+        lo, hi = 0, self._n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n_terms and self._term_key(lo) == key:
+            return lo
+        return None
+
+    # Sorted row search
+
+    @staticmethod
+    def _bound(rows, n, prefix, upper):
+        """First row index whose prefix is >= (or > with upper) the given ids."""
+        width = len(prefix)
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            base = mid * _ROW
+            row = tuple(rows[base : base + width])
+            if row < prefix or (upper and row == prefix):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _range(self, rows, prefix):
+        if not prefix:
+            return 0, self._len
+        start = self._bound(rows, self._len, prefix, False)
+        end = self._bound(rows, self._len, prefix, True)
+        return start, end
+
+    def _select(self, triple_pattern):
+        """Pick an index and id prefix for a pattern; None when nothing matches."""
+        ids = []
+        for term in triple_pattern:
+            if term is None:
+                ids.append(None)
+                continue
+            tid = self.term_id(term)
+            if tid is None:
+                return None
+            ids.append(tid)
+        s, p, o = ids
+        if s is not None:
+            if o is not None and p is None:
+                return self._osp, (2, 0, 1), (o, s)
+            return self._spo, (0, 1, 2), tuple(i for i in (s, p, o) if i is not None)
+        if p is not None:
+            return self._pos, (1, 2, 0), tuple(i for i in (p, o) if i is not None)
+        if o is not None:
+            return self._osp, (2, 0, 1), (o,)
+        return self._spo, (0, 1, 2), ()
+
+    # Store API
+
+    def add(self, triple, context, quoted=False):
+        raise ReadOnlyGraphError("Graph is read-only")
+
+    def addN(self, quads):
+        raise ReadOnlyGraphError("Graph is read-only")
+
+    def remove(self, triple_pattern, context=None):
+        raise ReadOnlyGraphError("Graph is read-only")
+
+    def triples(self, triple_pattern, context=None):
+        selected = self._select(triple_pattern)
+        if selected is None:
+            return
+        rows, order, prefix = selected
+        start, end = self._range(rows, prefix)
+        term = self._term
+        # Positions of subject, predicate and object inside an index row
+        si, pi, oi = order.index(0), order.index(1), order.index(2)
+        for i in range(start, end):
+            base = i * _ROW
+            row = rows[base : base + _ROW]
+            yield (term(row[si]), term(row[pi]), term(row[oi])), ()
+
+    def triples_page(self, triple_pattern, limit, after=None):
+        """Return up to ``limit`` matching triples and the row position of the
+        next page (None on the last page); see VibeStore.triples_page."""
+        selected = self._select(triple_pattern)
+        if selected is None:
+            return [], None
+        rows, order, prefix = selected
+        start, end = self._range(rows, prefix)
+        if after is not None:
+            start = max(start, after + 1)
+        stop = min(end, start + limit)
+        term = self._term
+        si, pi, oi = order.index(0), order.index(1), order.index(2)
+        triples = []
+        for i in range(start, stop):
+            base = i * _ROW
+            row = rows[base : base + _ROW]
+            triples.append((term(row[si]), term(row[pi]), term(row[oi])))
+        return triples, (stop - 1 if stop < end else None)
+
+    def count(self, triple_pattern):
+        selected = self._select(triple_pattern)
+        if selected is None:
+            return 0
+        rows, _, prefix = selected
+        start, end = self._range(rows, prefix)
+        return end - start
+
+    def __len__(self, context=None):
+        return self._len
+
+    def contexts(self, triple=None):
+        return (c for c in [])
+
+    # Namespace bindings are read from the index file; later ones are kept
+    # in memory only
+
+    def bind(self, prefix, namespace, override=True):
+        if not override and (prefix in self._namespace or namespace in self._prefix):
+            return
+        old = self._namespace.pop(prefix, None)
+        if old is not None:
+            self._prefix.pop(old, None)
+        old_prefix = self._prefix.pop(namespace, None)
+        if old_prefix is not None:
+            self._namespace.pop(old_prefix, None)
+        self._namespace[prefix] = namespace
+        self._prefix[namespace] = prefix
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        for prefix, namespace in list(self._namespace.items()):
+            yield prefix, namespace
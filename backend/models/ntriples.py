@@ -0,0 +1,144 @@
+"""
+Line-level N-Triples encoding helpers for VibeGraph.
+Terms are written as valid N-Triples. Blank node labels outside the
+BLANK_NODE_LABEL syntax are replaced by a label derived from a hash of the
+original (see ``bnode_label``), so a node keeps one label in every output.
+The change log writes labels exactly instead (models.changelog); the
+reader here resolves the escapes it uses.
+"""
+
+import hashlib
+import re
+from rdflib import URIRef, Literal, BNode
+
+_TERM_RE = re.compile(
+    r'<([^>]*)>'
+    r'|_:(\S+)'
+    r'|"((?:[^"\\]|\\.)*)"(?:@([A-Za-z0-9-]+)|\^\^<([^>]*)>)?'
+)
+_ESCAPE_RE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+# Conservative subset of BLANK_NODE_LABEL; other labels are hashed, as are
+# labels that look like a hashed one, so two nodes never share a label
+_LABEL_RE = re.compile(r"[A-Za-z0-9_](?:[A-Za-z0-9_.-]*[A-Za-z0-9_-])?\Z")
+_HASHED_LABEL_RE = re.compile(r"b[0-9a-f]{40}\Z")
+_ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+
+def _unescape_match(match):
+    code = match.group(1)
+    if code[0] in "uU" and len(code) > 1:
+        return chr(int(code[1:], 16))
+    return _ESCAPES.get(code, code)
+
+
+def _unescape(value):
+    if "\\" not in value:
+        return value
+    return _ESCAPE_RE.sub(_unescape_match, value)
+
+
+def _escape(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def bnode_label(label):
+    """Return a valid N-Triples label for a blank node label.
+
+    Conforming labels are kept; others become "b" and the SHA-1 of the
+    label, the same for the same label every time.
+    """
+    if _LABEL_RE.match(label) and not _HASHED_LABEL_RE.match(label):
+        return label
+    return "b" + hashlib.sha1(label.encode("utf-8")).hexdigest()
+
+
+def term_to_nt(term):
+    """Return the N-Triples form of an RDF term."""
+    if isinstance(term, Literal):
+        value = f'"{_escape(str(term))}"'
+        if term.language:
+            return f"{value}@{term.language}"
+        if term.datatype:
+            return f"{value}^^<{term.datatype}>"
+        return value
+    if isinstance(term, BNode):
+        return f"_:{bnode_label(str(term))}"
+    return f"<{term}>"
+
+
+def triple_to_nt(triple):
+    """Return a triple as one N-Triples statement without the trailing newline."""
+    s, p, o = triple
+    return f"{term_to_nt(s)} {term_to_nt(p)} {term_to_nt(o)} ."
+
+
+def scan_terms(line):
+    """Match the RDF terms of one N-Triples/N-Quads statement.
+
+    Returns the regex matches (three for a triple, four for a quad) or None
+    for blank and comment lines. Groups are (iri, bnode, literal, lang,
+    datatype), still escaped; see ``unescape``.
+    """
+    matches = []
+    pos = 0
+    length = len(line)
+    while pos < length:
+        ch = line[pos]
+        if ch in " \t\r\n":
+            pos += 1
+            continue
+        if ch == "#" or ch == ".":
+            break
+        match = _TERM_RE.match(line, pos)
+        if not match:
+            raise ValueError(f"Invalid N-Triples statement: {line.strip()}")
+        matches.append(match)
+        pos = match.end()
+    if not matches:
+        return None
+    if len(matches) not in (3, 4):
+        raise ValueError(f"Invalid N-Triples statement: {line.strip()}")
+    return matches
+
+
+def unescape(value):
+    """Resolve N-Triples string escapes (\\n, \\uXXXX, ...)."""
+    return _unescape(value)
+
+
+def parse_terms(line):
+    """Parse the RDF terms of one N-Triples/N-Quads statement.
+
+    Returns a list of terms (three for a triple, four for a quad) or None for
+    blank and comment lines.
+    """
+    matches = scan_terms(line)
+    if matches is None:
+        return None
+    terms = []
+    for match in matches:
+        iri, bnode, literal, lang, datatype = match.groups()
+        if iri is not None:
+            terms.append(URIRef(_unescape(iri)))
+        elif bnode is not None:
+            terms.append(BNode(_unescape(bnode)))
+        elif lang:
+            terms.append(Literal(_unescape(literal), lang=lang))
+        elif datatype is not None:
+            terms.append(Literal(_unescape(literal), datatype=URIRef(datatype)))
+        else:
+            terms.append(Literal(_unescape(literal)))
+    return terms
+
+
+def parse_triple(line):
+    """Parse one N-Triples (or N-Quads) line into a triple, ignoring any graph name."""
+    terms = parse_terms(line)
+    if terms is None:
+        return None
+    return tuple(terms[:3])
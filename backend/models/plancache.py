@@ -0,0 +1,107 @@
+"""
+LRU cache of parsed and algebra-translated SPARQL queries.
+rdflib parses every query string with pyparsing and translates it to
+algebra before evaluating it; for short dashboard queries that costs more
+than the evaluation. Prepared queries are cached by normalized query text
+plus the prefix bindings they were translated with, so a repeated query
+goes straight to evaluation. pyparsing grammars are not thread-safe, so
+every SPARQL parse, of queries and of updates, is serialized here.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from rdflib.plugins.sparql import prepareQuery
+from rdflib.plugins.sparql.processor import prepareUpdate
+
+from config import QUERY_PLAN_CACHE_SIZE
+
+# String literals, IRIs and comments are tokenized so that whitespace
+# inside them is preserved and comments are dropped
+_TOKEN_RE = re.compile(
+    r'"""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|<[^<>"{}|^`\\\s]*>'
+    r"|(?P<space>(?:\s|#[^\n]*)+)"
+)
+
+
+def _replace(match):
+    return " " if match.group("space") is not None else match.group(0)
+
+
+# Held for every SPARQL parse: concurrent parses with the shared pyparsing
+# grammar fail with spurious errors
+_PARSE_LOCK = threading.Lock()
+
+
+def prepare_update(update, namespaces=()):
+    """Parse and translate a SPARQL update, with the given prefix bindings."""
+    initNs = {prefix: str(uri) for prefix, uri in namespaces}
+    with _PARSE_LOCK:
+        return prepareUpdate(update, initNs=initNs)
+
+
+def normalize_query(query):
+    """Collapse whitespace and drop comments outside literals and IRIs."""
+    return _TOKEN_RE.sub(_replace, query).strip()
+
+
+class QueryPlanCache:
+    """Thread-safe LRU cache of prepared SPARQL queries with hit/miss counters."""
+
+    def __init__(self, maxsize=QUERY_PLAN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._plans = OrderedDict()  # key: (normalized query, prefixes), value: Query
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def prepare(self, query, namespaces=()):
+        """Return the prepared query for a query string.
+
+        ``namespaces`` are the (prefix, namespace) bindings the query is
+        translated with, as rdflib's Graph.query passes the graph's own.
+        """
+        initNs = {prefix: str(uri) for prefix, uri in namespaces}
+        key = (normalize_query(query), tuple(sorted(initNs.items())))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+        # Parse outside the cache lock; a concurrent miss on the same key
+        # only costs a duplicate parse
+        with _PARSE_LOCK:
+            plan = prepareQuery(key[0], initNs=initNs)
+        if self.maxsize <= 0:
+            return plan
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+                self.evictions += 1
+        return plan
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._plans),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
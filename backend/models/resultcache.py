@@ -0,0 +1,103 @@
+"""
+Cache of serialized SPARQL read results.
+Entries are keyed by (graph id, graph version, normalized query, media
+type). GraphManager bumps a graph's version on every mutation, so a stale
+result is never served; old entries simply stop being looked up and age
+out. The cache is bounded by the total size of the stored bodies and
+entries expire after a TTL.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import RESULT_CACHE_BYTES, RESULT_CACHE_TTL
+
+# Queries whose results differ between runs on the same data
+_VOLATILE_RE = re.compile(r"(?i)\b(?:RAND|NOW|UUID|STRUUID|BNODE)\s*\(|\bSERVICE\b")
+
+
+def is_cacheable(query):
+    """Return False for queries with non-deterministic functions or SERVICE calls."""
+    return not _VOLATILE_RE.search(query)
+
+
+class ResultCache:
+    """Thread-safe LRU cache of result bodies bounded by total size in bytes."""
+
+    def __init__(self, max_bytes=RESULT_CACHE_BYTES, ttl=RESULT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key: cache key, value: (body, size, expires)
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return a cached body, or None when absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    @property
+    def max_entry_bytes(self):
+        """Largest body worth caching: a quarter of the cache."""
+        return self.max_bytes // 4
+
+    def put(self, key, body):
+        """Store a body (str or bytes); bodies over ``max_entry_bytes`` are skipped."""
+        size = len(body)
+        if self.max_bytes <= 0 or size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, size, time.monotonic() + self.ttl)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+
+    def invalidate(self, graph_id):
+        """Drop the entries of one graph, e.g. when it is deleted."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == graph_id]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
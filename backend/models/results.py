@@ -0,0 +1,300 @@
+"""
+Streaming serializers for SPARQL query results.
+SELECT solutions are serialized one row at a time as rdflib evaluates
+them and yielded as byte chunks, so first-byte latency and peak memory do
+not grow with the number of rows. The output matches rdflib's own JSON,
+XML and CSV result serializers; TSV uses N-Triples term syntax as the
+SPARQL 1.1 TSV format requires. CONSTRUCT/DESCRIBE graphs are streamed
+with models.export. With a QueryBudget, result iteration stops at the
+first exceeded limit and the JSON and XML documents are closed with a
+note of the limit, so the rows already sent remain a valid result.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import nullcontext
+from xml.sax.saxutils import escape, quoteattr
+
+from rdflib import BNode, URIRef
+
+from config import EXPORT_CHUNK_BYTES, RESULT_SPOOL_BYTES
+from models.budget import QueryLimitExceeded
+from models.export import encode_chunks, stream_graph
+from models.ntriples import term_to_nt
+
+SPARQL_RESULTS_NS = "http://www.w3.org/2005/sparql-results#"
+
+
+def iter_bindings(qres, budget=None):
+    """Yield the solutions of a SELECT result without keeping them.
+
+    Iterating an rdflib Result appends every row to ``Result.bindings``;
+    reading the pending generator directly leaves nothing behind. With a
+    ``budget`` the iteration ends quietly once a limit is hit and
+    ``budget.exceeded`` names the limit.
+    """
+    pending = getattr(qres, "_genbindings", None)
+    if pending is None:
+        pending = iter(qres.bindings)
+    else:
+        qres._genbindings = None
+    if budget is None:
+        for bindings in pending:
+            if bindings:
+                yield bindings
+        return
+    try:
+        for bindings in pending:
+            if not bindings:
+                continue
+            if not budget.row():
+                # One more solution exists beyond the row cap
+                budget.exceeded = "max_rows"
+                break
+            yield bindings
+    except QueryLimitExceeded:
+        pass
+    finally:
+        close = getattr(pending, "close", None)
+        if close is not None:
+            close()
+
+
+def _truncation(budget):
+    return budget.to_dict() if budget is not None and budget.exceeded else None
+
+
+def _json_term(term):
+    if isinstance(term, URIRef):
+        return {"type": "uri", "value": str(term)}
+    if isinstance(term, BNode):
+        return {"type": "bnode", "value": str(term)}
+    value = {"type": "literal", "value": str(term)}
+    if term.datatype:
+        value["datatype"] = str(term.datatype)
+    if term.language:
+        value["xml:lang"] = term.language
+    return value
+
+
+def _xml_term(term):
+    if isinstance(term, URIRef):
+        return f"<uri>{escape(str(term))}</uri>"
+    if isinstance(term, BNode):
+        return f"<bnode>{escape(str(term))}</bnode>"
+    if term.language:
+        return f"<literal xml:lang={quoteattr(term.language)}>{escape(str(term))}</literal>"
+    if term.datatype:
+        return f"<literal datatype={quoteattr(str(term.datatype))}>{escape(str(term))}</literal>"
+    return f"<literal>{escape(str(term))}</literal>"
+
+
+def _csv_value(term):
+    if term is None:
+        return ""
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return str(term)
+
+
+def _iter_json(qres, variables, budget=None):
+    yield (
+        '{"head":{"vars":'
+        + json.dumps([str(v) for v in variables], separators=(",", ":"))
+        + '},"results":{"bindings":['
+    )
+    separator = ""
+    for bindings in iter_bindings(qres, budget):
+        row = {}
+        for var in variables:
+            term = bindings.get(var)
+            if term is not None:
+                row[str(var)] = _json_term(term)
+        yield separator + json.dumps(row, separators=(",", ":"))
+        separator = ","
+    truncated = _truncation(budget)
+    if truncated:
+        yield ']},"truncated":' + json.dumps(truncated, separators=(",", ":")) + "}"
+    else:
+        yield "]}}"
+
+
+def _iter_xml(qres, variables, budget=None):
+    yield '<?xml version="1.0" encoding="utf-8"?>\n'
+    yield f'<sparql xmlns="{SPARQL_RESULTS_NS}"><head>'
+    for var in variables:
+        yield f"<variable name={quoteattr(str(var))}></variable>"
+    yield "</head><results>"
+    for bindings in iter_bindings(qres, budget):
+        parts = ["<result>"]
+        for var in variables:
+            term = bindings.get(var)
+            if term is not None:
+                parts.append(f"<binding name={quoteattr(str(var))}>{_xml_term(term)}</binding>")
+        parts.append("</result>")
+        yield "".join(parts)
+    yield "</results>"
+    truncated = _truncation(budget)
+    if truncated:
+        yield f"<!-- truncated: {truncated['limit']} limit exceeded -->"
+    yield "</sparql>"
+
+
+def _iter_csv(qres, variables, budget=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)  # CSV results use \r\n line endings
+    writer.writerow([str(var) for var in variables])
+    for bindings in iter_bindings(qres, budget):
+        writer.writerow([_csv_value(bindings.get(var)) for var in variables])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _iter_tsv(qres, variables, budget=None):
+    yield "\t".join(f"?{var}" for var in variables) + "\n"
+    for bindings in iter_bindings(qres, budget):
+        values = []
+        for var in variables:
+            term = bindings.get(var)
+            values.append("" if term is None else term_to_nt(term))
+        yield "\t".join(values) + "\n"
+
+
+def _iter_ask(answer, result_format):
+    value = "true" if answer else "false"
+    if result_format == "xml":
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            f'<sparql xmlns="{SPARQL_RESULTS_NS}"><head></head><boolean>{value}</boolean></sparql>'
+        )
+    elif result_format == "csv":
+        yield f"_askResult\r\n{value}\r\n"
+    elif result_format == "tsv":
+        yield f"?_askResult\n{value}\n"
+    else:
+        yield '{"head":{},"boolean":' + value + "}"
+
+
+_SELECT_WRITERS = {
+    "json": _iter_json,
+    "xml": _iter_xml,
+    "csv": _iter_csv,
+    "tsv": _iter_tsv,
+}
+
+
+def stream_result(qres, result_format, chunk_bytes=EXPORT_CHUNK_BYTES, budget=None):
+    """Yield a SPARQL result serialized as byte chunks.
+
+    ``result_format`` is a result format (json, xml, csv, tsv) for SELECT
+    and ASK, or an rdflib format name for CONSTRUCT/DESCRIBE graphs.
+    ``budget`` limits the SELECT rows; CSV and TSV have no room for a
+    truncation note, so callers should check ``budget.exceeded``.
+    """
+    if qres.type in ("CONSTRUCT", "DESCRIBE"):
+        if qres.graph is None:
+            raise ValueError("No graph data available for CONSTRUCT/DESCRIBE result")
+        yield from stream_graph(qres.graph, result_format, chunk_bytes=chunk_bytes)
+        return
+    if qres.type == "ASK":
+        lines = _iter_ask(qres.askAnswer, result_format)
+    else:
+        writer = _SELECT_WRITERS.get(result_format)
+        if writer is None:
+            raise ValueError(f"Unsupported result format: {result_format}")
+        lines = writer(qres, qres.vars or [], budget)
+    yield from encode_chunks(lines, chunk_bytes)
+
+
+class _Spool:
+    """Chunks written by a producer thread and read back while it runs.
+
+    The first ``max_memory`` bytes stay in memory and the rest goes to a
+    temporary file, so neither side needs more memory as results grow.
+    """
+
+    def __init__(self, max_memory):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        self._cond = threading.Condition()
+        self.size = 0
+        self.done = False
+        self.closed = False
+        self.error = None
+
+    def produce(self, chunks, hold):
+        try:
+            with hold():
+                for chunk in chunks:
+                    with self._cond:
+                        if self.closed:
+                            return  # the client went away
+                        self._file.seek(0, os.SEEK_END)
+                        self._file.write(chunk)
+                        self.size += len(chunk)
+                        self._cond.notify_all()
+        except BaseException as e:
+            self.error = e
+        finally:
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+
+    def wait(self, size):
+        """Block until ``size`` bytes were written or the producer finished."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done or self.size >= size)
+
+    def read(self, chunk_bytes):
+        offset = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self.done or self.size > offset)
+                    if self.size == offset:
+                        if self.error is not None:
+                            # Headers are sent; ending the body early is all
+                            # that is left to signal the failure
+                            raise self.error
+                        return
+                    self._file.seek(offset)
+                    chunk = self._file.read(min(chunk_bytes, self.size - offset))
+                offset += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._file.close()
+
+
+def spool_chunks(
+    chunks, chunk_bytes=EXPORT_CHUNK_BYTES, max_memory=RESULT_SPOOL_BYTES, hold=nullcontext
+):
+    """Consume ``chunks`` in a background thread and return an iterator
+    that streams them while they are produced.
+
+    The producer runs inside ``hold()``, e.g. a graph's read lock, which
+    is released as soon as the chunks are spooled however slowly the
+    client reads them. This call waits until the producer finished or
+    spooled ``max_memory`` bytes: small results are complete before the
+    response starts, and an error raised early (e.g. a query limit or an
+    evaluation error) is raised here. An error after that ends the stream.
+    """
+    spool = _Spool(max_memory)
+    thread = threading.Thread(
+        target=spool.produce, args=(chunks, hold), name="result-spool", daemon=True
+    )
+    thread.start()
+    spool.wait(max_memory)
+    if spool.done and spool.error is not None:
+        spool.close()
+        raise spool.error
+    return spool.read(chunk_bytes)
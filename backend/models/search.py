@@ -1,19 +1,27 @@
 from whoosh.index import create_in, open_dir
 from whoosh.fields import ID, TEXT, STORED, Schema
 from whoosh.qparser import QueryParser
+from whoosh.query import And, Term
 from whoosh.analysis import StandardAnalyzer
 import os
 import json
 import uuid
 import re
+import threading
+
+from config import INDEX_PROCS, INDEX_LIMITMB, INDEX_MULTISEGMENT, INDEX_WRITER_TIMEOUT
 
 # Whoosh Search Model
 
 
 class WhooshSearchEngine:
-    def __init__(self, path="search_index"):
+    def __init__(self, path="search_index", writer_timeout=INDEX_WRITER_TIMEOUT):
         self.path = path
         self.index = None
+        # Whoosh allows one writer at a time per index: threads take turns
+        # on this lock, other processes are waited for up to writer_timeout
+        self._writer_lock = threading.Lock()
+        self.writer_timeout = writer_timeout
         self.create_index()
 
     def create_index(self):
@@ -25,30 +33,175 @@ class WhooshSearchEngine:
         if os.listdir(self.path):
             try:
                 self.index = open_dir(self.path)
+                self._upgrade_schema()
                 return
             except Exception:
                 pass
 
-        # Define the schema for the index
-        schema = Schema(
+        # Create the index on disk
+        self.index = create_in(self.path, self._schema())
+
+    @staticmethod
+    def _schema():
+        """Define the schema for the index"""
+        return Schema(
             iri=ID(stored=True, unique=True, sortable=True),
             label=TEXT(stored=True, ),
+            labels=STORED(),
             graph_id=ID(stored=True),
         )
 
-        # Create the index on disk
-        self.index = create_in(self.path, schema)
+    def _writer(self, **kwargs):
+        """Open an index writer, retrying while another process holds the lock.
+
+        Raises whoosh.index.LockError after ``writer_timeout`` seconds.
+        """
+        return self.index.writer(timeout=self.writer_timeout, **kwargs)
+
+    def reset_index(self):
+        """Replace the index with an empty one."""
+        with self._writer_lock:
+            os.makedirs(self.path, exist_ok=True)
+            self.index = create_in(self.path, self._schema())
+
+    def merge_indexes(self, paths):
+        """Copy the documents of other Whoosh indexes into this one.
+
+        Used to combine indexes built in parallel by separate processes;
+        the documents are merged in a single commit. As in add_entities,
+        an IRI is indexed once: the first document found for it replaces
+        any existing one and later copies are skipped. Returns the number
+        of documents written.
+        """
+        seen = set()
+        with self._writer_lock:
+            writer = self._writer(limitmb=INDEX_LIMITMB)
+            try:
+                for path in paths:
+                    with open_dir(path).reader() as reader:
+                        for fields in reader.all_stored_fields():
+                            iri = fields.get("iri", "")
+                            if iri in seen:
+                                continue
+                            seen.add(iri)
+                            writer.update_document(**self._document(fields))
+            except Exception:
+                writer.cancel()
+                raise
+            writer.commit()
+        return len(seen)
+
+    def _upgrade_schema(self):
+        """Add fields introduced after an existing index was created."""
+        if "labels" not in self.index.schema:
+            writer = self._writer()
+            writer.add_field("labels", STORED())
+            writer.commit()
+
+    @staticmethod
+    def _document(entity):
+        """Return the Whoosh fields of an entity.
+
+        Every label is searchable while the stored ``label`` stays the
+        primary one; ``labels`` keeps the language-tagged variants.
+        """
+        label = entity.get("label", "")
+        labels = entity.get("labels") or []
+        texts = [label] + [lbl["value"] for lbl in labels if lbl["value"] != label]
+        return {
+            "iri": entity.get("iri", ""),
+            "label": " ".join(texts),
+            "_stored_label": label,
+            "labels": labels,
+            "graph_id": entity.get("graph_id", ""),
+        }
 
     def add_entity(self, entity):
         """Add an entity to the search index"""
-        # entity is expected to be a dict with keys: iri, label, properties (list of dicts)
-        writer = self.index.writer()
-        writer.update_document(
-            iri=entity.get("iri", ""),
-            label=entity.get("label", ""),
-            graph_id=entity.get("graph_id", ""),
-        )
-        writer.commit()
+        # entity is expected to be a dict with keys: iri, label, labels, graph_id
+        with self._writer_lock:
+            writer = self._writer()
+            writer.update_document(**self._document(entity))
+            writer.commit()
+
+    def add_entities(
+        self,
+        entities,
+        procs=INDEX_PROCS,
+        limitmb=INDEX_LIMITMB,
+        multisegment=INDEX_MULTISEGMENT,
+    ):
+        """Add many entities to the search index with a single writer.
+
+        Entities repeating an IRI that was already seen in the batch are
+        skipped. ``procs``, ``limitmb`` and ``multisegment`` are passed to
+        the Whoosh writer; with ``procs > 1`` documents are indexed by
+        several processes. Returns the number of entities written.
+        """
+        writer_args = {"limitmb": limitmb}
+        if procs > 1:
+            writer_args["procs"] = procs
+            writer_args["multisegment"] = multisegment
+        seen = set()
+        with self._writer_lock:
+            writer = self._writer(**writer_args)
+            try:
+                for entity in entities:
+                    iri = entity.get("iri", "")
+                    if iri in seen:
+                        continue
+                    seen.add(iri)
+                    writer.update_document(**self._document(entity))
+            except Exception:
+                writer.cancel()
+                raise
+            writer.commit()
+        return len(seen)
+
+    def update_entities(self, entities, removed, graph_id):
+        """Apply an index delta for one graph in a single commit.
+
+        ``entities`` are (re)indexed and the documents of the ``removed``
+        IRIs are deleted, but only when they belong to ``graph_id``.
+        """
+        if not entities and not removed:
+            return
+        with self._writer_lock:
+            writer = self._writer()
+            try:
+                for iri in removed:
+                    writer.delete_by_query(
+                        And([Term("iri", iri), Term("graph_id", graph_id)])
+                    )
+                for entity in entities:
+                    writer.update_document(**self._document(entity))
+            except Exception:
+                writer.cancel()
+                raise
+            writer.commit()
+
+    def replace_graph(self, graph_id, entities):
+        """Replace all documents of one graph in a single commit.
+
+        Used to rebuild a graph's documents after an incremental update
+        failed. Returns the number of entities written.
+        """
+        seen = set()
+        with self._writer_lock:
+            writer = self._writer()
+            try:
+                writer.delete_by_term("graph_id", graph_id)
+                for entity in entities:
+                    iri = entity.get("iri", "")
+                    if iri in seen:
+                        continue
+                    seen.add(iri)
+                    writer.update_document(**self._document(entity))
+            except Exception:
+                writer.cancel()
+                raise
+            writer.commit()
+        return len(seen)
 
     def search(self, query, search_by="iri"):
         """Search for entities using Whoosh"""
@@ -78,6 +231,7 @@ class WhooshSearchEngine:
                     {
                         "iri": result["iri"],
                         "label": result["label"],
+                        "labels": result.get("labels", []),
                         "graph_id": result["graph_id"],
                     }
                 )
@@ -0,0 +1,65 @@
+"""
+Shared on-disk state for multi-worker deployments.
+When several processes (e.g. gunicorn workers) serve one data directory,
+each keeps its own parsed copy of the graphs. Writers serialize on an
+advisory file lock per graph and one for the metadata file; readers
+notice another worker's changes by comparing file state (inode, mtime,
+size) with what they last loaded, then replay the new tail of the
+graph's change log or reload the graph after it was compacted.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+
+def file_state(path):
+    """Return (inode, mtime_ns, size) of a file, or None when it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, shared between processes.
+
+    Re-entrant per thread. flock() locks belong to an open file, so other
+    threads of the same process wait for it like other processes do.
+    """
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise RuntimeError("Multi-worker mode needs POSIX file locks")
+        self.path = path
+        self._local = threading.local()
+
+    def __enter__(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+            self._local.fd = fd
+        self._local.depth = depth + 1
+        return self
+
+    def __exit__(self, *exc):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            fd = self._local.fd
+            self._local.fd = None
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+        return False
@@ -0,0 +1,366 @@
+"""
+Binary graph snapshots for VibeGraph.
+A snapshot is a dictionary-encoded term table followed by an integer triple
+array, both written and read with bulk array I/O:
+
+    header    magic, id item size, term count, blob size, triple count
+    prefixes  uint64 size, then "prefix\\x00namespace\\x00" pairs in UTF-8
+    kinds     one byte per term (see TERM_* below)
+    offsets   n_terms + 1 uint64 offsets into the blob
+    blob      UTF-8 term text; literals append "\\x00lang" or "\\x00datatype"
+    triples   3 * n_triples term ids, sorted by subject, predicate, object
+    orders    2 * n_triples triple positions, listing the triples in
+              predicate-object-subject and then object-subject-predicate order
+    trailer   magic, CRC-32 of everything before it
+
+The orders let VibeStore fill its three indexes from sorted runs instead of
+sorting every triple on load. Snapshots written by older versions end after
+the triples; they are read without a checksum. The first version
+("VGB\\x01") has no prefix section, the second ("VGB\\x02") no orders.
+"""
+
+import gc
+import struct
+import zlib
+from array import array
+from contextlib import contextmanager
+from itertools import repeat
+from operator import lshift, or_
+from rdflib import URIRef, Literal, BNode
+
+try:
+    from rdflib.term import (
+        _castLexicalToPython,
+        _check_well_formed_types,
+        _toPythonMapping,
+        _well_formed_by_value,
+    )
+except ImportError:  # rdflib < 7 does not track ill-typed literals
+    _check_well_formed_types = None
+
+SNAPSHOT_MAGIC = b"VGB\x03"
+_MAGIC_V2 = b"VGB\x02"
+_MAGIC_V1 = b"VGB\x01"
+SNAPSHOT_EXTENSION = ".vgb"
+
+TERM_URI = 0
+TERM_BNODE = 1
+TERM_LITERAL = 2
+TERM_LANG_LITERAL = 3
+TERM_TYPED_LITERAL = 4
+
+_HEADER = struct.Struct("<4sBQQQ")
+_PREFIXES_SIZE = struct.Struct("<Q")
+
+TRAILER_MAGIC = b"VGC\x01"
+_TRAILER = struct.Struct("<4sI")
+
+
+class _Checksummed:
+    """File object wrapper keeping a running CRC-32 of the bytes passed through."""
+
+    def __init__(self, f):
+        self._f = f
+        self.crc = 0
+
+    def write(self, data):
+        self.crc = zlib.crc32(data, self.crc)
+        return self._f.write(data)
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.crc = zlib.crc32(data, self.crc)
+        return data
+
+
+def encode_term(term):
+    """Return the (kind, text) pair stored for an RDF term."""
+    if isinstance(term, Literal):
+        if term.language:
+            return TERM_LANG_LITERAL, f"{term}\x00{term.language}"
+        if term.datatype:
+            return TERM_TYPED_LITERAL, f"{term}\x00{term.datatype}"
+        return TERM_LITERAL, str(term)
+    if isinstance(term, BNode):
+        return TERM_BNODE, str(term)
+    return TERM_URI, str(term)
+
+
+def decode_term(kind, text):
+    """Rebuild an RDF term from its stored (kind, text) pair."""
+    if kind == TERM_URI:
+        return URIRef(text)
+    if kind == TERM_BNODE:
+        return BNode(text)
+    if kind == TERM_LITERAL:
+        return Literal(text)
+    value, _, extra = text.rpartition("\x00")
+    if kind == TERM_LANG_LITERAL:
+        return Literal(value, lang=extra)
+    return Literal(value, datatype=URIRef(extra))
+
+
+def _datatype_info(datatype):
+    """Return (URIRef, well-formedness checker or None) for a datatype IRI."""
+    datatype = str.__new__(URIRef, datatype)
+    if datatype not in _toPythonMapping:
+        return datatype, None
+    return datatype, _check_well_formed_types.get(datatype, _well_formed_by_value)
+
+
+def decode_terms(kinds, offsets, blob):
+    """Rebuild a snapshot term table from its kinds, offsets and UTF-8 blob.
+
+    The text was written by encode_term from live terms, so it is already
+    valid and normalized. Terms are therefore built directly rather than
+    through the rdflib constructors, which validate every IRI and parse and
+    re-serialize every literal.
+    """
+    if _check_well_formed_types is None:
+        return [
+            decode_term(kinds[i], blob[offsets[i] : offsets[i + 1]].decode("utf-8"))
+            for i in range(len(kinds))
+        ]
+    if blob.isascii():
+        # Byte offsets are character offsets, so slice one decoded string
+        blob = blob.decode("ascii")
+        decode = str
+    else:
+        decode = lambda data: data.decode("utf-8")  # noqa: E731
+    new = str.__new__
+    datatypes = {}
+    terms = []
+    append = terms.append
+    for kind, start, end in zip(kinds, offsets, offsets[1:]):
+        text = decode(blob[start:end])
+        if kind == TERM_URI:
+            append(new(URIRef, text))
+            continue
+        if kind == TERM_BNODE:
+            append(new(BNode, text))
+            continue
+        lang = datatype = ill_typed = None
+        if kind == TERM_LITERAL:
+            value = text
+        else:
+            text, _, extra = text.rpartition("\x00")
+            if kind == TERM_LANG_LITERAL:
+                lang = extra
+                value = text
+            else:
+                info = datatypes.get(extra)
+                if info is None:
+                    info = datatypes[extra] = _datatype_info(extra)
+                datatype, checker = info
+                value = _castLexicalToPython(text, datatype)
+                if checker is not None:
+                    ill_typed = not checker(text, value)
+        term = new(Literal, text)
+        term._language = lang
+        term._datatype = datatype
+        term._value = value
+        term._ill_typed = ill_typed
+        append(term)
+    return terms
+
+
+def _id_typecode(count):
+    return "I" if count < 2**32 else "Q"
+
+
+def _sort_keys(first, second, third):
+    """Return one int per triple that sorts by the three id columns in turn."""
+    n = len(first)
+    return list(
+        map(
+            or_,
+            map(lshift, first, repeat(128, n)),
+            map(or_, map(lshift, second, repeat(64, n)), third),
+        )
+    )
+
+
+def sort_triples(ids):
+    """Sort a flat s/p/o id array by subject, predicate, object.
+
+    Returns the sorted ids and the positions of the sorted triples in
+    predicate-object-subject and in object-subject-predicate order.
+    """
+    typecode = ids.typecode
+    s, p, o = ids[0::3], ids[1::3], ids[2::3]
+    n = len(s)
+    order = sorted(range(n), key=_sort_keys(s, p, o).__getitem__)
+    s, p, o = (array(typecode, map(column.__getitem__, order)) for column in (s, p, o))
+    ids = array(typecode, bytes(len(ids) * ids.itemsize))
+    ids[0::3], ids[1::3], ids[2::3] = s, p, o
+    position_typecode = _id_typecode(n)
+    orders = (
+        array(position_typecode, sorted(range(n), key=_sort_keys(p, o, s).__getitem__)),
+        array(position_typecode, sorted(range(n), key=_sort_keys(o, s, p).__getitem__)),
+    )
+    return ids, orders
+
+
+def encode_prefixes(namespaces):
+    """Encode (prefix, namespace) bindings as "prefix\\x00namespace\\x00" pairs."""
+    return "".join(f"{prefix}\x00{namespace}\x00" for prefix, namespace in namespaces).encode("utf-8")
+
+
+def decode_prefixes(data):
+    """Decode bindings written by encode_prefixes into (prefix, URIRef) pairs."""
+    parts = data.decode("utf-8").split("\x00")[:-1]
+    return [(parts[i], URIRef(parts[i + 1])) for i in range(0, len(parts) - 1, 2)]
+
+
+def write_terms_and_ids(f, terms, ids, namespaces=()):
+    """Write an already dictionary-encoded graph.
+
+    ``terms`` is the term table indexed by id, ``ids`` a flat
+    subject/predicate/object id sequence and ``namespaces`` the
+    (prefix, namespace) bindings of the graph.
+    """
+    kinds = array("B")
+    offsets = array("Q", [0])
+    chunks = []
+    position = 0
+    for term in terms:
+        kind, text = encode_term(term)
+        data = text.encode("utf-8")
+        kinds.append(kind)
+        chunks.append(data)
+        position += len(data)
+        offsets.append(position)
+    typecode = _id_typecode(len(terms))
+    if not isinstance(ids, array) or ids.typecode != typecode:
+        ids = array(typecode, ids)
+    ids, orders = sort_triples(ids)
+    out = _Checksummed(f)
+    out.write(
+        _HEADER.pack(SNAPSHOT_MAGIC, ids.itemsize, len(terms), position, len(ids) // 3)
+    )
+    prefixes = encode_prefixes(namespaces)
+    out.write(_PREFIXES_SIZE.pack(len(prefixes)))
+    out.write(prefixes)
+    kinds.tofile(out)
+    offsets.tofile(out)
+    out.write(b"".join(chunks))
+    ids.tofile(out)
+    for order in orders:
+        order.tofile(out)
+    f.write(_TRAILER.pack(TRAILER_MAGIC, out.crc))
+
+
+def encode_graph(rdf_graph):
+    """Return (terms, ids): the term table of an rdflib graph and a flat
+    subject/predicate/object id array."""
+    encoded = getattr(rdf_graph.store, "encoded", None)
+    if encoded is not None:
+        # The store is already dictionary-encoded
+        return encoded()
+    term_ids = {}
+    terms = []
+    ids = array("Q")
+    for triple in rdf_graph:
+        for term in triple:
+            tid = term_ids.get(term)
+            if tid is None:
+                tid = term_ids[term] = len(terms)
+                terms.append(term)
+            ids.append(tid)
+    return terms, ids
+
+
+def write_snapshot(f, rdf_graph):
+    """Dictionary-encode an rdflib graph and write it to a binary file object."""
+    terms, ids = encode_graph(rdf_graph)
+    write_terms_and_ids(f, terms, ids, rdf_graph.namespaces())
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector.
+
+    Loading creates one object per term and index bucket, none of them in a
+    reference cycle; left running, the collector would traverse the whole
+    heap several times over while they are built.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise EOFError
+    return data
+
+
+def read_terms_and_ids(f, verify=True):
+    """Read a snapshot and return (terms, ids, namespaces, orders) without
+    building a graph.
+
+    ``orders`` is None for snapshots written before they were stored. With
+    ``verify`` the checksum trailer, if any, must match the contents; a
+    mismatch or a truncated file raises ValueError.
+    """
+    source = f
+    if verify:
+        f = _Checksummed(f)
+    header = f.read(_HEADER.size)
+    if len(header) != _HEADER.size:
+        raise ValueError("Truncated graph snapshot header")
+    magic, itemsize, n_terms, blob_size, n_triples = _HEADER.unpack(header)
+    if magic not in (SNAPSHOT_MAGIC, _MAGIC_V2, _MAGIC_V1):
+        raise ValueError("Not a VibeGraph binary snapshot")
+    kinds = array("B")
+    offsets = array("Q")
+    ids = array("I" if itemsize == 4 else "Q")
+    namespaces = []
+    orders = None
+    try:
+        if magic != _MAGIC_V1:
+            (size,) = _PREFIXES_SIZE.unpack(_read_exact(f, _PREFIXES_SIZE.size))
+            namespaces = decode_prefixes(_read_exact(f, size))
+        kinds.fromfile(f, n_terms)
+        offsets.fromfile(f, n_terms + 1)
+        blob = _read_exact(f, blob_size)
+        ids.fromfile(f, 3 * n_triples)
+        if magic == SNAPSHOT_MAGIC:
+            typecode = _id_typecode(n_triples)
+            orders = (array(typecode), array(typecode))
+            for order in orders:
+                order.fromfile(f, n_triples)
+    except EOFError:
+        raise ValueError("Truncated graph snapshot") from None
+    if verify:
+        trailer = source.read(_TRAILER.size)
+        if trailer:
+            if len(trailer) != _TRAILER.size or not trailer.startswith(TRAILER_MAGIC):
+                raise ValueError("Corrupt graph snapshot trailer")
+            if _TRAILER.unpack(trailer)[1] != f.crc:
+                raise ValueError("Graph snapshot checksum mismatch")
+    return decode_terms(kinds, offsets, blob), ids, namespaces, orders
+
+
+def read_snapshot(f, rdf_graph, verify=True):
+    """Load a binary snapshot from a file object into an rdflib graph."""
+    with _gc_paused():
+        terms, ids, namespaces, orders = read_terms_and_ids(f, verify)
+    for prefix, namespace in namespaces:
+        rdf_graph.bind(prefix, namespace, override=True, replace=True)
+    add_encoded = getattr(rdf_graph.store, "add_encoded", None)
+    if add_encoded is not None:
+        with _gc_paused():
+            add_encoded(terms, ids, orders)
+        return len(ids) // 3
+    it = iter(ids)
+    # Terms come from a trusted table, so skip Graph.addN's per-node checks
+    rdf_graph.store.addN(
+        (terms[s], terms[p], terms[o], rdf_graph) for s, p, o in zip(it, it, it)
+    )
+    return len(ids) // 3
@@ -0,0 +1,582 @@
+"""
+Dictionary-encoded triple store for VibeGraph.
+Every RDF term is interned once and referenced by an integer id. Triples are
+kept in three indexes (SPO, POS, OSP) that map the leading term id to a
+sorted array of the two remaining ids packed into one unsigned 64-bit value,
+so a triple costs a few dozen bytes instead of several nested dict entries.
+"""
+
+import sys
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from itertools import chain, repeat
+from operator import lshift, or_
+
+from rdflib import plugin
+from rdflib.store import Store
+
+STORE_PLUGIN_NAME = "VibeGraph"
+
+_SHIFT = 32
+_MASK = (1 << _SHIFT) - 1
+_MAX_TERMS = 1 << _SHIFT
+# Buckets up to this size take inserts in place; larger ones buffer inserts
+# and merge them in bulk so hub terms never shift huge arrays per triple.
+_DIRECT_INSERT_LIMIT = 1024
+_NO_CONTEXTS = ()
+# A little-endian pair of uint32 ids reads back as high << 32 | low
+_PAIRS_ARE_PACKED = (
+    sys.byteorder == "little" and array("I").itemsize == 4 and array("Q").itemsize == 8
+)
+
+
+def _pack(high, low):
+    """Pack two id columns into one array of high << 32 | low values."""
+    if _PAIRS_ARE_PACKED and high.typecode == low.typecode == "I":
+        # Interleaving the 32-bit ids lays out the packed 64-bit values
+        pairs = array("I", bytes(8 * len(high)))
+        pairs[0::2] = low
+        pairs[1::2] = high
+        packed = array("Q")
+        packed.frombytes(pairs.tobytes())
+        return packed
+    return array("Q", map(or_, map(lshift, high, repeat(_SHIFT, len(high))), low))
+
+
+class _Index:
+    """Maps a term id to the sorted packed ids of the rest of each triple.
+
+    A bucket with a single entry is stored as a bare int, larger ones as an
+    ``array("Q")``. Inserts into large buckets go to a pending set that is
+    merged into the array when the bucket is next read.
+    """
+
+    __slots__ = ("buckets", "pending", "_lock")
+
+    def __init__(self):
+        self.buckets = {}
+        self.pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def contains(self, key, value):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return False
+        if type(bucket) is int:
+            return bucket == value
+        pending = self.pending.get(key)
+        if pending and value in pending:
+            return True
+        i = bisect_left(bucket, value)
+        return i < len(bucket) and bucket[i] == value
+
+    def add(self, key, value):
+        """Insert a value known not to be present yet."""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            self.buckets[key] = value
+        elif type(bucket) is int:
+            self.buckets[key] = array("Q", sorted((bucket, value)))
+        elif len(bucket) < _DIRECT_INSERT_LIMIT and key not in self.pending:
+            insort(bucket, value)
+        else:
+            pending = self.pending.setdefault(key, set())
+            pending.add(value)
+            if len(pending) > len(bucket) >> 3:
+                self._merge(key)
+
+    def extend(self, key, values, unique=False):
+        """Bulk-insert values and return the ones that were not present."""
+        bucket = self.get(key)
+        if bucket is None:
+            existing = ()
+        elif type(bucket) is int:
+            existing = (bucket,)
+        else:
+            existing = bucket
+        if unique:
+            fresh = sorted(values)
+        else:
+            fresh = set(values)
+            if existing:
+                fresh.difference_update(existing)
+            fresh = sorted(fresh)
+        if not fresh:
+            return fresh
+        if not existing and len(fresh) == 1:
+            self.buckets[key] = fresh[0]
+        else:
+            # Timsort merges the two sorted runs in linear time
+            self.buckets[key] = array("Q", sorted(chain(existing, fresh)))
+        return fresh
+
+    def load(self, keys, values):
+        """Fill an empty index from keys in ascending order and the values
+        of each key's run, sorted."""
+        buckets = self.buckets
+        start = 0
+        for key, count in Counter(keys).items():
+            end = start + count
+            buckets[key] = values[start] if count == 1 else values[start:end]
+            start = end
+
+    def remove(self, key, value):
+        bucket = self.get(key)
+        if bucket is None:
+            return False
+        if type(bucket) is int:
+            if bucket != value:
+                return False
+            del self.buckets[key]
+            return True
+        i = bisect_left(bucket, value)
+        if i == len(bucket) or bucket[i] != value:
+            return False
+        del bucket[i]
+        if len(bucket) == 1:
+            self.buckets[key] = bucket[0]
+        return True
+
+    def get(self, key):
+        """Return the merged bucket of a key (an int, an array or None)."""
+        if key in self.pending:
+            self._merge(key)
+        return self.buckets.get(key)
+
+    def values(self, key, high=None):
+        """Return a copy of the packed values of a key.
+
+        With ``high`` set, only values whose upper id equals it are returned.
+        """
+        bucket = self.get(key)
+        if bucket is None:
+            return ()
+        if type(bucket) is int:
+            if high is None or bucket >> _SHIFT == high:
+                return (bucket,)
+            return ()
+        if high is None:
+            return bucket[:]
+        start = bisect_left(bucket, high << _SHIFT)
+        end = bisect_left(bucket, (high + 1) << _SHIFT, start)
+        return bucket[start:end]
+
+    def count(self, key, high=None):
+        bucket = self.get(key)
+        if bucket is None:
+            return 0
+        if type(bucket) is int:
+            return 1 if high is None or bucket >> _SHIFT == high else 0
+        if high is None:
+            return len(bucket)
+        start = bisect_left(bucket, high << _SHIFT)
+        return bisect_left(bucket, (high + 1) << _SHIFT, start) - start
+
+    def page(self, key, limit, after=None, high=None):
+        """Return at most ``limit`` packed values of a key that sort after ``after``.
+
+        With ``high`` set, only values whose upper id equals it are returned.
+        """
+        bucket = self.get(key)
+        if bucket is None:
+            return ()
+        if type(bucket) is int:
+            bucket = (bucket,)
+        lo, hi = 0, len(bucket)
+        if high is not None:
+            lo = bisect_left(bucket, high << _SHIFT)
+            hi = bisect_left(bucket, (high + 1) << _SHIFT, lo)
+        if after is not None:
+            lo = max(lo, bisect_right(bucket, after, lo, hi))
+        return bucket[lo : min(hi, lo + limit)]
+
+    def _merge(self, key):
+        with self._lock:
+            pending = self.pending.get(key)
+            if not pending:
+                return
+            bucket = self.buckets[key]
+            if len(pending) < 32:
+                for value in pending:
+                    insort(bucket, value)
+            else:
+                # Publish the merged array before dropping the pending set so
+                # concurrent readers never see a bucket missing values.
+                self.buckets[key] = array("Q", sorted(chain(bucket, sorted(pending))))
+            del self.pending[key]
+
+
+class VibeStore(Store):
+    """Non context-aware rdflib store backed by integer-encoded indexes."""
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        super().__init__(configuration, identifier)
+        self.identifier = identifier
+        self._ids = {}  # key: term, value: id
+        self._terms = []  # key: id, value: term
+        self._spo = _Index()  # s -> p << 32 | o
+        self._pos = _Index()  # p -> o << 32 | s
+        self._osp = _Index()  # o -> s << 32 | p
+        self._len = 0
+        # Names the current id assignment; page positions carry it
+        self.id_epoch = uuid.uuid4().hex
+        self._namespace = {}  # key: prefix, value: namespace
+        self._prefix = {}  # key: namespace, value: prefix
+        self._intern_lock = threading.Lock()
+
+    # Term dictionary
+
+    def _intern(self, term):
+        tid = self._ids.get(term)
+        if tid is None:
+            with self._intern_lock:
+                tid = self._ids.get(term)
+                if tid is None:
+                    tid = len(self._terms)
+                    if tid >= _MAX_TERMS:
+                        raise ValueError("VibeStore term dictionary is full")
+                    self._terms.append(term)
+                    self._ids[term] = tid
+        return tid
+
+    def intern(self, term):
+        """Return the id of a term, adding it to the dictionary if needed."""
+        return self._intern(term)
+
+    def term_id(self, term):
+        """Return the id of a term, or None when the store never saw it."""
+        return self._ids.get(term)
+
+    def term(self, term_id):
+        return self._terms[term_id]
+
+    # Store API
+
+    def add(self, triple, context, quoted=False):
+        s, p, o = triple
+        sid = self._intern(s)
+        pid = self._intern(p)
+        oid = self._intern(o)
+        packed = pid << _SHIFT | oid
+        if self._spo.contains(sid, packed):
+            return
+        self._spo.add(sid, packed)
+        self._pos.add(pid, oid << _SHIFT | sid)
+        self._osp.add(oid, sid << _SHIFT | pid)
+        self._len += 1
+
+    def addN(self, quads):
+        intern = self._intern
+        self.add_ids(
+            (intern(s), intern(p), intern(o)) for s, p, o, _ in quads
+        )
+
+    def add_ids(self, id_triples):
+        """Bulk-insert (s, p, o) id triples. Returns the number of new triples."""
+        by_subject = {}
+        for s, p, o in id_triples:
+            values = by_subject.get(s)
+            if values is None:
+                by_subject[s] = [p << _SHIFT | o]
+            else:
+                values.append(p << _SHIFT | o)
+        by_predicate = {}
+        by_object = {}
+        added = 0
+        for s, values in by_subject.items():
+            fresh = self._spo.extend(s, values)
+            added += len(fresh)
+            for packed in fresh:
+                p = packed >> _SHIFT
+                o = packed & _MASK
+                values = by_predicate.get(p)
+                if values is None:
+                    by_predicate[p] = [o << _SHIFT | s]
+                else:
+                    values.append(o << _SHIFT | s)
+                values = by_object.get(o)
+                if values is None:
+                    by_object[o] = [s << _SHIFT | p]
+                else:
+                    values.append(s << _SHIFT | p)
+        for p, values in by_predicate.items():
+            self._pos.extend(p, values, unique=True)
+        for o, values in by_object.items():
+            self._osp.extend(o, values, unique=True)
+        self._len += added
+        return added
+
+    def add_encoded(self, terms, ids, orders=None):
+        """Bulk-load a dictionary-encoded graph (see models.snapshot).
+
+        ``orders``, as stored in snapshots, means ``ids`` are sorted by
+        subject, predicate, object and gives the triple positions in POS
+        and OSP order; an empty store then fills its indexes without sorting.
+        """
+        it = iter(ids)
+        if not self._terms and len(terms) < _MAX_TERMS:
+            term_ids = dict(zip(terms, range(len(terms))))
+            if len(term_ids) == len(terms):
+                # Empty store: adopt the snapshot's term table as is
+                self._terms = list(terms)
+                self._ids = term_ids
+                self.id_epoch = uuid.uuid4().hex
+                if orders is not None:
+                    return self._load_sorted(ids, orders)
+                return self.add_ids(zip(it, it, it))
+        mapping = [self._intern(term) for term in terms]
+        return self.add_ids(
+            (mapping[s], mapping[p], mapping[o]) for s, p, o in zip(it, it, it)
+        )
+
+    def _load_sorted(self, ids, orders):
+        if not isinstance(ids, array):
+            ids = array("Q", ids)
+        s, p, o = ids[0::3], ids[1::3], ids[2::3]
+        self._spo.load(s, _pack(p, o))
+        for index, order, (key, high, low) in (
+            (self._pos, orders[0], (p, o, s)),
+            (self._osp, orders[1], (o, s, p)),
+        ):
+            key, high, low = (
+                array(column.typecode, map(column.__getitem__, order)) for column in (key, high, low)
+            )
+            index.load(key, _pack(high, low))
+        self._len = len(s)
+        return self._len
+
+    def absorb(self, other):
+        """Add every triple of another VibeStore, which must not be used
+        afterwards.
+
+        The smaller of the two stores is re-encoded into the larger one:
+        when this store is the smaller one it takes over the other's
+        dictionary and indexes and adds its own triples to them. Namespace
+        bindings stay those of this store. Returns the number of triples
+        this store gained.
+        """
+        before = self._len
+        if before > other._len:
+            self.add_encoded(*other.encoded())
+            return self._len - before
+        terms, ids = self.encoded()
+        with self._intern_lock:
+            self._ids, self._terms = other._ids, other._terms
+            self._spo, self._pos, self._osp = other._spo, other._pos, other._osp
+            self._len = other._len
+            self.id_epoch = uuid.uuid4().hex
+        self.add_encoded(terms, ids)
+        return self._len - before
+
+    def encoded(self):
+        """Return (terms, ids): the term table and a flat s/p/o id array.
+
+        Removing triples never shrinks the dictionary, so the table holds
+        only the terms still used by a triple, renumbered in order of first
+        use; snapshots written from it, and stores loaded from those, stay
+        compact.
+        """
+        ids = array("Q")
+        for sid in list(self._spo.buckets):
+            for packed in self._spo.values(sid):
+                ids.extend((sid, packed >> _SHIFT, packed & _MASK))
+        store_terms = self._terms
+        remap = array("q", [-1]) * len(store_terms)
+        terms = []
+        for i, tid in enumerate(ids):
+            new_id = remap[tid]
+            if new_id < 0:
+                new_id = remap[tid] = len(terms)
+                terms.append(store_terms[tid])
+            ids[i] = new_id
+        return terms, ids
+
+    def remove(self, triple_pattern, context=None):
+        for (s, p, o), _ in list(self.triples(triple_pattern)):
+            sid = self._ids[s]
+            pid = self._ids[p]
+            oid = self._ids[o]
+            if self._spo.remove(sid, pid << _SHIFT | oid):
+                self._pos.remove(pid, oid << _SHIFT | sid)
+                self._osp.remove(oid, sid << _SHIFT | pid)
+                self._len -= 1
+
+    def triples(self, triple_pattern, context=None):
+        s, p, o = triple_pattern
+        ids = self._ids
+        sid = pid = oid = None
+        if s is not None:
+            sid = ids.get(s)
+            if sid is None:
+                return
+        if p is not None:
+            pid = ids.get(p)
+            if pid is None:
+                return
+        if o is not None:
+            oid = ids.get(o)
+            if oid is None:
+                return
+        terms = self._terms
+        if sid is not None:
+            if pid is not None:
+                if oid is not None:
+                    if self._spo.contains(sid, pid << _SHIFT | oid):
+                        yield (s, p, o), _NO_CONTEXTS
+                    return
+                for packed in self._spo.values(sid, pid):
+                    yield (s, p, terms[packed & _MASK]), _NO_CONTEXTS
+            elif oid is not None:
+                for packed in self._osp.values(oid, sid):
+                    yield (s, terms[packed & _MASK], o), _NO_CONTEXTS
+            else:
+                for packed in self._spo.values(sid):
+                    yield (s, terms[packed >> _SHIFT], terms[packed & _MASK]), _NO_CONTEXTS
+        elif pid is not None:
+            if oid is not None:
+                for packed in self._pos.values(pid, oid):
+                    yield (terms[packed & _MASK], p, o), _NO_CONTEXTS
+            else:
+                for packed in self._pos.values(pid):
+                    yield (terms[packed & _MASK], p, terms[packed >> _SHIFT]), _NO_CONTEXTS
+        elif oid is not None:
+            for packed in self._osp.values(oid):
+                yield (terms[packed >> _SHIFT], terms[packed & _MASK], o), _NO_CONTEXTS
+        else:
+            for sid in list(self._spo.buckets):
+                subject = terms[sid]
+                for packed in self._spo.values(sid):
+                    yield (subject, terms[packed >> _SHIFT], terms[packed & _MASK]), _NO_CONTEXTS
+
+    def count(self, triple_pattern):
+        """Count the triples matching a pattern straight from the indexes."""
+        s, p, o = triple_pattern
+        ids = [None if term is None else self._ids.get(term) for term in (s, p, o)]
+        for term, tid in zip((s, p, o), ids):
+            if term is not None and tid is None:
+                return 0
+        sid, pid, oid = ids
+        if sid is not None:
+            if pid is not None:
+                if oid is not None:
+                    return int(self._spo.contains(sid, pid << _SHIFT | oid))
+                return self._spo.count(sid, pid)
+            if oid is not None:
+                return self._osp.count(oid, sid)
+            return self._spo.count(sid)
+        if pid is not None:
+            return self._pos.count(pid, oid)
+        if oid is not None:
+            return self._osp.count(oid)
+        return self._len
+
+    def triples_page(self, triple_pattern, limit, after=None):
+        """Return up to ``limit`` matching triples in index order.
+
+        Returns (triples, position): ``position`` is an (id epoch, key, packed
+        value) triple to pass back as ``after`` for the next page, or None on
+        the last page. Positions stay valid across writes, but not across a
+        reload of the store or an ``absorb`` that assigned new ids: a stale
+        position raises ValueError instead of skipping or repeating triples.
+        """
+        if after is not None:
+            if not isinstance(after, (list, tuple)) or len(after) != 3:
+                raise ValueError("Invalid cursor")
+            epoch, *after = after
+            if epoch != self.id_epoch:
+                raise ValueError("Stale cursor: the graph was reloaded, start again from the first page")
+        s, p, o = triple_pattern
+        ids = [None if term is None else self._ids.get(term) for term in (s, p, o)]
+        for term, tid in zip((s, p, o), ids):
+            if term is not None and tid is None:
+                return [], None
+        sid, pid, oid = ids
+        terms = self._terms
+        if sid is not None and pid is not None and oid is not None:
+            found = after is None and self._spo.contains(sid, pid << _SHIFT | oid)
+            return ([(s, p, o)] if found else []), None
+        # (index, key, high, decode packed value into a triple)
+        if sid is not None:
+            if pid is not None:
+                scan = self._spo, sid, pid, lambda v: (s, p, terms[v & _MASK])
+            elif oid is not None:
+                scan = self._osp, oid, sid, lambda v: (s, terms[v & _MASK], o)
+            else:
+                scan = self._spo, sid, None, lambda v: (s, terms[v >> _SHIFT], terms[v & _MASK])
+        elif pid is not None:
+            if oid is not None:
+                scan = self._pos, pid, oid, lambda v: (terms[v & _MASK], p, o)
+            else:
+                scan = self._pos, pid, None, lambda v: (terms[v & _MASK], p, terms[v >> _SHIFT])
+        elif oid is not None:
+            scan = self._osp, oid, None, lambda v: (terms[v >> _SHIFT], terms[v & _MASK], o)
+        else:
+            scan = None
+        results = []
+        if scan is not None:
+            index, key, high, decode = scan
+            values = index.page(key, limit + 1, after[1] if after else None, high)
+            results = [(decode(v), (key, v)) for v in values]
+        else:
+            # Full scan in subject id order, resuming at the cursor's subject
+            key, value = after if after else (0, None)
+            while key < len(terms) and len(results) <= limit:
+                subject = terms[key]
+                for v in self._spo.page(key, limit + 1 - len(results), value):
+                    results.append(((subject, terms[v >> _SHIFT], terms[v & _MASK]), (key, v)))
+                key += 1
+                value = None
+        if len(results) > limit:
+            results = results[:limit]
+            return [triple for triple, _ in results], [self.id_epoch, *results[-1][1]]
+        return [triple for triple, _ in results], None
+
+    def __len__(self, context=None):
+        return self._len
+
+    def contexts(self, triple=None):
+        return (c for c in [])
+
+    # Namespace bindings
+
+    def bind(self, prefix, namespace, override=True):
+        bound_namespace = self._namespace.get(prefix)
+        bound_prefix = self._prefix.get(namespace)
+        if bound_prefix is None and bound_namespace is not None:
+            bound_prefix = self._prefix.get(bound_namespace)
+        if override:
+            if bound_prefix is not None:
+                del self._namespace[bound_prefix]
+            if bound_namespace is not None:
+                del self._prefix[bound_namespace]
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+        else:
+            namespace = bound_namespace if bound_namespace is not None else namespace
+            prefix = bound_prefix if bound_prefix is not None else prefix
+            self._prefix[namespace] = prefix
+            self._namespace[prefix] = namespace
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        for prefix, namespace in list(self._namespace.items()):
+            yield prefix, namespace
+
+
+plugin.register(STORE_PLUGIN_NAME, Store, "models.store", "VibeStore")
@@ -1,12 +1,19 @@
 import os
 import shutil
+import tempfile
 from flask import Blueprint, jsonify, request, Response
-from models.graph import GraphManager
+from models.graph import GraphManager, ReadOnlyGraphError
+from models.history import QueryHistory
 from routes.search import search_engine
+from routes.jobs import job_manager
+from models.ingest import is_line_format
+from models.export import stream_graph, gzip_chunks, graph_iri
+from models.results import spool_chunks
+from config import INGEST_CHUNK_BYTES, TRIPLES_PAGE_SIZE, NEIGHBORS_FANOUT
 from decorators import handle_errors, validate_graph_id
 
-# Initialize graph manager
-graph_manager = GraphManager()
+# Initialize graph manager; triple edits keep the search index up to date
+graph_manager = GraphManager(search_engine=search_engine, history=QueryHistory())
 
 graph_bp = Blueprint("graph_bp", __name__)
 
@@ -39,12 +46,20 @@ def list_graphs():
     return jsonify(graphs)
 
 
-# Get triples for a graph
+# Get a page of triples for a graph, optionally filtered by
+# subject/predicate/object; pass next_cursor back as cursor for the next page
 @graph_bp.route("/api/graphs/<graph_id>/triples", methods=["GET"])
 def get_triples(graph_id):
     try:
-        triples = graph_manager.get_triples(graph_id)
-        return jsonify({"triples": triples})
+        page = graph_manager.get_triples_page(
+            graph_id,
+            subject=request.args.get("subject"),
+            predicate=request.args.get("predicate"),
+            obj=request.args.get("object"),
+            limit=request.args.get("limit", TRIPLES_PAGE_SIZE, type=int),
+            cursor=request.args.get("cursor"),
+        )
+        return jsonify(page)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -57,6 +72,8 @@ def add_triple(graph_id):
             graph_id, (data["subject"], data["predicate"], data["object"])
         ):
             return jsonify({"message": "triple added"}), 200
+    except ReadOnlyGraphError as e:
+        return jsonify({"error": str(e)}), 403
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -70,23 +87,41 @@ def delete_triple(graph_id):
         ):
             return jsonify({"message": "triple removed"}), 200
         return jsonify({"error": "Graph not found"}), 404
+    except ReadOnlyGraphError as e:
+        return jsonify({"error": str(e)}), 403
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
 
-# Upload RDF file for a graph
+# RDF formats accepted as a raw request body, by content type
+RAW_UPLOAD_FORMATS = {
+    "application/n-triples": "nt",
+    "application/n-quads": "nquads",
+    "text/turtle": "turtle",
+    "application/trig": "trig",
+    "application/rdf+xml": "xml",
+}
+
+
+# Upload RDF file for a graph, as a multipart "file" field or the raw body
 @graph_bp.route("/api/graphs/<graph_id>/upload", methods=["POST"])
 def upload_graph(graph_id):
-    if "file" not in request.files:
+    file = request.files.get("file")
+    raw_format = request.args.get("format") or RAW_UPLOAD_FORMATS.get(request.mimetype)
+    if file is None and not raw_format:
         return jsonify({"error": "No file provided"}), 400
-    file = request.files["file"]
     try:
         graph_obj = graph_manager.get_graph_object(graph_id)
         if not graph_obj:
             return jsonify({"error": "Graph not found"}), 404
-        # Determine RDF format: use optional form field first
-        filename = file.filename.lower()
-        fmt = request.form.get("format")
+        if graph_obj.read_only:
+            return jsonify({"error": f"Graph {graph_id} is read-only"}), 403
+        if file is None:
+            filename, fmt = "", raw_format
+        else:
+            # Determine RDF format: use optional form field first
+            filename = file.filename.lower()
+            fmt = request.form.get("format")
         if not fmt:
             if filename.endswith(".ttl") or filename.endswith(".turtle"):
                 fmt = "turtle"
@@ -104,10 +139,70 @@ def upload_graph(graph_id):
                 fmt = "xml"
             else:
                 fmt = "turtle"  # default fallback
-        graph_obj.graph.parse(file, format=fmt)
-        graph_manager._save()
-        graph_manager.index_graph(graph_id, search_engine)
-        return jsonify({"message": "Graph uploaded"}), 200
+        # Spool the upload to disk in chunks; parsing runs as a background job
+        fd, upload_path = tempfile.mkstemp(prefix="vibegraph-upload-")
+        with os.fdopen(fd, "wb") as f:
+            if file is None:
+                shutil.copyfileobj(request.stream, f, INGEST_CHUNK_BYTES)
+            else:
+                file.save(f, INGEST_CHUNK_BYTES)
+        # bulk=true loads line-based formats with the multi-process bulk loader
+        bulk = (request.args.get("bulk") or request.form.get("bulk") or "").lower() in ("1", "true")
+        job = job_manager.submit(
+            "upload",
+            _upload_job,
+            graph_id,
+            upload_path,
+            fmt,
+            bulk,
+            params={"graph_id": graph_id, "filename": filename, "format": fmt, "bulk": bulk},
+        )
+        return jsonify({"message": "Upload started", "job_id": job["job_id"], "job": job}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
+def _upload_job(job, graph_id, upload_path, fmt, bulk=False):
+    try:
+        if bulk and is_line_format(fmt):
+            triples = graph_manager.bulk_load(
+                graph_id, [upload_path], search_engine=search_engine, job=job
+            )
+        elif is_line_format(fmt):
+            # Line-based formats are parsed, stored and indexed in batches
+            with open(upload_path, "rb") as stream:
+                triples = graph_manager.ingest_stream(
+                    graph_id,
+                    stream,
+                    search_engine=search_engine,
+                    job=job,
+                    total_bytes=os.path.getsize(upload_path),
+                )
+        else:
+            triples = graph_manager.import_file(
+                graph_id, upload_path, fmt, search_engine=search_engine, job=job
+            )
+        if triples is None:
+            raise ValueError("Graph not found")
+        return {"graph_id": graph_id, "triples": triples}
+    finally:
+        os.unlink(upload_path)
+
+
+# Expand nodes into their neighborhood for visualization:
+# ?iri=...&iri=...&depth=1&direction=both|out|in&limit=50&predicate=...
+@graph_bp.route("/api/graphs/<graph_id>/neighbors", methods=["GET"])
+def get_neighbors(graph_id):
+    try:
+        result = graph_manager.get_neighbors(
+            graph_id,
+            request.args.getlist("iri"),
+            depth=request.args.get("depth", 1, type=int),
+            direction=request.args.get("direction", "both"),
+            fanout=request.args.get("limit", NEIGHBORS_FANOUT, type=int),
+            predicates=request.args.getlist("predicate"),
+        )
+        return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -133,10 +228,20 @@ def export_graph(graph_id):
     if fmt not in format_map:
         return jsonify({"error": "Unsupported format"}), 400
     rdf_format, content_type, ext = format_map[fmt]
-    data = graph_obj.graph.serialize(format=rdf_format)
-    if isinstance(data, bytes):
-        data = data.decode("utf-8")
-    response = Response(data, status=200, content_type=content_type)
+    def serialize():
+        # Fetched under the lock: an evicted copy may miss later changes
+        graph = graph_manager.get_graph_object(graph_id)
+        if graph is not None:
+            yield from stream_graph(graph.graph, rdf_format, graph_name=graph_iri(graph_id))
+
+    # The body is serialized under the read lock into a spool that is sent
+    # while it grows (chunked transfer encoding); the lock is released once
+    # serialization is done, not when the client has read it all
+    chunks = spool_chunks(serialize(), hold=lambda: graph_manager.read_lock(graph_id))
+    if request.args.get("gzip", "").lower() in ("1", "true"):
+        chunks = gzip_chunks(chunks)
+        content_type, ext = "application/gzip", f"{ext}.gz"
+    response = Response(chunks, status=200, content_type=content_type)
     response.headers["Content-Disposition"] = (
         f"attachment; filename=graph-{graph_id}.{ext}"
     )
@@ -159,49 +264,80 @@ def delete_graph(graph_id):
         return jsonify({"message": "Graph deleted successfully"}), 200
 
 
-# Re‑index all graphs
+# Re‑index all graphs in the background
 @graph_bp.route("/api/graphs/reindex", methods=["POST"])
 def reindex_all_graphs():
     try:
-        count = graph_manager.reindex_all(search_engine)
-        return jsonify({"message": f"Re‑indexed {count} graphs"}), 200
+        running = job_manager.active("reindex")
+        if running is not None:
+            return jsonify({"error": "Reindex already running", "job_id": running["job_id"]}), 409
+        job = job_manager.submit("reindex", _reindex_job)
+        return jsonify(
+            {"message": "Re‑index started", "job_id": job["job_id"], "job": job}
+        ), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-# Clear all graphs and associated data
+def _reindex_job(job):
+    count = graph_manager.reindex_all(search_engine, job=job)
+    return {"graphs": count, "status": graph_manager.reindex_status()}
+
+
+# Progress of the running or last re‑index
+@graph_bp.route("/api/graphs/reindex/status", methods=["GET"])
+def reindex_status():
+    return jsonify(graph_manager.reindex_status())
+
+
+# Clear all graphs and associated data in the background
 @graph_bp.route("/api/graphs/clear", methods=["POST"])
 def clear_all_graphs():
     data = request.get_json(silent=True) or {}
-    clear_history = data.get("clear_history", True)
-    clear_index = data.get("clear_index", True)
+    clear_history = bool(data.get("clear_history", True))
+    clear_index = bool(data.get("clear_index", True))
 
     try:
-        graph_manager.clear_all(clear_history=clear_history)
-
-        if clear_index:
-            shutil.rmtree(search_engine.path, ignore_errors=True)
-            search_engine.create_index()
-
+        job = job_manager.submit(
+            "clear",
+            _clear_job,
+            clear_history,
+            clear_index,
+            params={"clear_history": clear_history, "clear_index": clear_index},
+        )
         return jsonify(
             {
-                "message": "All graphs cleared",
-                "cleared_history": bool(clear_history),
-                "cleared_index": bool(clear_index),
+                "message": "Clearing all graphs",
+                "job_id": job["job_id"],
+                "job": job,
+                "cleared_history": clear_history,
+                "cleared_index": clear_index,
             }
-        ), 200
+        ), 202
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-# Update a graph name
+def _clear_job(job, clear_history, clear_index):
+    graph_manager.clear_all(clear_history=clear_history)
+    if clear_index:
+        shutil.rmtree(search_engine.path, ignore_errors=True)
+        search_engine.create_index()
+    return {"cleared_history": clear_history, "cleared_index": clear_index}
+
+
+# Update a graph name or read-only flag
 @graph_bp.route("/api/graphs/<graph_id>", methods=["PUT"])
 def update_graph(graph_id):
     data = request.get_json()
     name = data.get("name")
-    if not name:
+    read_only = data.get("read_only")
+    if not name and read_only is None:
         return jsonify({"error": "Name is required"}), 400
 
-    if graph_manager.update_graph(graph_id, name):
-        return jsonify({"message": "Graph name updated successfully"}), 200
+    try:
+        if graph_manager.update_graph(graph_id, name or None, read_only):
+            return jsonify({"message": "Graph updated successfully"}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({"error": "Graph not found"}), 404
@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify, request
+from models.jobs import JobManager
+
+jobs_bp = Blueprint("jobs_bp", __name__)
+
+# Initialize job manager
+job_manager = JobManager()
+
+# Routes for background jobs
+
+
+# List jobs, optionally filtered by type
+@jobs_bp.route("/api/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify(job_manager.list_jobs(request.args.get("type")))
+
+
+# Get the state, progress and result of a job
+@jobs_bp.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+# Cancel a queued or running job
+@jobs_bp.route("/api/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    if job_manager.cancel(job_id):
+        return jsonify({"message": "Job cancellation requested", "job": job_manager.get(job_id)}), 202
+    if job_manager.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"error": "Job already finished"}), 409
@@ -1,16 +1,11 @@
 from flask import Blueprint, jsonify, request
-import os
-import json
-import uuid
-import datetime
-
-# Directory to store query history
-from config import QUERY_HISTORY_DIR
-
-os.makedirs(QUERY_HISTORY_DIR, exist_ok=True)
+import time
 
+from config import API_QUERY_LIMITS, QUERY_LIMIT_CEILINGS, QUERY_HISTORY_PAGE_SIZE
 from routes.graphs import graph_manager
+from models.budget import LIMIT_NAMES, QueryBudget, QueryLimitExceeded
 from models.query import SPARQLQueryProcessor
+from models.results import iter_bindings
 
 # Initialize SPARQL query processor
 sparql_processor = SPARQLQueryProcessor()
@@ -46,38 +41,52 @@ def execute_query():
         return jsonify({"error": "Graph not found"}), 404
 
     try:
+        # Execution limits: endpoint defaults, optionally overridden per
+        # request up to the admin ceilings
+        budget = QueryBudget.from_request(
+            API_QUERY_LIMITS,
+            QUERY_LIMIT_CEILINGS,
+            {name: data[name] for name in LIMIT_NAMES if data.get(name) is not None},
+        )
         # Execute the query against the RDF graph
-        qres = graph_obj.graph.query(query)
-        results = []
-        # print("query: ", query)
-        # print("result: ", qres, qres.vars)
-        vars = qres.vars if qres.vars else []
-        for row in qres:
-            # Convert each row to a dict of variable name -> value
-            if not qres.vars:
-                vars = ["s", "p", "o"]
-                results.append(
-                    {str(var): str(row[idx]) for idx, var in zip(range(3), "spo")}
-                )
+        started = time.perf_counter()
+        with graph_manager.read_lock(graph_id):
+            try:
+                qres = graph_manager.query(graph_id, query, budget)
+            except QueryLimitExceeded as e:
+                return jsonify({"error": str(e), "truncated": budget.to_dict()}), 503
+            results = []
+            vars = qres.vars if qres.vars else []
+            if qres.vars:
+                # Rows stop at the first exceeded limit; the rows so far are kept
+                for bindings in iter_bindings(qres, budget):
+                    results.append({str(var): str(bindings.get(var)) for var in qres.vars})
             else:
-                results.append({str(var): str(row[var]) for var in qres.vars})
+                # CONSTRUCT/DESCRIBE graphs are already built; only cap the rows
+                for row in qres:
+                    if budget.max_rows and len(results) >= budget.max_rows:
+                        budget.exceeded = "max_rows"
+                        break
+                    vars = ["s", "p", "o"]
+                    results.append(
+                        {str(var): str(row[idx]) for idx, var in zip(range(3), "spo")}
+                    )
+        duration = time.perf_counter() - started
         response = {"results": results, "count": len(results), "vars": vars}
-
-        # Persist query history
-        query_id = str(uuid.uuid4())
-        timestamp = datetime.datetime.utcnow().isoformat() + "Z"
-        history_entry = {
-            "query_id": query_id,
-            "query": query,
-            "timestamp": timestamp,
-            "results": results,
-        }
-        history_dir = os.path.join(QUERY_HISTORY_DIR, graph_id)
-        if not os.path.exists(history_dir):
-            os.makedirs(history_dir)
-        file_path = os.path.join(history_dir, f"{query_id}.json")
-        with open(file_path, "w") as f:
-            json.dump(history_entry, f, default=str)
+        if budget.exceeded:
+            response["truncated"] = budget.to_dict()
+
+        # Persist query history in the background; the rows are only kept
+        # when asked for or when they are small
+        query_id = graph_manager.history.record(
+            graph_id,
+            query,
+            results,
+            vars=vars,
+            duration=duration,
+            keep_results=bool(data.get("keep_results")),
+            truncated=response.get("truncated"),
+        )
 
         # Include query_id in response for client reference
         response["query_id"] = query_id
@@ -90,34 +99,26 @@ def execute_query():
 # Get query history
 @query_bp.route("/api/queries/history/<graph_id>", methods=["GET"])
 def get_query_history(graph_id):
-    # Retrieve query history from persistent storage
-    history = []
-    history_dir = os.path.join(QUERY_HISTORY_DIR, graph_id)
-    if os.path.isdir(history_dir):
-        for filename in os.listdir(history_dir):
-            if filename.endswith(".json"):
-                try:
-                    with open(os.path.join(history_dir, filename), "r") as f:
-                        entry = json.load(f)
-                        history.append(entry)
-                except Exception:
-                    continue
-    # Sort by timestamp descending
-    history.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-    return jsonify({"history": history})
+    # One page of entries, newest first, without their results
+    try:
+        history, next_cursor = graph_manager.history.list(
+            graph_id,
+            limit=request.args.get("limit", QUERY_HISTORY_PAGE_SIZE, type=int),
+            cursor=request.args.get("cursor"),
+            search=request.args.get("q"),
+        )
+        return jsonify({"history": history, "next_cursor": next_cursor})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
 
 
 # Get query results by ID
 @query_bp.route("/api/queries/<graph_id>/<query_id>", methods=["GET"])
 def get_query_result(graph_id, query_id):
-    # Retrieve the query result by ID from persistent storage
-    history_dir = os.path.join(QUERY_HISTORY_DIR, graph_id)
-    file_path = os.path.join(history_dir, f"{query_id}.json")
-    if not os.path.isfile(file_path):
-        return jsonify({"error": "Query not found"}), 404
     try:
-        with open(file_path, "r") as f:
-            entry = json.load(f)
+        entry = graph_manager.history.get(graph_id, query_id)
+        if entry is None:
+            return jsonify({"error": "Query not found"}), 404
         return jsonify(entry)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,10 +1,11 @@
 from flask import Blueprint, request, jsonify
 from models.search import WhooshSearchEngine
+from config import SEARCH_INDEX_DIR
 
 search_bp = Blueprint("search_bp", __name__)
 
 # Initialize search engine
-search_engine = WhooshSearchEngine(path="search_index")
+search_engine = WhooshSearchEngine(path=SEARCH_INDEX_DIR)
 
 # Routes for full-text search
 
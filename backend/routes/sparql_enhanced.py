@@ -6,14 +6,25 @@ This module provides dedicated endpoints for SPARQL read and write operations.
 from flask import Blueprint, request, jsonify, Response
 from werkzeug.exceptions import BadRequest
 from routes.graphs import graph_manager
+from routes.jobs import job_manager
+from models.budget import LIMIT_NAMES, QueryBudget, QueryLimitExceeded
+from models.graph import ReadOnlyGraphError
+from models.plancache import normalize_query
+from models.resultcache import is_cacheable
+from models.results import spool_chunks, stream_result
+from config import SPARQL_UPDATE_ASYNC_BYTES
+from config import SPARQL_QUERY_LIMITS, QUERY_LIMIT_CEILINGS
 import re
-from rdflib.query import Result
 import pyparsing
 
 
 # Create SPARQL blueprint
 sparql_bp = Blueprint("sparql_bp", __name__)
 
+# Serialized results of read queries, invalidated by graph version and
+# dropped by the graph manager when a graph is deleted
+result_cache = graph_manager.result_cache
+
 SPARQL_QUERY_CONTENT_TYPE = "application/sparql-query"
 SPARQL_UPDATE_CONTENT_TYPE = "application/sparql-update"
 
@@ -121,54 +132,64 @@ def _get_graph_id():
     return graph_id
 
 
-def _serialize_select_or_ask(qres):
-    supported = {
-        "application/sparql-results+json": "json",
-        "application/json": "json",
-        "application/sparql-results+xml": "xml",
-        "text/csv": "csv",
-        "text/tab-separated-values": "tsv",
-    }
-    accept = request.accept_mimetypes
-    best = accept.best_match(list(supported.keys())) if accept else None
-    if not best:
-        best = "application/sparql-results+json"
-    result_format = supported.get(best, "json")
-    serialized = qres.serialize(format=result_format)
-    if isinstance(serialized, bytes):
-        serialized = serialized.decode("utf-8")
-    return Response(serialized, status=200, content_type=best)
-
-
-def _serialize_graph_result(qres):
-    graph = qres
-    if isinstance(qres, Result):
-        graph = qres.graph
-    if graph is None:
-        raise ValueError("No graph data available for CONSTRUCT/DESCRIBE result")
-    supported = [
-        "text/turtle",
-        "application/ld+json",
-        "application/rdf+xml",
-        "application/n-triples",
-        "application/n-quads",
-    ]
+SELECT_RESULT_FORMATS = {
+    "application/sparql-results+json": "json",
+    "application/json": "json",
+    "application/sparql-results+xml": "xml",
+    "text/csv": "csv",
+    "text/tab-separated-values": "tsv",
+}
+
+GRAPH_RESULT_FORMATS = {
+    "text/turtle": "turtle",
+    "application/ld+json": "json-ld",
+    "application/rdf+xml": "xml",
+    "application/n-triples": "nt",
+    "application/n-quads": "nquads",
+}
+
+
+def _result_media_type(query_type):
+    """Negotiate the response media type of a read query from the Accept header."""
+    if query_type in ("CONSTRUCT", "DESCRIBE"):
+        supported, default = GRAPH_RESULT_FORMATS, "text/turtle"
+    else:
+        supported, default = SELECT_RESULT_FORMATS, "application/sparql-results+json"
     accept = request.accept_mimetypes
-    best = accept.best_match(supported) if accept else None
-    if not best:
-        best = "text/turtle"
-    format_map = {
-        "text/turtle": "turtle",
-        "application/ld+json": "json-ld",
-        "application/rdf+xml": "xml",
-        "application/n-triples": "nt",
-        "application/n-quads": "nquads",
-    }
-    rdf_format = format_map.get(best, "turtle")
-    serialized = graph.serialize(format=rdf_format)
-    if isinstance(serialized, bytes):
-        serialized = serialized.decode("utf-8")
-    return Response(serialized, status=200, content_type=best)
+    best = accept.best_match(list(supported)) if accept else None
+    return best or default
+
+
+def _limit_overrides():
+    """Per-request execution limits from the query string, JSON body or form."""
+    data = request.get_json(silent=True) if request.is_json else None
+    overrides = {}
+    for name in LIMIT_NAMES:
+        value = request.args.get(name)
+        if value is None and isinstance(data, dict):
+            value = data.get(name)
+        if value is None and request.form:
+            value = request.form.get(name)
+        if value is not None:
+            overrides[name] = value
+    return overrides
+
+
+def _cache_while_streaming(key, chunks, budget=None):
+    """Pass result chunks through and cache the body once it is complete,
+    unless it grows larger than a cache entry may be or was truncated."""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size > result_cache.max_entry_bytes:
+                parts = None
+            else:
+                parts.append(chunk)
+        yield chunk
+    if parts is not None and not (budget is not None and budget.exceeded):
+        result_cache.put(key, b"".join(parts))
 
 @sparql_bp.route("/sparql/query", methods=["GET", "POST"])
 def sparql_query_endpoint():
@@ -192,18 +213,59 @@ def sparql_query_endpoint():
                 return jsonify({"error": "No graphs available"}), 404
             graph_id = graphs[0]["graph_id"]
         
-        # Get the graph object
-        graph_obj = graph_manager.get_graph_object(graph_id)
-        if not graph_obj:
+        graph = graph_manager.get_graph(graph_id)
+        if not graph:
             return jsonify({"error": "Graph not found"}), 404
-        
-        # Execute the SPARQL query
-        qres = graph_obj.graph.query(query)
+        if query_type not in ("SELECT", "ASK", "CONSTRUCT", "DESCRIBE"):
+            return jsonify({"error": "Unsupported query type"}), 400
+        media_type = _result_media_type(query_type)
+        budget = QueryBudget.from_request(
+            SPARQL_QUERY_LIMITS, QUERY_LIMIT_CEILINGS, _limit_overrides()
+        )
+
+        # Serve repeated reads of an unchanged graph from the result cache;
+        # the version is read before evaluating so a concurrent write
+        # can only make the new entry unreachable, never stale
+        cacheable = not graph.get("sparql_read") and is_cacheable(query)
+        key = (
+            graph_id,
+            graph_manager.graph_version(graph_id),
+            normalize_query(query),
+            media_type,
+            budget.max_rows,
+            budget.max_bindings,
+        )
+        body = result_cache.get(key) if cacheable else None
+        if body is not None:
+            return Response(body, status=200, content_type=media_type, headers={"X-Cache": "HIT"})
+
+        # Execute the SPARQL query and serialize the rows as they are
+        # evaluated, under the read lock in a background thread. The body
+        # is spooled and sent while it grows; the lock is released once
+        # serialization is done, so slow clients never hold up writers.
+        # ASK, CONSTRUCT and DESCRIBE are evaluated by query(), so a limit
+        # hit leaves nothing partial to return
         if query_type in ("SELECT", "ASK"):
-            return _serialize_select_or_ask(qres)
-        if query_type in ("CONSTRUCT", "DESCRIBE"):
-            return _serialize_graph_result(qres)
-        return jsonify({"error": "Unsupported query type"}), 400
+            result_format = SELECT_RESULT_FORMATS[media_type]
+        else:
+            result_format = GRAPH_RESULT_FORMATS[media_type]
+
+        def evaluate():
+            qres = graph_manager.query(graph_id, query, budget)
+            yield from stream_result(qres, result_format, budget=budget)
+
+        try:
+            # Results up to RESULT_SPOOL_BYTES are complete here, so their
+            # evaluation errors still get a 400 and their truncation a header
+            chunks = spool_chunks(evaluate(), hold=lambda: graph_manager.read_lock(graph_id))
+        except QueryLimitExceeded as e:
+            return jsonify({"error": str(e), "truncated": budget.to_dict()}), 503
+        headers = {"X-Cache": "MISS"}
+        if budget.exceeded:
+            headers["X-Query-Truncated"] = budget.exceeded
+        if cacheable:
+            chunks = _cache_while_streaming(key, chunks, budget)
+        return Response(chunks, status=200, content_type=media_type, headers=headers)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -234,15 +296,34 @@ def sparql_update_endpoint():
         graph_obj = graph_manager.get_graph_object(graph_id)
         if not graph_obj:
             return jsonify({"error": "Graph not found"}), 404
+        if graph_obj.read_only:
+            return jsonify({"error": f"Graph {graph_id} is read-only"}), 403
         
         # Execute the SPARQL update
         # Note: RDFLib supports SPARQL UPDATE operations
-        graph_obj.graph.update(query)
+        # Large updates run as a background job; clients poll /api/jobs/<id>
+        wants_async = request.args.get("async", "").lower() in ("1", "true")
+        if wants_async or len(query.encode("utf-8")) > SPARQL_UPDATE_ASYNC_BYTES:
+            job = job_manager.submit(
+                "sparql_update",
+                _sparql_update_job,
+                graph_id,
+                query,
+                params={"graph_id": graph_id},
+            )
+            return jsonify({"message": "Update started", "job_id": job["job_id"], "job": job}), 202
+        graph_manager.sparql_update(graph_id, query)
         return Response(status=204)
         
+    except ReadOnlyGraphError as e:
+        return jsonify({"error": str(e)}), 403
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+def _sparql_update_job(job, graph_id, query):
+    changes = graph_manager.sparql_update(graph_id, query)
+    return {"graph_id": graph_id, "changes": changes}
+
 @sparql_bp.route("/sparql", methods=["OPTIONS"])
 def sparql_options():
     """Handle CORS preflight requests."""
@@ -256,5 +337,7 @@ def sparql_info():
         "read_endpoint": "/sparql/query",
         "update_endpoint": "/sparql/update",
         "supported_operations": ["SELECT", "CONSTRUCT", "DESCRIBE", "ASK", "INSERT", "DELETE", "WITH"],
-        "description": "Dedicated SPARQL endpoints for read and write operations"
+        "description": "Dedicated SPARQL endpoints for read and write operations",
+        "plan_cache": graph_manager.plan_cache.stats(),
+        "result_cache": result_cache.stats(),
     }), 200
@@ -2,10 +2,17 @@ import pytest
 import shutil
 import sys
 import os
+import tempfile
 
 # Add the backend directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+# Keep the state files of the app under test out of backend/data; set
+# before config is imported
+STATE_DIR = tempfile.mkdtemp(prefix="vibegraph-tests-")
+os.environ["VIBEGRAPH_JOBS_FILE"] = os.path.join(STATE_DIR, "jobs.json")
+os.environ["VIBEGRAPH_QUERY_HISTORY_DB"] = os.path.join(STATE_DIR, "query_history.sqlite3")
+
 from routes.graphs import graph_manager
 from routes.search import search_engine
 
@@ -17,3 +24,5 @@ def cleanup_graph_data_after_tests():
     # Reset search index to avoid dirty repo state
     shutil.rmtree(search_engine.path, ignore_errors=True)
     search_engine.create_index()
+    graph_manager.history.close()
+    shutil.rmtree(STATE_DIR, ignore_errors=True)
@@ -0,0 +1,139 @@
+import pytest
+import sys
+import os
+import json
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import Graph as RDFGraph, URIRef, Literal
+from models.budget import BudgetedGraph, QueryBudget, QueryLimitExceeded
+from models.results import stream_result
+
+EX = "http://ex.org/"
+SELECT = f"SELECT ?s ?o WHERE {{ ?s <{EX}p> ?o }}"
+CROSS = f"SELECT ?a ?b WHERE {{ ?a <{EX}p> ?x . ?b <{EX}p> ?y }}"
+
+
+def _graph(n=100):
+    graph = RDFGraph()
+    for i in range(n):
+        graph.add((URIRef(f"{EX}n{i}"), URIRef(f"{EX}p"), Literal(i)))
+    return graph
+
+
+def _run(graph, query, budget, result_format="json"):
+    qres = BudgetedGraph(graph, budget).query(query)
+    return b"".join(stream_result(qres, result_format, budget=budget))
+
+
+def test_budget_from_request_clamps_to_ceilings():
+    defaults = {"timeout": 30.0, "max_rows": 100, "max_bindings": 0}
+    ceilings = {"timeout": 60.0, "max_rows": 1000, "max_bindings": 5000}
+
+    budget = QueryBudget.from_request(defaults, ceilings, {})
+    assert (budget.timeout, budget.max_rows, budget.max_bindings) == (30.0, 100, 5000)
+
+    budget = QueryBudget.from_request(
+        defaults, ceilings, {"timeout": "600", "max_rows": "10", "max_bindings": "0"}
+    )
+    assert (budget.timeout, budget.max_rows, budget.max_bindings) == (60.0, 10, 5000)
+
+    with pytest.raises(ValueError):
+        QueryBudget.from_request(defaults, ceilings, {"max_rows": "many"})
+
+
+def test_max_rows_reports_partial_results():
+    graph = _graph(10)
+
+    budget = QueryBudget(max_rows=4)
+    data = json.loads(_run(graph, SELECT, budget))
+    assert len(data["results"]["bindings"]) == 4
+    assert data["truncated"]["limit"] == "max_rows"
+    assert data["truncated"]["rows"] == 4
+
+    # Exactly as many rows as allowed is not a truncation
+    budget = QueryBudget(max_rows=10)
+    data = json.loads(_run(graph, SELECT, budget))
+    assert len(data["results"]["bindings"]) == 10
+    assert "truncated" not in data
+    assert budget.exceeded is None
+
+
+def test_max_bindings_stops_evaluation():
+    budget = QueryBudget(max_bindings=500)
+
+    data = json.loads(_run(_graph(), CROSS, budget))
+
+    assert data["truncated"]["limit"] == "max_bindings"
+    assert budget.bindings == 501
+    assert len(data["results"]["bindings"]) < 100 * 100
+
+
+def test_timeout_cancels_cross_product():
+    budget = QueryBudget(timeout=0.05)
+    started = time.monotonic()
+
+    data = _run(_graph(2000), CROSS, budget, "xml")
+
+    assert time.monotonic() - started < 5
+    assert budget.exceeded == "timeout"
+    assert data.endswith(b"<!-- truncated: timeout limit exceeded --></sparql>")
+
+
+def test_eager_queries_raise():
+    budget = QueryBudget(max_bindings=10)
+
+    with pytest.raises(QueryLimitExceeded) as excinfo:
+        BudgetedGraph(_graph(), budget).query(f"ASK {{ ?s <{EX}p> ?o FILTER(?o = 1000) }}")
+
+    assert excinfo.value.limit == "max_bindings"
+
+
+def test_query_endpoints_apply_limits():
+    from app import app
+    from routes.graphs import graph_manager
+
+    client = app.test_client()
+    graph_id = json.loads(
+        client.post(
+            "/api/graphs", data=json.dumps({"name": "Budget Graph"}), content_type="application/json"
+        ).data
+    )["graph_id"]
+    graph = graph_manager.get_graph_object(graph_id).graph
+    for i in range(20):
+        graph.add((URIRef(f"{EX}n{i}"), URIRef(f"{EX}p"), Literal(i)))
+    graph_manager.mark_dirty(graph_id)
+
+    response = client.post(
+        "/api/queries",
+        data=json.dumps({"query": SELECT, "graph_id": graph_id, "max_rows": 5}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["count"] == 5
+    assert data["truncated"]["limit"] == "max_rows"
+
+    def sparql(query, **limits):
+        params = "&".join(f"{name}={value}" for name, value in limits.items())
+        return client.post(
+            f"/sparql/query?graph_id={graph_id}&{params}",
+            data=query,
+            content_type="application/sparql-query",
+        )
+
+    for expected_cache in ("MISS", "MISS"):
+        response = sparql(SELECT, max_rows=3)
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == expected_cache
+        assert response.headers["X-Query-Truncated"] == "max_rows"
+        assert len(json.loads(response.get_data())["results"]["bindings"]) == 3
+
+    response = sparql(f"ASK {{ ?s <{EX}p> ?o FILTER(?o = 1000) }}", max_bindings=5)
+    assert response.status_code == 503
+    assert json.loads(response.data)["truncated"]["limit"] == "max_bindings"
+
+    response = sparql(SELECT, timeout="soon")
+    assert response.status_code == 400
@@ -0,0 +1,136 @@
+import pytest
+import sys
+import os
+import tempfile
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import Dataset, Graph as RDFGraph, BNode
+from rdflib.compare import isomorphic
+from models.bulkload import split_ranges, bulk_load, main
+from models.graph import GraphManager
+from models.search import WhooshSearchEngine
+
+NT = "".join(
+    [
+        '<http://ex.org/s> <http://ex.org/p> "caf\\u00e9"@fr .\n',
+        '<http://ex.org/s> <http://ex.org/p> "line\\nbreak" .\n',
+        '<http://ex.org/s> <http://ex.org/n> "42"^^<http://www.w3.org/2001/XMLSchema#integer> .\n',
+        "# comment\n",
+        "_:a <http://ex.org/p> _:b <http://ex.org/graph> .\n",
+    ]
+    + [f"<http://ex.org/e{i}> <http://ex.org/p> <http://ex.org/e{i + 1}> .\n" for i in range(50)]
+    + ["_:b <http://ex.org/p> <http://ex.org/o> .\n"]
+)
+
+
+class TestBulkLoad:
+    """Test suite for the parallel N-Triples bulk loader"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "data.nt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(NT)
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def test_split_ranges_on_line_boundaries(self):
+        ranges = split_ranges(self.path, chunk_bytes=100)
+        assert len(ranges) > 5
+        assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for start, end in ranges:
+            assert start == 0 or data[start - 1 : start] == b"\n"
+            assert ranges.index((start, end)) == len(ranges) - 1 or data[end - 1 : end] == b"\n"
+
+    @pytest.mark.parametrize("store", ["VibeGraph", "Memory"])
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_bulk_load_matches_rdflib(self, workers, store):
+        # Graph names are ignored, as in the streaming upload
+        reference = RDFGraph()
+        for s, p, o, _ in Dataset().parse(data=NT, format="nquads").quads():
+            reference.add((s, p, o))
+        graph = RDFGraph(store=store)
+        ranges = []
+
+        count = bulk_load(
+            [self.path],
+            graph,
+            workers=workers,
+            chunk_bytes=100,
+            progress=lambda done, total, triples: ranges.append((done, total)),
+        )
+
+        assert count == len(graph) == 55
+        assert ranges[-1][0] == ranges[-1][1] > 1
+        assert isomorphic(graph, reference)
+        # Blank nodes split across ranges still join up
+        assert len(set(graph.subjects()) & set(graph.objects())) > 0
+        assert len([t for t in graph.all_nodes() if isinstance(t, BNode)]) == 2
+
+    def test_cli_loads_into_graph_store(self, capsys):
+        data_file = os.path.join(self.temp_dir.name, "graph_data.json")
+        data_dir = os.path.join(self.temp_dir.name, "graphs_data")
+        index_dir = os.path.join(self.temp_dir.name, "index")
+
+        graph_id = main(
+            [
+                self.path,
+                "--name",
+                "Bulk",
+                "--data-file",
+                data_file,
+                "--data-dir",
+                data_dir,
+                "--index-dir",
+                index_dir,
+                "--workers",
+                "2",
+            ]
+        )
+
+        assert "Loaded 55 triples" in capsys.readouterr().out
+        manager = GraphManager(data_file, data_dir=data_dir)
+        assert manager.get_graph(graph_id)["name"] == "Bulk"
+        assert len(manager.get_graph_object(graph_id).graph) == 55
+        results = WhooshSearchEngine(index_dir).search("http://ex.org/e7", search_by="iri")["results"]
+        assert [(r["iri"], r["graph_id"]) for r in results] == [("http://ex.org/e7", graph_id)]
+
+    @pytest.mark.parametrize("existing", [0, 200])
+    def test_manager_loads_without_holding_the_write_lock(self, existing):
+        import threading
+
+        manager = GraphManager(
+            os.path.join(self.temp_dir.name, "graph_data.json"),
+            data_dir=os.path.join(self.temp_dir.name, "graphs_data"),
+        )
+        graph_id = manager.create_graph("Bulk")["graph_id"]
+        graph = manager.get_graph_object(graph_id).graph
+        graph.parse(
+            data="".join(f"<http://ex.org/x{i}> <http://ex.org/p> <http://ex.org/e1> .\n" for i in range(existing)),
+            format="nt",
+        )
+        writes = []
+
+        def progress(done, total, triples):
+            # A concurrent writer is not blocked by the load
+            if not writes:
+                thread = threading.Thread(
+                    target=lambda: writes.append(
+                        manager.add_triple(graph_id, ("http://ex.org/w", "http://ex.org/p", "w"))
+                    )
+                )
+                thread.start()
+                thread.join(timeout=5)
+                assert writes == [True]
+
+        count = manager.bulk_load(graph_id, [self.path], workers=1, chunk_bytes=100, progress=progress)
+
+        assert count == 55
+        assert len(manager.get_graph_object(graph_id).graph) == existing + 55 + 1
+        reloaded = GraphManager(manager.data_file, data_dir=manager.data_dir)
+        assert len(reloaded.get_graph_object(graph_id).graph) == existing + 55 + 1
@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+import gzip
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import Dataset, Graph as RDFGraph, URIRef, Literal, BNode, Namespace
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+from models.export import stream_graph, gzip_chunks, graph_iri
+import models.store  # noqa: F401
+
+EX = Namespace("http://ex.org/")
+
+
+class TestStreamingExport:
+    """Test suite for the streaming graph serializers"""
+
+    def setup_method(self):
+        self.graph = RDFGraph(store="VibeGraph")
+        self.graph.bind("ex", EX)
+        node = BNode()
+        for i in range(200):
+            self.graph.add((EX[f"s{i}"], RDF.type, EX.Thing))
+            self.graph.add((EX[f"s{i}"], EX.value, Literal(i)))
+            self.graph.add((EX[f"s{i}"], EX.link, node))
+        self.graph.add((node, EX.label, Literal('say "hi"\nthere', lang="en")))
+        self.graph.add((EX.s0, EX["path/odd"], Literal("3.5", datatype=XSD.decimal)))
+        self.graph.add((EX.s0, URIRef("http://other.org/x.y"), EX["a.b"]))
+
+    @pytest.mark.parametrize("rdf_format", ["nt", "turtle"])
+    def test_round_trip(self, rdf_format):
+        chunks = list(stream_graph(self.graph, rdf_format, chunk_bytes=1024))
+
+        assert len(chunks) > 1
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        parsed = RDFGraph().parse(data=b"".join(chunks), format=rdf_format)
+        assert isomorphic(parsed, self.graph)
+
+    @pytest.mark.parametrize("rdf_format", ["nquads", "trig"])
+    def test_named_graph_formats(self, rdf_format):
+        name = graph_iri("g1")
+        data = b"".join(stream_graph(self.graph, rdf_format, graph_name=name))
+
+        dataset = Dataset().parse(data=data, format=rdf_format)
+        assert isomorphic(dataset.graph(name), self.graph)
+
+    def test_turtle_uses_prefixes(self):
+        data = b"".join(stream_graph(self.graph, "turtle")).decode("utf-8")
+
+        assert "@prefix ex: <http://ex.org/> ." in data
+        assert "ex:s1 a ex:Thing ;" in data
+        assert "<http://ex.org/path/odd>" in data
+
+    def test_other_formats_fall_back_to_rdflib(self):
+        data = b"".join(stream_graph(self.graph, "json-ld"))
+
+        assert isomorphic(RDFGraph().parse(data=data, format="json-ld"), self.graph)
+
+    def test_gzip_chunks(self):
+        chunks = stream_graph(self.graph, "nt", chunk_bytes=512)
+
+        data = gzip.decompress(b"".join(gzip_chunks(chunks)))
+
+        assert isomorphic(RDFGraph().parse(data=data, format="nt"), self.graph)
+
+
+def test_blank_node_labels_are_valid_ntriples():
+    """Test that labels outside the N-Triples syntax are replaced consistently"""
+    from models.ntriples import term_to_nt
+
+    p = URIRef("http://ex.org/p")
+    graph = RDFGraph()
+    odd = BNode("two words\\")
+    graph.add((odd, p, BNode("plain")))
+    graph.add((BNode("x"), p, odd))
+
+    data = b"".join(stream_graph(graph, "nt")).decode("utf-8")
+
+    assert term_to_nt(BNode("plain")) == "_:plain"
+    assert term_to_nt(odd) == term_to_nt(BNode("two words\\"))
+    assert "\\" not in data and "two words" not in data
+    parsed = RDFGraph().parse(data=data, format="nt")
+    assert len(parsed) == 2
+    assert len(set(parsed.subjects()) | set(parsed.objects())) == 3
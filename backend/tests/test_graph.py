@@ -2,7 +2,9 @@ import pytest
 import sys
 import os
 import tempfile
+import io
 import json
+import time
 from unittest.mock import patch, MagicMock
 
 # Add the backend directory to Python path
@@ -73,12 +75,112 @@ def test_graph_serialize():
     """Test Graph serialize method"""
     with tempfile.TemporaryDirectory() as temp_dir:
         graph = Graph("test-id", "Test Graph", "2023-01-01")
-        graph.serialize(temp_dir)
+        path = graph.serialize(temp_dir)
+
+        expected_file = os.path.join(temp_dir, "test-id.vgb")
+        assert path == expected_file
+        assert os.path.exists(expected_file)
+
+
+def test_graph_serialize_turtle():
+    """Test Graph serialize method with the Turtle export format"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        graph = Graph("test-id", "Test Graph", "2023-01-01")
+        graph.serialize(temp_dir, fmt="turtle")
 
         expected_file = os.path.join(temp_dir, "test-id.ttl")
         assert os.path.exists(expected_file)
 
 
+def test_graph_binary_snapshot_roundtrip():
+    """Test that binary snapshots preserve every kind of term"""
+    from rdflib import URIRef, Literal, BNode, XSD
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        graph = Graph("test-id", "Test Graph", "2023-01-01")
+        s = URIRef("http://example.com/s")
+        p = URIRef("http://example.com/p")
+        expected = {
+            (s, p, Literal("plain")),
+            (s, p, Literal("bonjour", lang="fr")),
+            (s, p, Literal("42", datatype=XSD.integer)),
+            (s, p, Literal("forty-two", datatype=XSD.integer)),
+            (s, p, Literal("multi\nline \u00e9")),
+            (BNode("b0"), p, s),
+        }
+        for triple in expected:
+            graph.graph.add(triple)
+        path = graph.serialize(temp_dir)
+
+        loaded = Graph.load_from_file(path, "test-id", "Test Graph", "2023-01-01")
+        assert set(loaded.graph) == expected
+        # Literals are rebuilt without their constructor but keep its state
+        originals = {triple: triple[2] for triple in expected}
+        for triple in loaded.graph:
+            if isinstance(triple[2], Literal):
+                assert triple[2].value == originals[triple].value
+                assert triple[2].ill_typed == originals[triple].ill_typed
+
+
+def test_graph_binary_snapshot_indexes():
+    """Test that every index of a store loaded from a snapshot is complete"""
+    from array import array
+    from rdflib import Graph as RDFGraph, URIRef
+    from models.snapshot import write_snapshot, read_snapshot, _MAGIC_V2
+    from models.store import VibeStore
+
+    ex = "http://example.com/"
+    source = RDFGraph(store=VibeStore())
+    for i in range(200):
+        source.add((URIRef(f"{ex}s{i % 7}"), URIRef(f"{ex}p{i % 3}"), URIRef(f"{ex}o{i % 11}")))
+    buffer = io.BytesIO()
+    write_snapshot(buffer, source)
+    data = buffer.getvalue()
+
+    # Second version snapshots have no orders and no trailer
+    for content in (data, _MAGIC_V2 + data[4 : -8 - 2 * 4 * len(source)]):
+        loaded = RDFGraph(store=VibeStore())
+        assert read_snapshot(io.BytesIO(content), loaded) == len(source)
+        assert set(loaded) == set(source)
+        for i in range(11):
+            o = URIRef(f"{ex}o{i}")
+            assert set(loaded.triples((None, None, o))) == set(source.triples((None, None, o)))
+        for i in range(3):
+            p = URIRef(f"{ex}p{i}")
+            assert set(loaded.triples((None, p, None))) == set(source.triples((None, p, None)))
+        assert all(isinstance(bucket, (int, array)) for bucket in loaded.store._osp.buckets.values())
+
+
+def test_graph_binary_snapshot_keeps_prefixes():
+    """Test that namespace bindings survive a binary snapshot"""
+    import struct
+    from rdflib import URIRef
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        graph = Graph("test-id", "Test Graph", "2023-01-01")
+        graph.graph.bind("ex", "http://ex.org/")
+        graph.graph.add((URIRef("http://ex.org/a"), URIRef("http://ex.org/p"), URIRef("http://ex.org/b")))
+        path = graph.serialize(temp_dir)
+
+        loaded = Graph.load_from_file(path, "test-id", "Test Graph", "2023-01-01")
+        assert dict(loaded.graph.namespaces())["ex"] == URIRef("http://ex.org/")
+        rows = list(loaded.graph.query("SELECT ?o WHERE { ex:a ex:p ?o }"))
+        assert [str(row[0]) for row in rows] == ["http://ex.org/b"]
+        assert "@prefix ex: <http://ex.org/>" in loaded.graph.serialize(format="turtle")
+
+        # Snapshots of the first version have no prefix section
+        with open(path, "rb") as f:
+            data = f.read()
+        header = struct.calcsize("<4sBQQQ")
+        _, itemsize, _, _, n_triples = struct.unpack("<4sBQQQ", data[:header])
+        (size,) = struct.unpack("<Q", data[header : header + 8])
+        orders = 2 * n_triples * itemsize
+        with open(path, "wb") as f:
+            f.write(b"VGB\x01" + data[4:header] + data[header + 8 + size : -8 - orders])
+        legacy = Graph.load_from_file(path, "test-id", "Test Graph", "2023-01-01")
+        assert len(legacy.graph) == 1
+
+
 def test_graph_add_triple():
     """Test Graph add_triple method"""
     graph = Graph("test-id", "Test Graph", "2023-01-01")
@@ -146,16 +248,91 @@ def test_graph_index(mock_print):
     graph.add_triple(("subject1", "predicate1", "object1"))
     graph.add_triple(("subject2", "predicate2", "object2"))
 
-    # Mock search engine
+    # Mock search engine that consumes the batch
     mock_search_engine = MagicMock()
+    batches = []
+    mock_search_engine.add_entities.side_effect = lambda entities: batches.append(
+        list(entities)
+    ) or len(batches[-1])
 
     graph.index(mock_search_engine, "test-id")
 
-    # Verify search engine was called
-    assert mock_search_engine.add_entity.call_count > 0
+    # Verify all entities went through a single batch call
+    assert mock_search_engine.add_entities.call_count == 1
+    mock_search_engine.add_entity.assert_not_called()
+    assert len(batches[0]) > 0
     mock_print.assert_called()
 
 
+@patch("models.graph.print")
+def test_graph_index_uses_label_map(mock_print):
+    """Test that each IRI is indexed once with labels from all label predicates"""
+    graph = Graph("test-id", "Test Graph", "2023-01-01")
+    graph.add_triple(("http://ex.org/berlin", "rdfs:label", '"Berlin"@de'))
+    graph.add_triple(("http://ex.org/berlin", "rdfs:label", '"Berlin"@en'))
+    graph.add_triple(
+        ("http://ex.org/paris", "http://www.w3.org/2004/02/skos/core#prefLabel", '"Paris"')
+    )
+    graph.add_triple(("http://ex.org/rome", "https://schema.org/name", '"Rome"'))
+    for i in range(5):
+        graph.add_triple(("http://ex.org/berlin", "http://ex.org/near", f"http://ex.org/c{i}"))
+
+    mock_search_engine = MagicMock()
+    batches = []
+    mock_search_engine.add_entities.side_effect = lambda entities: batches.append(
+        list(entities)
+    ) or len(batches[-1])
+    with patch.object(graph.graph, "objects", wraps=graph.graph.objects) as mock_objects:
+        graph.index(mock_search_engine, "test-id")
+    mock_objects.assert_not_called()
+
+    entities = {e["iri"]: e for e in batches[0]}
+    assert len(entities) == len(batches[0])
+    berlin = entities["http://ex.org/berlin"]
+    assert berlin["label"] == "Berlin"
+    assert sorted(lbl["lang"] for lbl in berlin["labels"]) == ["de", "en"]
+    assert entities["http://ex.org/paris"]["label"] == "Paris"
+    assert entities["http://ex.org/rome"]["label"] == "Rome"
+    assert entities["http://ex.org/c0"]["label"] == "http://ex.org/c0"
+    assert entities["http://ex.org/c0"]["labels"] == []
+
+
+def test_graph_neighbors_caps_fanout():
+    """Test neighborhood expansion with fanout caps, direction and predicate filters"""
+    from rdflib import URIRef, Literal, RDFS
+
+    EX = "http://ex.org/"
+    graph = Graph("test-id", "Test Graph", "2023-01-01")
+    hub = URIRef(f"{EX}hub")
+    graph.graph.add((hub, RDFS.label, Literal("Hub")))
+    for i in range(5000):
+        graph.graph.add((URIRef(f"{EX}n{i}"), URIRef(f"{EX}links"), hub))
+    graph.graph.add((hub, URIRef(f"{EX}owner"), URIRef(f"{EX}alice")))
+    graph.graph.add((URIRef(f"{EX}alice"), URIRef(f"{EX}knows"), URIRef(f"{EX}bob")))
+
+    result = graph.neighbors([hub], fanout=10)
+    assert result["truncated"] is True
+    assert len(result["edges"]) == 10
+    hub_node = next(n for n in result["nodes"] if n["id"] == f"{EX}hub")
+    assert hub_node["label"] == "Hub"
+    assert hub_node["degree"] == {"out": 2, "in": 5000}
+
+    result = graph.neighbors(
+        [hub], depth=2, direction="out", predicates=[URIRef(f"{EX}owner"), URIRef(f"{EX}knows")]
+    )
+    assert result["truncated"] is False
+    assert [(e["source"], e["target"]) for e in result["edges"]] == [
+        (f"{EX}hub", f"{EX}alice"),
+        (f"{EX}alice", f"{EX}bob"),
+    ]
+
+    result = graph.neighbors([hub], direction="out")
+    literal = next(n for n in result["nodes"] if n["kind"] == "literal")
+    assert literal == {"id": '"Hub"', "kind": "literal", "label": "Hub"}
+    with pytest.raises(ValueError):
+        graph.neighbors([hub], direction="sideways")
+
+
 def test_graph_load_from_file():
     """Test Graph load_from_file method"""
     with tempfile.NamedTemporaryFile(mode="w", suffix=".ttl", delete=False) as f:
@@ -321,6 +498,409 @@ def test_graph_manager_save_and_load():
         assert manager2.graphs[graph_id]["name"] == "Test Graph"
 
 
+def test_graph_manager_save_only_dirty_graphs():
+    """Test that _save only re-serializes graphs changed since the last flush"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        g1 = manager.create_graph("Graph 1")["graph_id"]
+        g2 = manager.create_graph("Graph 2")["graph_id"]
+        assert manager.pending_changes() == {}
+
+        manager.mark_dirty(g1)
+        with patch.object(Graph, "serialize") as mock_serialize:
+            manager._save()
+
+        assert mock_serialize.call_count == 1
+        assert manager.pending_changes() == {}
+        assert g2 in manager.graphs
+
+
+def test_graph_manager_rename_only_writes_metadata():
+    """Test that a metadata-only change does not touch RDF data files"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Old Name")["graph_id"]
+
+        with patch.object(Graph, "serialize") as mock_serialize:
+            assert manager.update_graph(graph_id, "New Name") is True
+
+        mock_serialize.assert_not_called()
+        with open(data_file, "r") as f:
+            assert json.load(f)[graph_id]["name"] == "New Name"
+
+
+def test_graph_manager_mark_dirty_counts_changes():
+    """Test that mark_dirty accumulates change counters until flushed"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Graph")["graph_id"]
+
+        manager.mark_dirty(graph_id)
+        manager.mark_dirty(graph_id, changes=2)
+        assert manager.pending_changes() == {graph_id: 3}
+
+        manager._save()
+        assert manager.pending_changes() == {}
+
+
+def test_graph_manager_triple_mutations_append_to_changelog():
+    """Test that add/remove append to the change log instead of re-serializing"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Logged Graph")["graph_id"]
+
+        with patch.object(Graph, "serialize") as mock_serialize:
+            manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "keep"))
+            manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "drop"))
+            manager.remove_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "drop"))
+
+        mock_serialize.assert_not_called()
+        with open(manager.changelog.path(graph_id), "r") as f:
+            ops = [line[0] for line in f]
+        assert ops == ["+", "+", "-"]
+
+        # A fresh manager replays the log on top of the snapshot
+        reloaded = GraphManager(data_file, data_dir=data_dir)
+        objects = [str(o) for o in reloaded.get_graph_object(graph_id).graph.objects()]
+        assert objects == ["keep"]
+
+
+def test_graph_manager_compact_folds_changelog():
+    """Test that compaction writes a snapshot and drops the change log"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Compacted Graph")["graph_id"]
+        manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", '"x"@en'))
+        assert manager.changelog.size(graph_id) > 0
+
+        assert manager.compact(graph_id) is True
+        assert manager.changelog.size(graph_id) == 0
+
+        reloaded = GraphManager(data_file, data_dir=data_dir)
+        assert len(reloaded.get_graph_object(graph_id).graph) == 1
+
+
+def test_changelog_ignores_torn_tail():
+    """Test that a partially written last entry is ignored on replay"""
+    from rdflib import Graph as RDFGraph
+    from models.changelog import ChangeLog
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log = ChangeLog(temp_dir, fsync=False)
+        with open(log.path("g"), "w") as f:
+            f.write('+ <http://ex.org/s> <http://ex.org/p> "a\\nb" .\n')
+            f.write("+ <http://ex.org/s> <http://ex.org/p> <http://ex")
+
+        rdf_graph = RDFGraph()
+        assert log.replay("g", rdf_graph) == 1
+        assert [str(o) for o in rdf_graph.objects()] == ["a\nb"]
+
+
+def test_changelog_replays_any_blank_node_label():
+    """Test that blank node labels with whitespace or backslashes round-trip"""
+    from rdflib import Graph as RDFGraph, URIRef, BNode, Literal
+    from models.changelog import ChangeLog, ADD, REMOVE
+
+    p = URIRef("http://ex.org/p")
+    labels = ["plain", "two words", "tab\there", "line\nbreak", "back\\slash", "u\u2028sep", "a\\u0020b"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log = ChangeLog(temp_dir, fsync=False)
+        log.append("g", [(ADD, (BNode(label), p, Literal(i))) for i, label in enumerate(labels)])
+        log.append("g", [(REMOVE, (BNode("two words"), p, Literal(1)))])
+
+        rdf_graph = RDFGraph()
+        assert log.replay("g", rdf_graph) == len(labels) + 1
+        expected = {str(label) for label in labels} - {"two words"}
+        assert {str(s) for s in rdf_graph.subjects()} == expected
+
+
+def test_graph_snapshot_checksum():
+    """Test that corrupt or truncated snapshots are rejected on load"""
+    from rdflib import Graph as RDFGraph, URIRef, Literal
+    from models.snapshot import read_snapshot
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        graph = Graph("test-id", "Test Graph", "2023-01-01")
+        graph.graph.add((URIRef("http://ex.org/s"), URIRef("http://ex.org/p"), Literal("value")))
+        path = graph.serialize(temp_dir)
+        with open(path, "rb") as f:
+            data = f.read()
+
+        def load(content, verify=True):
+            with open(path, "wb") as f:
+                f.write(content)
+            with open(path, "rb") as f:
+                return read_snapshot(f, RDFGraph(), verify=verify)
+
+        assert load(data) == 1
+        # Snapshots of older versions have no trailer
+        assert load(data[:-8]) == 1
+        corrupt = data.replace(b"value", b"vaLue")
+        with pytest.raises(ValueError, match="checksum"):
+            load(corrupt)
+        assert load(corrupt, verify=False) == 1
+        with pytest.raises(ValueError, match="Truncated"):
+            load(data[:-20])
+
+
+def test_atomic_write_keeps_previous_file():
+    """Test that a failed write leaves the previous file and no temporary file"""
+    from models.atomic import atomic_write
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "graph_data.json")
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write('{"a": 1}')
+        with pytest.raises(RuntimeError):
+            with atomic_write(path, "w", encoding="utf-8") as f:
+                f.write('{"a": ')
+                raise RuntimeError("killed mid-write")
+        with open(path) as f:
+            assert json.load(f) == {"a": 1}
+        assert os.listdir(temp_dir) == ["graph_data.json"]
+
+
+def test_atomic_write_keeps_permissions():
+    """Test that a replaced file keeps its mode and a new one gets the default mode"""
+    from models.atomic import atomic_write
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "nsprefixes.json")
+        plain = os.path.join(temp_dir, "plain.json")
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+        with open(plain, "w", encoding="utf-8") as f:
+            f.write("{}")
+        assert os.stat(path).st_mode & 0o777 == os.stat(plain).st_mode & 0o777
+
+        os.chmod(path, 0o640)
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+        assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+def test_graph_manager_removes_interrupted_writes():
+    """Test that temporary files of interrupted writes are not loaded as graphs"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Kept Graph")["graph_id"]
+        leftover = os.path.join(data_dir, f".{graph_id}.vgb.x1y2.tmp")
+        with open(leftover, "wb") as f:
+            f.write(b"VGB")
+
+        reloaded = GraphManager(data_file, data_dir=data_dir)
+        assert [g["graph_id"] for g in reloaded.list_graphs()] == [graph_id]
+        assert not os.path.exists(leftover)
+
+
+def test_graph_manager_loads_graphs_lazily():
+    """Test that graphs are registered from metadata and parsed on first access"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Lazy Graph")["graph_id"]
+        manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "o"))
+
+        with patch.object(Graph, "load_from_file", wraps=Graph.load_from_file) as mock_load:
+            reloaded = GraphManager(data_file, data_dir=data_dir)
+            assert any(g["graph_id"] == graph_id for g in reloaded.list_graphs())
+            assert reloaded.get_graph(graph_id)["name"] == "Lazy Graph"
+            assert not reloaded.is_resident(graph_id)
+            mock_load.assert_not_called()
+
+            graph_obj = reloaded.get_graph_object(graph_id)
+            assert len(graph_obj.graph) == 1
+            assert reloaded.is_resident(graph_id)
+            assert mock_load.call_count == 1
+
+
+def test_graph_manager_evicts_least_recently_used():
+    """Test that the resident cap evicts cold graphs back to disk"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir, max_resident=2)
+        g1 = manager.create_graph("Graph 1")["graph_id"]
+        g2 = manager.create_graph("Graph 2")["graph_id"]
+        manager.add_triple(g1, ("http://ex.org/s", "http://ex.org/p", "one"))
+        manager.get_graph_object(g2)
+
+        g3 = manager.create_graph("Graph 3")["graph_id"]
+
+        assert not manager.is_resident(g1)
+        assert manager.is_resident(g2) and manager.is_resident(g3)
+        # An evicted graph is reloaded from disk with its data intact
+        assert len(manager.get_graph_object(g1).graph) == 1
+        assert not manager.is_resident(g2)
+
+
+def test_graph_manager_migrates_turtle_snapshot():
+    """Test that legacy Turtle files load and are replaced by binary snapshots"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, "legacy.ttl"), "w") as f:
+            f.write('<http://example.com/s> <http://example.com/p> "o" .\n')
+
+        manager = GraphManager(data_file, data_dir=data_dir)
+        assert manager.get_graph("legacy") is not None
+        assert len(manager.get_graph_object("legacy").graph) == 1
+
+        manager.mark_dirty("legacy")
+        manager._save()
+        assert os.path.exists(os.path.join(data_dir, "legacy.vgb"))
+        assert not os.path.exists(os.path.join(data_dir, "legacy.ttl"))
+
+
+def test_graph_manager_keeps_search_index_in_sync():
+    """Test that triple edits and SPARQL updates apply index deltas"""
+    from models.search import WhooshSearchEngine
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        search_engine = WhooshSearchEngine(os.path.join(temp_dir, "index"))
+        manager = GraphManager(data_file, data_dir=data_dir, search_engine=search_engine)
+        graph_id = manager.create_graph("Indexed Graph")["graph_id"]
+
+        def labels_of(iri):
+            results = search_engine.search(f'"{iri}"', search_by="iri")["results"]
+            return [r["label"] for r in results]
+
+        manager.add_triple(graph_id, ("http://ex.org/alice", "rdfs:label", '"Alice"'))
+        assert labels_of("http://ex.org/alice") == ["Alice"]
+
+        manager.remove_triple(graph_id, ("http://ex.org/alice", "rdfs:label", '"Alice"'))
+        assert labels_of("http://ex.org/alice") == []
+
+        added = manager.sparql_update(
+            graph_id,
+            'INSERT DATA { <http://ex.org/bob> <http://www.w3.org/2000/01/rdf-schema#label> "Bob"@en . '
+            "<http://ex.org/bob> <http://ex.org/knows> <http://ex.org/carol> }",
+        )
+        assert added == 2
+        assert labels_of("http://ex.org/bob") == ["Bob"]
+        assert labels_of("http://ex.org/carol") == ["http://ex.org/carol"]
+
+        removed = manager.sparql_update(
+            graph_id, "DELETE WHERE { ?s <http://ex.org/knows> ?o }"
+        )
+        assert removed == 1
+        assert labels_of("http://ex.org/carol") == []
+        assert labels_of("http://ex.org/bob") == ["Bob"]
+
+        # SPARQL changes go to the change log like direct edits
+        reloaded = GraphManager(data_file, data_dir=data_dir)
+        assert len(reloaded.get_graph_object(graph_id).graph) == 1
+
+
+def test_graph_manager_reindexes_after_index_lock_timeout():
+    """Test that a mutation succeeds while another process holds the index
+    lock and that the graph's documents are rebuilt once it is released"""
+    from whoosh.index import open_dir
+    from models.search import WhooshSearchEngine
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_dir = os.path.join(temp_dir, "index")
+        search_engine = WhooshSearchEngine(index_dir, writer_timeout=0.1)
+        manager = GraphManager(
+            os.path.join(temp_dir, "test_graph_data.json"),
+            data_dir=os.path.join(temp_dir, "graphs_data"),
+            search_engine=search_engine,
+        )
+        graph_id = manager.create_graph("Indexed Graph")["graph_id"]
+
+        def labels_of(iri):
+            results = search_engine.search(f'"{iri}"', search_by="iri")["results"]
+            return [r["label"] for r in results]
+
+        # Another worker's writer holds the index lock
+        other = open_dir(index_dir).writer()
+        with patch("models.graph.INDEX_RETRY_DELAY", 0.05):
+            try:
+                assert manager.add_triple(
+                    graph_id, ("http://ex.org/alice", "rdfs:label", '"Alice"')
+                )
+                assert graph_id in manager._stale_index or graph_id in manager._reindexing
+                assert len(manager.get_graph_object(graph_id).graph) == 1
+            finally:
+                other.cancel()
+
+            for _ in range(200):
+                if graph_id not in manager._reindexing:
+                    break
+                time.sleep(0.05)
+        assert graph_id not in manager._stale_index
+        assert labels_of("http://ex.org/alice") == ["Alice"]
+
+
+def test_graph_manager_parallel_reindex():
+    """Test that reindex merges per-graph indexes built by worker processes"""
+    from models.search import WhooshSearchEngine
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        search_engine = WhooshSearchEngine(os.path.join(temp_dir, "index"))
+        search_engine.add_entity({"iri": "http://ex.org/stale", "label": "Stale"})
+        manager = GraphManager(data_file, data_dir=data_dir)
+        g1 = manager.create_graph("Graph 1")["graph_id"]
+        g2 = manager.create_graph("Graph 2")["graph_id"]
+        manager.add_triple(g1, ("http://ex.org/a", "rdfs:label", '"Alpha"'))
+        manager.add_triple(g2, ("http://ex.org/b", "rdfs:label", '"Beta"'))
+        manager.add_triple(g2, ("http://ex.org/b", "http://ex.org/p", "http://ex.org/c"))
+
+        assert manager.reindex_all(search_engine, workers=2) == 2
+
+        status = manager.reindex_status()
+        assert status["state"] == "done"
+        assert status["graphs_done"] == 2
+        assert status["triples"] == 3
+        assert status["entities"] == 6
+        assert status["entities_per_second"] > 0
+        results = search_engine.search("Beta", search_by="label")["results"]
+        assert [(r["iri"], r["graph_id"]) for r in results] == [("http://ex.org/b", g2)]
+        assert search_engine.search("Stale", search_by="label")["count"] == 0
+
+
+def test_change_recorder_keeps_effective_changes():
+    """Test that only triples actually added or removed are recorded"""
+    from rdflib import Graph as RDFGraph, URIRef
+    from models.changelog import ChangeRecorder
+
+    rdf_graph = RDFGraph(store="VibeGraph")
+    s, p = URIRef("http://ex.org/s"), URIRef("http://ex.org/p")
+    rdf_graph.add((s, p, URIRef("http://ex.org/a")))
+
+    with ChangeRecorder(rdf_graph.store) as recorder:
+        rdf_graph.update(
+            "INSERT DATA { <http://ex.org/s> <http://ex.org/p> <http://ex.org/a>, <http://ex.org/b> }"
+        )
+        rdf_graph.remove((s, p, URIRef("http://ex.org/missing")))
+        rdf_graph.remove((None, None, URIRef("http://ex.org/a")))
+
+    assert recorder.ops == [
+        ("+", (s, p, URIRef("http://ex.org/b"))),
+        ("-", (s, p, URIRef("http://ex.org/a"))),
+    ]
+    # The store is restored once the block exits
+    assert "add" not in vars(rdf_graph.store)
+
+
 # Test prefix management functions
 def test_save_prefixes():
     """Test save_prefixes function"""
@@ -0,0 +1,171 @@
+import pytest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.history import QueryHistory
+
+
+class TestQueryHistory:
+    """Test suite for the SQLite-backed query history"""
+
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.legacy_dir = os.path.join(self.tmp, "query_history")
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _history(self, **kwargs):
+        kwargs.setdefault("legacy_dir", self.legacy_dir)
+        return QueryHistory(os.path.join(self.tmp, "history.sqlite3"), **kwargs)
+
+    def test_record_and_get(self):
+        history = self._history(result_bytes=1024)
+        rows = [{"s": f"http://ex.org/{i}"} for i in range(3)]
+
+        small = history.record("g1", "SELECT ?s", rows, vars=["s"], duration=0.25)
+        # Readable before the writer caught up, and after
+        assert history.get("g1", small)["results"] == rows
+        history.flush()
+        entry = history.get("g1", small)
+        assert entry["results"] == rows
+        assert entry["count"] == 3
+        assert entry["vars"] == ["s"]
+        assert entry["duration"] == 0.25
+        assert len(entry["result_hash"]) == 64
+        assert history.get("g2", small) is None
+
+        big_rows = [{"s": "x" * 100} for _ in range(100)]
+        big = history.record("g1", "SELECT ?s", big_rows, vars=["s"])
+        kept = history.record("g1", "SELECT ?s", big_rows, vars=["s"], keep_results=True)
+        history.flush()
+        assert history.get("g1", big)["results"] is None
+        assert history.get("g1", big)["count"] == 100
+        assert history.get("g1", kept)["results"] == big_rows
+        assert history.get("g1", big)["result_hash"] == history.get("g1", kept)["result_hash"]
+
+        listed, next_cursor = history.list("g1")
+        assert next_cursor is None
+        assert [entry["query_id"] for entry in listed] == [kept, big, small]
+        assert all("results" not in entry for entry in listed)
+        history.close()
+
+    def test_entry_cap_and_clear(self):
+        history = self._history(max_entries=5)
+        ids = [history.record("g1", f"SELECT {i}", []) for i in range(12)]
+        history.record("g2", "SELECT 0", [])
+        # Listings show written entries only
+        assert history.list("g2") == ([], None)
+        history.flush()
+
+        assert [entry["query_id"] for entry in history.list("g1")[0]] == ids[:-6:-1]
+        assert len(history.list("g2")[0]) == 1
+
+        history.clear("g1")
+        assert history.list("g1") == ([], None)
+        assert len(history.list("g2")[0]) == 1
+        history.close()
+
+    def test_list_pages_and_search(self):
+        history = self._history()
+        ids = [
+            history.record("g1", f"SELECT ?s WHERE {{ ?s ?p {i} }}" if i % 3 else f"ASK {{ ?s ?p {i} }}", [])
+            for i in range(25)
+        ]
+        history.record("g1", "SELECT 100% _x", [])
+        history.flush()
+
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = history.list("g1", limit=10, cursor=cursor)
+            seen.extend(entry["query_id"] for entry in page)
+            if cursor is None:
+                break
+        assert len(seen) == 26
+        assert seen[1:] == ids[::-1]
+
+        asks, cursor = history.list("g1", search="ask")
+        assert [entry["query_id"] for entry in asks] == [ids[i] for i in range(24, -1, -3)]
+        assert cursor is None
+        # LIKE wildcards in the search text match literally
+        assert len(history.list("g1", search="100%")[0]) == 1
+        assert history.list("g1", search="_x")[0][0]["query"] == "SELECT 100% _x"
+        assert history.list("g1", search="%")[0][0]["query"] == "SELECT 100% _x"
+        assert len(history.list("g1", search="%")[0]) == 1
+        # Rewritten and evicted entries leave the text index
+        history.clear("g1")
+        history.record("g1", "ASK { ?x ?y ?z }", [])
+        history.flush()
+        assert [entry["query"] for entry in history.list("g1", search="ask")[0]] == [
+            "ASK { ?x ?y ?z }"
+        ]
+
+        with pytest.raises(ValueError):
+            history.list("g1", cursor="garbage")
+        history.close()
+
+    def test_legacy_files_are_imported(self):
+        graph_dir = os.path.join(self.legacy_dir, "g1")
+        os.makedirs(graph_dir)
+        with open(os.path.join(graph_dir, "q1.json"), "w") as f:
+            json.dump(
+                {
+                    "query_id": "q1",
+                    "query": "SELECT ?s",
+                    "timestamp": "2024-01-01T00:00:00Z",
+                    "results": [{"s": "a"}],
+                },
+                f,
+            )
+
+        history = self._history(retention_days=0)
+        history.flush()
+        history.close()
+
+        entry = self._history(retention_days=0).get("g1", "q1")
+        assert entry["results"] == [{"s": "a"}]
+        assert entry["timestamp"] == "2024-01-01T00:00:00Z"
+        assert os.listdir(graph_dir) == []
+
+
+def test_query_history_routes():
+    from app import app
+    from routes.queries import graph_manager
+
+    client = app.test_client()
+    graph_id = json.loads(
+        client.post(
+            "/api/graphs", data=json.dumps({"name": "History Graph"}), content_type="application/json"
+        ).data
+    )["graph_id"]
+    client.post(
+        f"/api/graphs/{graph_id}/triples",
+        data=json.dumps({"subject": "http://ex.org/s", "predicate": "http://ex.org/p", "object": "o"}),
+        content_type="application/json",
+    )
+
+    response = client.post(
+        "/api/queries",
+        data=json.dumps({"query": "SELECT ?s WHERE { ?s ?p ?o }", "graph_id": graph_id}),
+        content_type="application/json",
+    )
+    assert response.status_code == 200
+    query_id = json.loads(response.data)["query_id"]
+    graph_manager.history.flush()
+
+    entry = json.loads(client.get(f"/api/queries/{graph_id}/{query_id}").data)
+    assert entry["results"] == [{"s": "http://ex.org/s"}]
+    assert entry["count"] == 1
+
+    listing = json.loads(client.get(f"/api/queries/history/{graph_id}?limit=10&q=select").data)
+    assert [item["query_id"] for item in listing["history"]] == [query_id]
+    assert listing["next_cursor"] is None
+    assert client.get(f"/api/queries/history/{graph_id}?cursor=x").status_code == 400
+    assert client.get(f"/api/queries/{graph_id}/missing").status_code == 404
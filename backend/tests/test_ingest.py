@@ -0,0 +1,140 @@
+import pytest
+import sys
+import os
+import io
+import tempfile
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import URIRef, Literal, BNode
+from models.ingest import iter_lines, iter_batches, is_line_format
+from models.graph import GraphManager
+from models.search import WhooshSearchEngine
+
+NT = (
+    '<http://ex.org/s> <http://ex.org/p> "caf\\u00e9"@fr .\n'
+    "# a comment\n"
+    "\n"
+    "_:a <http://ex.org/p> _:b <http://ex.org/graph> .\n"
+    "_:b <http://ex.org/p> <http://ex.org/o> .\n"
+    '<http://ex.org/s> <http://ex.org/q> "no newline"'
+)
+
+
+def test_iter_lines_across_chunk_boundaries():
+    """Test that lines split across chunks are reassembled"""
+    lines = list(iter_lines(io.BytesIO(NT.encode("utf-8")), chunk_size=7))
+    assert lines == NT.split("\n")
+
+
+def test_iter_batches_sizes_and_blank_nodes():
+    """Test batching, N-Quads graph names and document-scoped blank nodes"""
+    batches = list(iter_batches(io.BytesIO(NT.encode("utf-8")), batch_size=3, chunk_size=5))
+
+    assert [len(batch) for batch in batches] == [3, 1]
+    triples = [triple for batch in batches for triple in batch]
+    assert triples[0] == (URIRef("http://ex.org/s"), URIRef("http://ex.org/p"), Literal("café", lang="fr"))
+    a, _, b = triples[1]
+    assert isinstance(a, BNode) and isinstance(b, BNode)
+    # Labels keep identity within the document but are not reused verbatim
+    assert triples[2][0] == b
+    assert str(a) != "a"
+
+
+def test_iter_batches_reports_line_number():
+    """Test that a syntax error names the offending line"""
+    data = b'<http://ex.org/s> <http://ex.org/p> "o" .\n<broken\n'
+    with pytest.raises(ValueError, match="Line 2"):
+        list(iter_batches(io.BytesIO(data)))
+
+
+def test_is_line_format():
+    assert is_line_format("nt") and is_line_format("NQUADS")
+    assert not is_line_format("turtle") and not is_line_format(None)
+
+
+def test_graph_manager_ingest_stream_stores_and_indexes_batches():
+    """Test streaming ingest with labels that arrive in a later batch"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        search_engine = WhooshSearchEngine(os.path.join(temp_dir, "index"))
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Streamed")["graph_id"]
+        lines = [
+            f"<http://ex.org/item{i}> <http://ex.org/next> <http://ex.org/item{i + 1}> .\n"
+            for i in range(10)
+        ]
+        lines.append('<http://ex.org/item0> <http://www.w3.org/2000/01/rdf-schema#label> "First" .\n')
+        stream = io.BytesIO("".join(lines).encode("utf-8"))
+
+        count = manager.ingest_stream(
+            graph_id, stream, search_engine=search_engine, batch_size=4, chunk_size=16
+        )
+
+        assert count == 11
+        results = search_engine.search("First", search_by="label")["results"]
+        assert [r["iri"] for r in results] == ["http://ex.org/item0"]
+        assert search_engine.search('"http://ex.org/item10"', search_by="iri")["count"] == 1
+
+        reloaded = GraphManager(data_file, data_dir=data_dir)
+        assert len(reloaded.get_graph_object(graph_id).graph) == 11
+
+
+def test_graph_manager_ingest_stream_survives_indexing_failure():
+    """Test that a failing indexer neither hangs nor fails the stored ingest,
+    and that the graph's documents are rebuilt afterwards"""
+    import threading
+    import time
+
+    rebuilt = threading.Event()
+
+    class FailingSearchEngine:
+        def __init__(self):
+            self.documents = None
+
+        def update_entities(self, entities, removed, graph_id):
+            raise RuntimeError("index unavailable")
+
+        def replace_graph(self, graph_id, entities):
+            self.documents = [entity["iri"] for entity in entities]
+            rebuilt.set()
+            return len(self.documents)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = GraphManager(
+            os.path.join(temp_dir, "test_graph_data.json"),
+            data_dir=os.path.join(temp_dir, "graphs_data"),
+        )
+        graph_id = manager.create_graph("Streamed")["graph_id"]
+        lines = [
+            f"<http://ex.org/item{i}> <http://ex.org/next> <http://ex.org/item{i + 1}> .\n"
+            for i in range(200)
+        ]
+        data = io.BytesIO("".join(lines).encode("utf-8"))
+
+        class SlowStream:
+            # The main thread is left waiting for the parser when the indexer fails
+            def read(self, size=-1):
+                time.sleep(0.01)
+                return data.read(size)
+
+        stream = SlowStream()
+        search_engine = FailingSearchEngine()
+        counts = []
+
+        def ingest():
+            counts.append(
+                manager.ingest_stream(
+                    graph_id, stream, search_engine=search_engine, batch_size=2, chunk_size=64
+                )
+            )
+
+        thread = threading.Thread(target=ingest, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+        assert counts == [200]
+        assert rebuilt.wait(timeout=10)
+        assert len(search_engine.documents) == 202  # 201 items and the predicate
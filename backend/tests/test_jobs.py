@@ -0,0 +1,170 @@
+import pytest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.jobs import JobManager, DONE, FAILED, CANCELLED
+
+
+class TestJobManager:
+    """Test suite for the background job manager"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.jobs_file = os.path.join(self.temp_dir.name, "jobs.json")
+        self.manager = JobManager(self.jobs_file, workers=1)
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def test_job_reports_progress_and_result(self):
+        def work(job, count):
+            for i in range(count):
+                job.update(done=i + 1, total=count)
+            return {"items": count}
+
+        job_id = self.manager.submit("count", work, 3)["job_id"]
+        job = self.manager.wait(job_id, timeout=10)
+
+        assert job["state"] == DONE
+        assert job["progress"] == {"done": 3, "total": 3}
+        assert job["result"] == {"items": 3}
+        with open(self.jobs_file) as f:
+            assert json.load(f)[job_id]["state"] == DONE
+
+    def test_failed_job_records_error(self):
+        def work(job):
+            raise ValueError("bad input")
+
+        job_id = self.manager.submit("fail", work)["job_id"]
+        job = self.manager.wait(job_id, timeout=10)
+
+        assert job["state"] == FAILED
+        assert job["error"] == "bad input"
+
+    def test_cancel_running_and_queued_jobs(self):
+        started = threading.Event()
+
+        def work(job):
+            started.set()
+            while True:
+                job.check_cancelled()
+                job._cancel.wait(0.01)
+
+        running = self.manager.submit("loop", work)["job_id"]
+        queued = self.manager.submit("loop", work)["job_id"]
+        started.wait(10)
+
+        assert self.manager.cancel(queued) is True
+        assert self.manager.get(queued)["state"] == CANCELLED
+        assert self.manager.cancel(running) is True
+        assert self.manager.wait(running, timeout=10)["state"] == CANCELLED
+        assert self.manager.cancel(running) is False
+        assert self.manager.active("loop") is None
+
+    def test_restart_fails_unfinished_jobs(self):
+        with open(self.jobs_file, "w") as f:
+            json.dump(
+                {"j1": {"job_id": "j1", "type": "upload", "state": "running", "created_at": ""}},
+                f,
+            )
+
+        manager = JobManager(self.jobs_file, workers=1)
+
+        job = manager.get("j1")
+        assert job["state"] == FAILED
+        assert "restart" in job["error"]
+
+    def test_finished_jobs_are_pruned(self):
+        with open(self.jobs_file, "w") as f:
+            json.dump(
+                {
+                    "old": {
+                        "job_id": "old",
+                        "type": "upload",
+                        "state": DONE,
+                        "created_at": "2000-01-01T00:00:00",
+                        "finished_at": "2000-01-01T00:00:01",
+                    }
+                },
+                f,
+            )
+        manager = JobManager(self.jobs_file, workers=1, max_finished=2, retention_days=7)
+
+        job_ids = []
+        for i in range(3):
+            job_ids.append(manager.submit("count", lambda job: None)["job_id"])
+            manager.wait(job_ids[-1], timeout=10)
+
+        # The expired job and the oldest beyond the cap are gone
+        assert sorted(job["job_id"] for job in manager.list_jobs()) == sorted(job_ids[1:])
+        with open(self.jobs_file) as f:
+            assert sorted(json.load(f)) == sorted(job_ids[1:])
+
+
+class TestSharedJobTable:
+    """Test suite for a job table shared by several workers"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.jobs_file = os.path.join(self.temp_dir.name, "jobs.json")
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def test_workers_see_and_cancel_each_others_jobs(self):
+        first = JobManager(self.jobs_file, workers=1, multi_worker=True)
+        # Stands in for another live process: a worker's own pid marks jobs
+        # left behind by an earlier process
+        first.worker_id = f"{os.getppid()}:first"
+        started = threading.Event()
+
+        def work(job):
+            started.set()
+            while True:
+                job.check_cancelled()
+                job._cancel.wait(0.01)
+
+        running = first.submit("loop", work)["job_id"]
+        started.wait(10)
+
+        second = JobManager(self.jobs_file, workers=1, multi_worker=True)
+        assert second.get(running)["state"] == "running"
+        done = second.submit("count", lambda job: 1)["job_id"]
+        assert second.wait(done, timeout=10)["state"] == DONE
+
+        # Neither worker overwrites the other's jobs
+        assert {job["job_id"] for job in first.list_jobs()} == {running, done}
+        assert second.active("loop")["job_id"] == running
+
+        assert second.cancel(running) is True
+        assert first.wait(running, timeout=10)["state"] == CANCELLED
+        assert second.get(running)["state"] == CANCELLED
+        with open(self.jobs_file) as f:
+            table = json.load(f)
+        assert {job_id: job["state"] for job_id, job in table.items()} == {
+            running: CANCELLED,
+            done: DONE,
+        }
+
+    def test_jobs_of_exited_workers_are_failed(self):
+        with open(self.jobs_file, "w") as f:
+            json.dump(
+                {
+                    "live": {"job_id": "live", "type": "upload", "state": "running",
+                             "created_at": "", "owner": f"{os.getppid()}:live"},
+                    "gone": {"job_id": "gone", "type": "upload", "state": "running",
+                             "created_at": "", "owner": "999999999:gone"},
+                },
+                f,
+            )
+
+        manager = JobManager(self.jobs_file, workers=1, multi_worker=True)
+
+        assert manager.get("live")["state"] == "running"
+        assert manager.get("gone")["state"] == FAILED
@@ -0,0 +1,325 @@
+import pytest
+import json
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.graph import GraphManager
+from models.locks import RWLock
+
+EX = "http://ex.org/"
+COUNT = f"SELECT (COUNT(*) AS ?n) WHERE {{ ?s <{EX}p> ?o }}"
+
+
+def _run_threads(targets):
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+        assert not thread.is_alive()
+
+
+class TestRWLock:
+    """Test suite for the readers-writer lock"""
+
+    def test_readers_share_and_writer_excludes(self):
+        lock = RWLock()
+        barrier = threading.Barrier(3, timeout=5)
+        inside = []
+
+        def reader():
+            with lock.read():
+                barrier.wait()  # all readers hold the lock at once
+                inside.append(1)
+
+        _run_threads([reader] * 3)
+        assert len(inside) == 3
+
+        with lock.write():
+            results = []
+
+            def try_locks():
+                results.append(lock.acquire_read(blocking=False))
+                results.append(lock.acquire_write(blocking=False))
+
+            thread = threading.Thread(target=try_locks)
+            thread.start()
+            thread.join()
+            assert results == [False, False]
+
+    def test_waiting_writer_blocks_new_readers(self):
+        lock = RWLock()
+        lock.acquire_read()
+        writer_done = threading.Event()
+
+        def writer():
+            with lock.write():
+                writer_done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        time.sleep(0.05)
+        # A new reader must queue behind the writer, but this thread's own
+        # read lock is re-entrant
+        result = []
+        other = threading.Thread(target=lambda: result.append(lock.acquire_read(blocking=False)))
+        other.start()
+        other.join()
+        assert result == [False]
+        assert lock.acquire_read(blocking=False)
+        lock.release_read()
+        assert not writer_done.is_set()
+        lock.release_read()
+        thread.join(timeout=5)
+        assert writer_done.is_set()
+
+    def test_reentrancy_and_upgrade(self):
+        lock = RWLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+        with pytest.raises(RuntimeError):
+            lock.release_read()
+
+
+class TestGraphManagerConcurrency:
+    """Stress tests for per-graph locking in GraphManager"""
+
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp, "graph_data.json")
+        self.data_dir = os.path.join(self.tmp, "graphs")
+        self.manager = GraphManager(self.data_file, data_dir=self.data_dir)
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _count(self, graph_id):
+        with self.manager.read_lock(graph_id):
+            return int(next(iter(self.manager.query(graph_id, COUNT)))[0])
+
+    def test_parallel_reads_and_writes_stay_consistent(self):
+        graph_ids = [self.manager.create_graph(f"G{i}")["graph_id"] for i in range(2)]
+        writers, updates = 4, 40
+        errors = []
+        stop = threading.Event()
+
+        def writer(graph_id, w):
+            try:
+                for i in range(updates):
+                    # Each update adds a pair of triples; readers must never
+                    # observe half of one
+                    self.manager.sparql_update(
+                        graph_id,
+                        f"INSERT DATA {{ <{EX}w{w}-{i}a> <{EX}p> 1 . <{EX}w{w}-{i}b> <{EX}p> 2 }}",
+                    )
+                    if i % 10 == 0:
+                        self.manager.remove_triple(graph_id, (f"{EX}none", f"{EX}p", f"{EX}none"))
+            except Exception as e:
+                errors.append(e)
+
+        def reader(graph_id):
+            try:
+                while not stop.is_set():
+                    n = self._count(graph_id)
+                    if n % 2:
+                        errors.append(AssertionError(f"Half-applied update seen: {n}"))
+                    page = self.manager.get_triples_page(graph_id, limit=5000)
+                    if len(page["triples"]) % 2:
+                        errors.append(AssertionError("Half-applied update in triple listing"))
+            except Exception as e:
+                errors.append(e)
+
+        targets = [
+            (lambda g=g, w=w: writer(g, w)) for g in graph_ids for w in range(writers)
+        ]
+        readers = [threading.Thread(target=reader, args=(g,)) for g in graph_ids for _ in range(2)]
+        for thread in readers:
+            thread.start()
+        try:
+            _run_threads(targets)
+        finally:
+            stop.set()
+            for thread in readers:
+                thread.join(timeout=60)
+
+        assert errors == []
+        expected = writers * updates * 2
+        assert [self._count(g) for g in graph_ids] == [expected, expected]
+
+        # Persisted state matches after a reload
+        self.manager._save()
+        reloaded = GraphManager(self.data_file, data_dir=self.data_dir)
+        for graph_id in graph_ids:
+            assert len(reloaded.get_graph_object(graph_id).graph) == expected
+
+    def test_writes_to_one_graph_do_not_wait_for_another(self):
+        a = self.manager.create_graph("A")["graph_id"]
+        b = self.manager.create_graph("B")["graph_id"]
+        done = threading.Event()
+
+        def write_b():
+            self.manager.add_triple(b, (f"{EX}s", f"{EX}p", "o"))
+            done.set()
+
+        with self.manager.read_lock(a):
+            thread = threading.Thread(target=write_b)
+            thread.start()
+            assert done.wait(5)
+            # A write to A itself waits for the reader
+            blocked = threading.Thread(
+                target=self.manager.add_triple, args=(a, (f"{EX}s", f"{EX}p", "o"))
+            )
+            blocked.start()
+            time.sleep(0.1)
+            assert blocked.is_alive()
+        blocked.join(timeout=5)
+        assert not blocked.is_alive()
+        assert len(self.manager.get_graph_object(a).graph) == 1
+
+    def _start_waiting_writer(self, graph_id, target):
+        """Start ``target`` in a thread and return once it waits for the
+        graph's write lock, which the caller holds."""
+        lock = self.manager._locks.get(graph_id)
+        thread = threading.Thread(target=target)
+        thread.start()
+        deadline = time.time() + 5
+        while not lock._waiting_writers:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        return thread
+
+    def test_waiting_writer_sees_delete(self):
+        graph_id = self.manager.create_graph("A")["graph_id"]
+        results = []
+        with self.manager._locks.write(graph_id):
+            thread = self._start_waiting_writer(
+                graph_id,
+                lambda: results.append(self.manager.add_triple(graph_id, (f"{EX}s", f"{EX}p", "o"))),
+            )
+            assert self.manager.delete_graph(graph_id) is True
+        thread.join(timeout=5)
+        assert results == [False]
+        assert graph_id not in self.manager.graphs
+        # No change log was re-created for the deleted graph
+        assert not [name for name in os.listdir(self.data_dir) if name.startswith(graph_id)]
+
+    def test_waiting_writer_sees_read_only_flag(self):
+        graph_id = self.manager.create_graph("A")["graph_id"]
+        self.manager.add_triple(graph_id, (f"{EX}s", f"{EX}p", "one"))
+        errors = []
+
+        def write():
+            try:
+                self.manager.add_triple(graph_id, (f"{EX}s", f"{EX}p", "two"))
+            except Exception as e:
+                errors.append(e)
+
+        with self.manager._locks.write(graph_id):
+            thread = self._start_waiting_writer(graph_id, write)
+            self.manager.update_graph(graph_id, read_only=True)
+        thread.join(timeout=5)
+        assert [type(e).__name__ for e in errors] == ["ReadOnlyGraphError"]
+        self.manager.get_graph_object(graph_id).graph.close()
+
+    def test_waiting_writer_uses_reloaded_graph(self):
+        manager = self.manager = GraphManager(self.data_file, data_dir=self.data_dir, max_resident=1)
+        a = manager.create_graph("A")["graph_id"]
+        b = manager.create_graph("B")["graph_id"]
+        manager.add_triple(a, (f"{EX}s", f"{EX}p", "one"))
+        with manager._locks.write(a):
+            thread = self._start_waiting_writer(
+                a, lambda: manager.add_triple(a, (f"{EX}s", f"{EX}p", "two"))
+            )
+            # Evict A, then load a fresh copy of it
+            manager.get_graph_object(b)
+            assert not manager.is_resident(a)
+            manager.get_graph_object(a)
+        thread.join(timeout=5)
+        assert len(manager.get_graph_object(a).graph) == 2
+
+
+    def test_eviction_writes_snapshots_outside_registry_lock(self):
+        manager = self.manager = GraphManager(self.data_file, data_dir=self.data_dir, max_resident=1)
+        a = manager.create_graph("A")["graph_id"]
+        manager.add_triple(a, (f"{EX}s", f"{EX}p", "one"))
+        manager.mark_dirty(a)
+        write_snapshot = manager._write_snapshot
+        registry_free = []
+
+        def checked_write_snapshot(graph):
+            # Another thread can use the registry while the snapshot is written
+            def use_registry():
+                acquired = manager._registry_lock.acquire(timeout=1)
+                registry_free.append(acquired)
+                if acquired:
+                    manager._registry_lock.release()
+
+            thread = threading.Thread(target=use_registry)
+            thread.start()
+            thread.join()
+            return write_snapshot(graph)
+
+        manager._write_snapshot = checked_write_snapshot
+        manager.create_graph("B")
+        assert registry_free and all(registry_free)
+        assert not manager.is_resident(a)
+        del manager._write_snapshot
+        assert len(manager.get_graph_object(a).graph) == 1
+
+def test_sparql_response_does_not_hold_read_lock():
+    """Test that a SPARQL result not yet read by the client leaves the graph writable"""
+    from app import app
+    from routes.graphs import graph_manager
+
+    client = app.test_client()
+    graph_id = graph_manager.create_graph("Streaming")["graph_id"]
+    try:
+        for i in range(50):
+            graph_manager.add_triple(graph_id, (f"{EX}s{i}", f"{EX}p", f"{EX}o{i}"))
+        response = client.post(
+            f"/sparql/query?graph_id={graph_id}",
+            data=f"SELECT ?s ?o WHERE {{ ?s <{EX}p> ?o }}",
+            content_type="application/sparql-query",
+            buffered=False,
+        )
+        assert response.status_code == 200
+        lock = graph_manager._locks.get(graph_id)
+        assert lock.acquire_write(blocking=False)
+        lock.release_write()
+        assert len(json.loads(response.get_data())["results"]["bindings"]) == 50
+        response.close()
+    finally:
+        graph_manager.delete_graph(graph_id)
+
+
+def test_export_response_does_not_hold_read_lock():
+    """Test that an export not yet read by the client leaves the graph writable"""
+    from app import app
+    from routes.graphs import graph_manager
+
+    client = app.test_client()
+    graph_id = graph_manager.create_graph("Exported")["graph_id"]
+    try:
+        for i in range(50):
+            graph_manager.add_triple(graph_id, (f"{EX}s{i}", f"{EX}p", f"{EX}o{i}"))
+        response = client.get(f"/api/graphs/{graph_id}/export?format=nt", buffered=False)
+        assert response.status_code == 200
+        lock = graph_manager._locks.get(graph_id)
+        assert lock.acquire_write(blocking=False)
+        lock.release_write()
+        assert len(response.get_data().splitlines()) == 50
+        response.close()
+    finally:
+        graph_manager.delete_graph(graph_id)
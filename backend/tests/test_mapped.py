@@ -0,0 +1,153 @@
+import pytest
+import sys
+import os
+import json
+import random
+import tempfile
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import Graph as RDFGraph, URIRef, Literal, BNode
+from models.mapped import MappedStore, ReadOnlyGraphError, build_mapped_index
+from models.graph import GraphManager
+
+EX = "http://example.org/"
+
+
+def _random_graph(count, seed=11):
+    rnd = random.Random(seed)
+    graph = RDFGraph(store="Memory")
+    while len(graph) < count:
+        s = URIRef(f"{EX}s{rnd.randrange(40)}")
+        p = URIRef(f"{EX}p{rnd.randrange(6)}")
+        choice = rnd.random()
+        if choice < 0.4:
+            o = URIRef(f"{EX}s{rnd.randrange(40)}")
+        elif choice < 0.5:
+            o = BNode(f"b{rnd.randrange(5)}")
+        else:
+            o = Literal(f"välue {rnd.randrange(30)}", lang=rnd.choice([None, "en"]))
+        graph.add((s, p, o))
+    return graph
+
+
+class TestMappedStore:
+    """Test suite for the memory-mapped read-only store"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.reference = _random_graph(400)
+        path = os.path.join(self.temp_dir.name, "graph.vgm")
+        build_mapped_index(self.reference, path)
+        self.graph = RDFGraph(store=MappedStore(path))
+
+    def teardown_method(self):
+        self.graph.close()
+        self.temp_dir.cleanup()
+
+    def test_patterns_match_memory_store(self):
+        s, p, o = next(iter(self.reference))
+        patterns = [
+            (None, None, None),
+            (s, None, None),
+            (None, p, None),
+            (None, None, o),
+            (s, p, None),
+            (s, None, o),
+            (None, p, o),
+            (s, p, o),
+            (URIRef(f"{EX}missing"), None, None),
+        ]
+        assert len(self.graph) == len(self.reference)
+        for pattern in patterns:
+            expected = set(self.reference.triples(pattern))
+            assert set(self.graph.triples(pattern)) == expected, pattern
+            assert self.graph.store.count(pattern) == len(expected), pattern
+
+
+    def test_triples_page(self):
+        p = next(iter(self.reference))[1]
+        for pattern in [(None, None, None), (None, p, None)]:
+            seen = []
+            page, after = self.graph.store.triples_page(pattern, 9)
+            seen.extend(page)
+            while after is not None:
+                page, after = self.graph.store.triples_page(pattern, 9, after)
+                seen.extend(page)
+            assert sorted(seen) == sorted(self.reference.triples(pattern))
+
+    def test_writes_are_rejected(self):
+        triple = (URIRef(f"{EX}new"), URIRef(f"{EX}p0"), Literal("x"))
+        with pytest.raises(ReadOnlyGraphError):
+            self.graph.add(triple)
+        with pytest.raises(ReadOnlyGraphError):
+            self.graph.remove((None, None, None))
+        with pytest.raises(ReadOnlyGraphError):
+            self.graph.update(f"INSERT DATA {{ <{EX}a> <{EX}b> <{EX}c> }}")
+        assert len(self.graph) == len(self.reference)
+
+    def test_sparql_query(self):
+        rows = self.graph.query(f"SELECT (COUNT(*) AS ?n) WHERE {{ ?s <{EX}p0> ?o }}")
+        expected = len(set(self.reference.triples((None, URIRef(f"{EX}p0"), None))))
+        assert int(next(iter(rows))[0]) == expected
+
+    def test_sorted_in_runs(self):
+        path = os.path.join(self.temp_dir.name, "runs.vgm")
+        build_mapped_index(self.reference, path, run_rows=7)
+        graph = RDFGraph(store=MappedStore(path))
+        try:
+            with open(os.path.join(self.temp_dir.name, "graph.vgm"), "rb") as f:
+                expected = f.read()
+            with open(path, "rb") as f:
+                assert f.read() == expected
+            o = next(iter(self.reference))[2]
+            assert set(graph.triples((None, None, o))) == set(self.reference.triples((None, None, o)))
+        finally:
+            graph.close()
+
+    def test_prefixes_are_kept(self):
+        reference = RDFGraph(store="Memory")
+        reference.bind("ex", EX)
+        reference.add((URIRef(f"{EX}a"), URIRef(f"{EX}b"), Literal("c")))
+        path = os.path.join(self.temp_dir.name, "prefixes.vgm")
+        build_mapped_index(reference, path)
+        graph = RDFGraph(store=MappedStore(path))
+        try:
+            assert ("ex", URIRef(EX)) in set(graph.namespaces())
+            rows = list(graph.query("SELECT ?o WHERE { ex:a ex:b ?o }"))
+            assert [str(row[0]) for row in rows] == ["c"]
+        finally:
+            graph.close()
+
+
+def test_graph_manager_read_only_round_trip():
+    """Test flagging a graph read-only, reloading it and clearing the flag"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "test_graph_data.json")
+        data_dir = os.path.join(temp_dir, "graphs_data")
+        manager = GraphManager(data_file, data_dir=data_dir)
+        graph_id = manager.create_graph("Reference")["graph_id"]
+        manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "one"))
+        manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "two"))
+
+        assert manager.update_graph(graph_id, read_only=True) is True
+        assert os.path.exists(os.path.join(data_dir, f"{graph_id}.vgm"))
+        with open(data_file, "r") as f:
+            assert json.load(f)[graph_id]["read_only"] is True
+        with pytest.raises(ReadOnlyGraphError):
+            manager.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "x"))
+        with pytest.raises(ReadOnlyGraphError):
+            manager.remove_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "one"))
+
+        reloaded = GraphManager(data_file, data_dir=data_dir)
+        graph = reloaded.get_graph_object(graph_id)
+        assert graph.read_only is True
+        assert isinstance(graph.graph.store, MappedStore)
+        assert len(graph.graph) == 2
+
+        assert reloaded.update_graph(graph_id, read_only=False) is True
+        assert not os.path.exists(os.path.join(data_dir, f"{graph_id}.vgm"))
+        reloaded.add_triple(graph_id, ("http://ex.org/s", "http://ex.org/p", "three"))
+        assert len(reloaded.get_graph_object(graph_id).graph) == 3
+        graph.graph.close()
@@ -0,0 +1,75 @@
+import pytest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import URIRef, Literal
+from rdflib.plugins.sparql.parser import parseQuery
+from models.plancache import QueryPlanCache, normalize_query
+from models.graph import GraphManager
+
+EX = "http://ex.org/"
+
+
+def test_normalize_query_keeps_literals_and_iris():
+    query = """PREFIX ex: <http://ex.org/a#b>   # comment
+    SELECT  ?s
+    WHERE { ?s ex:p "two  spaces # kept" . }  # trailing"""
+
+    assert normalize_query(query) == (
+        'PREFIX ex: <http://ex.org/a#b> SELECT ?s WHERE { ?s ex:p "two  spaces # kept" . }'
+    )
+
+
+def test_plan_cache_hits_and_evictions():
+    cache = QueryPlanCache(maxsize=2)
+
+    first = cache.prepare("SELECT * WHERE { ?s ?p ?o }")
+    assert cache.prepare("SELECT *\n  WHERE { ?s ?p ?o }  # again") is first
+    cache.prepare("ASK { ?s ?p ?o }")
+    cache.prepare("SELECT ?s WHERE { ?s ?p ?o }")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 3, 1)
+    assert stats["size"] == 2
+    # The least recently used plan was evicted
+    assert cache.prepare("SELECT * WHERE { ?s ?p ?o }") is not first
+
+
+def test_plan_cache_keys_on_prefixes():
+    cache = QueryPlanCache()
+    query = "SELECT ?o WHERE { ex:s ex:p ?o }"
+
+    a = cache.prepare(query, [("ex", URIRef("http://a.org/"))])
+    b = cache.prepare(query, [("ex", URIRef("http://b.org/"))])
+
+    assert a is not b
+    assert cache.stats()["misses"] == 2
+
+
+def test_graph_manager_query_skips_parsing_repeated_queries():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = GraphManager(
+            os.path.join(temp_dir, "graphs.json"),
+            data_dir=os.path.join(temp_dir, "graphs_data"),
+        )
+        graph_id = manager.create_graph("Query Graph")["graph_id"]
+        graph = manager.get_graph_object(graph_id).graph
+        graph.bind("ex", EX)
+        graph.add((URIRef(f"{EX}s"), URIRef(f"{EX}p"), Literal("o")))
+        query = "SELECT ?o WHERE { ex:s ex:p ?o }"
+
+        with patch(
+            "rdflib.plugins.sparql.processor.parseQuery", side_effect=parseQuery
+        ) as parse:
+            rows = [list(manager.query(graph_id, query)) for _ in range(3)]
+
+        assert parse.call_count == 1
+        assert rows[0] == rows[2] == [(Literal("o"),)]
+        assert manager.plan_cache.stats()["hits"] == 2
+        with pytest.raises(ValueError):
+            manager.query("missing", query)
@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.resultcache import ResultCache, is_cacheable
+
+
+def test_result_cache_evicts_by_size():
+    cache = ResultCache(max_bytes=100, ttl=60)
+
+    assert cache.put(("g", 0, "q1", "json"), "a" * 20)
+    assert cache.put(("g", 0, "q2", "json"), "b" * 20)
+    assert not cache.put(("g", 0, "big", "json"), "c" * 26)  # over a quarter of the cache
+    cache.get(("g", 0, "q1", "json"))
+    for i in range(4):
+        cache.put(("g", 0, f"x{i}", "json"), "d" * 20)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["evictions"] == 1
+    # q2 was the least recently used entry
+    assert cache.get(("g", 0, "q2", "json")) is None
+    assert cache.get(("g", 0, "q1", "json")) == "a" * 20
+
+
+def test_result_cache_ttl_and_invalidate():
+    cache = ResultCache(max_bytes=1000, ttl=10)
+    with patch("models.resultcache.time.monotonic", return_value=100.0):
+        cache.put(("g1", 0, "q", "json"), "old")
+        cache.put(("g2", 0, "q", "json"), "other")
+    with patch("models.resultcache.time.monotonic", return_value=105.0):
+        assert cache.get(("g1", 0, "q", "json")) == "old"
+    with patch("models.resultcache.time.monotonic", return_value=111.0):
+        assert cache.get(("g1", 0, "q", "json")) is None
+    assert cache.stats()["expirations"] == 1
+
+    cache.invalidate("g2")
+    assert cache.stats()["entries"] == 0 and cache.size == 0
+
+
+def test_volatile_queries_are_not_cacheable():
+    assert is_cacheable("SELECT ?s WHERE { ?s ?p ?o } LIMIT 1")
+    assert not is_cacheable("SELECT (RAND() AS ?r) WHERE {}")
+    assert not is_cacheable("SELECT (now () AS ?t) WHERE {}")
+    assert not is_cacheable("SELECT * WHERE { SERVICE <http://x/sparql> { ?s ?p ?o } }")
+
+
+def test_sparql_query_served_from_cache_until_graph_changes():
+    from app import app
+    from routes.sparql_enhanced import result_cache
+
+    client = app.test_client()
+    graph_id = json.loads(
+        client.post(
+            "/api/graphs", data=json.dumps({"name": "Cached Graph"}), content_type="application/json"
+        ).data
+    )["graph_id"]
+    query = "SELECT (COUNT(*) AS ?n) WHERE { ?s ?p ?o }"
+
+    def run(accept="application/sparql-results+json"):
+        response = client.post(
+            f"/sparql/query?graph_id={graph_id}",
+            data=query,
+            content_type="application/sparql-query",
+            headers={"Accept": accept},
+        )
+        assert response.status_code == 200
+        response.get_data()  # consume the stream; the body is cached at its end
+        return response
+
+    first = run()
+    assert first.headers["X-Cache"] == "MISS"
+    second = run()
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.data == first.data
+    assert run("text/csv").headers["X-Cache"] == "MISS"
+
+    client.post(
+        f"/api/graphs/{graph_id}/triples",
+        data=json.dumps({"subject": "http://ex.org/s", "predicate": "http://ex.org/p", "object": "o"}),
+        content_type="application/json",
+    )
+    third = run()
+    assert third.headers["X-Cache"] == "MISS"
+    assert json.loads(third.data)["results"]["bindings"][0]["n"]["value"] == "1"
+
+    info = json.loads(client.get("/sparql/info").data)
+    assert info["result_cache"]["hits"] >= 1
+
+    # Deleting the graph drops its entries
+    entries = result_cache.stats()["entries"]
+    assert client.delete(f"/api/graphs/{graph_id}").status_code == 200
+    assert result_cache.stats()["entries"] == entries - 3
+
+
+def test_sparql_query_streams_tsv_and_reports_errors():
+    from app import app
+
+    client = app.test_client()
+    graph_id = json.loads(
+        client.post(
+            "/api/graphs", data=json.dumps({"name": "TSV Graph"}), content_type="application/json"
+        ).data
+    )["graph_id"]
+
+    response = client.post(
+        f"/sparql/query?graph_id={graph_id}",
+        data="SELECT ?s WHERE { ?s ?p ?o }",
+        content_type="application/sparql-query",
+        headers={"Accept": "text/tab-separated-values"},
+    )
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.get_data() == b"?s\n"
+
+    response = client.post(
+        f"/sparql/query?graph_id={graph_id}",
+        data="SELECT ?s WHERE { ?s ?p }",
+        content_type="application/sparql-query",
+    )
+    assert response.status_code == 400
@@ -0,0 +1,114 @@
+import pytest
+import sys
+import os
+import json
+from io import BytesIO
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import Graph as RDFGraph, URIRef, Literal, BNode
+from rdflib.compare import isomorphic
+from rdflib.query import Result
+from models.results import stream_result, spool_chunks
+
+EX = "http://ex.org/"
+SELECT = f"SELECT ?s ?o ?missing WHERE {{ ?s <{EX}p> ?o }}"
+
+
+class TestStreamingResults:
+    """Test suite for the streaming SPARQL result serializers"""
+
+    def setup_method(self):
+        self.graph = RDFGraph()
+        self.graph.add((URIRef(f"{EX}s"), URIRef(f"{EX}p"), Literal('say "hi" & <bye>', lang="en")))
+        self.graph.add((BNode("b1"), URIRef(f"{EX}p"), Literal(3)))
+        for i in range(300):
+            self.graph.add((URIRef(f"{EX}n{i}"), URIRef(f"{EX}p"), Literal(f"value, {i}\n")))
+
+    def _rows(self, data, result_format):
+        parsed = Result.parse(BytesIO(data), format=result_format)
+        return sorted(tuple(row) for row in parsed)
+
+    @pytest.mark.parametrize("result_format", ["json", "xml", "tsv"])
+    def test_select_round_trip(self, result_format):
+        expected = sorted(tuple(row) for row in self.graph.query(SELECT))
+
+        data = b"".join(stream_result(self.graph.query(SELECT), result_format, chunk_bytes=512))
+
+        assert self._rows(data, result_format) == expected
+
+    def test_csv_matches_rdflib(self):
+        expected = self.graph.query(SELECT).serialize(format="csv")
+
+        data = b"".join(stream_result(self.graph.query(SELECT), "csv"))
+
+        assert data == expected
+
+    def test_rows_are_not_retained(self):
+        qres = self.graph.query(SELECT)
+        chunks = stream_result(qres, "json", chunk_bytes=256)
+
+        first = next(chunks)
+        assert first.startswith(b'{"head":{"vars":["s","o","missing"]}')
+        rest = b"".join(chunks)
+        assert len(json.loads(first + rest)["results"]["bindings"]) == 302
+        assert qres._bindings == []
+
+    @pytest.mark.parametrize("result_format", ["json", "xml"])
+    def test_ask(self, result_format):
+        qres = self.graph.query(f"ASK {{ ?s <{EX}p> ?o }}")
+
+        data = b"".join(stream_result(qres, result_format))
+
+        assert Result.parse(BytesIO(data), format=result_format).askAnswer is True
+
+    def test_construct_streams_graph(self):
+        qres = self.graph.query(f"CONSTRUCT {{ ?s <{EX}q> ?o }} WHERE {{ ?s <{EX}p> ?o }}")
+
+        data = b"".join(stream_result(qres, "nt"))
+
+        assert isomorphic(RDFGraph().parse(data=data, format="nt"), qres.graph)
+
+
+class TestSpoolChunks:
+    """Test suite for spooling a result while it is sent"""
+
+    def test_streams_before_the_producer_finishes(self):
+        import threading
+        from contextlib import contextmanager
+
+        held = threading.Event()
+        released = threading.Event()
+        resume = threading.Event()
+
+        @contextmanager
+        def hold():
+            held.set()
+            try:
+                yield
+            finally:
+                released.set()
+
+        def produce():
+            yield b"a" * 10
+            yield b"b" * 10
+            resume.wait(10)
+            yield b"c" * 10
+
+        chunks = spool_chunks(produce(), chunk_bytes=8, max_memory=16, hold=hold)
+
+        # The first bytes are readable while the producer is still running
+        assert held.is_set() and not released.is_set()
+        assert next(chunks) == b"a" * 8
+        resume.set()
+        assert b"".join(chunks) == b"a" * 2 + b"b" * 10 + b"c" * 10
+        assert released.wait(10)
+
+    def test_early_errors_are_raised(self):
+        def produce():
+            yield b"partial"
+            raise ValueError("bad query")
+
+        with pytest.raises(ValueError, match="bad query"):
+            spool_chunks(produce(), max_memory=1024)
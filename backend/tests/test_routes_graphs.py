@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 from app import app
 from routes.graphs import graph_manager
+from routes.jobs import job_manager
 
 
 # Test Graph Routes
@@ -113,7 +114,7 @@ class TestGraphRoutes:
     def test_get_triples_exception(self, mock_manager):
         """Test get triples when exception occurs"""
         # Make the manager raise an exception
-        mock_manager.get_triples.side_effect = Exception("Test error")
+        mock_manager.get_triples_page.side_effect = Exception("Test error")
 
         response = self.app.get("/api/graphs/test-id/triples")
 
@@ -223,12 +224,186 @@ class TestGraphRoutes:
             content_type="application/json",
         )
 
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = json.loads(response.data)
         assert data.get("cleared_history") is True
         assert data.get("cleared_index") is True
+        assert job_manager.wait(data["job_id"], timeout=30)["state"] == "done"
 
         list_response = self.app.get("/api/graphs")
         assert list_response.status_code == 200
         graphs = json.loads(list_response.data)
         assert graphs == []
+
+    @patch("routes.graphs.job_manager")
+    def test_reindex_runs_in_background(self, mock_jobs):
+        """Test that reindex returns a job at once and refuses to run twice"""
+        mock_jobs.active.return_value = None
+        mock_jobs.submit.return_value = {"job_id": "job-1", "state": "queued"}
+
+        response = self.app.post("/api/graphs/reindex")
+        assert response.status_code == 202
+        assert json.loads(response.data)["job_id"] == "job-1"
+        assert mock_jobs.submit.call_args[0][0] == "reindex"
+
+        mock_jobs.active.return_value = {"job_id": "job-1", "state": "running"}
+        response = self.app.post("/api/graphs/reindex")
+        assert response.status_code == 409
+
+        response = self.app.get("/api/graphs/reindex/status")
+        assert response.status_code == 200
+        assert "state" in json.loads(response.data)
+
+    def test_upload_runs_as_job(self):
+        """Test that an upload returns a job id and the job loads the triples"""
+        from io import BytesIO
+
+        graph_id = json.loads(
+            self.app.post(
+                "/api/graphs",
+                data=json.dumps({"name": "Upload Graph"}),
+                content_type="application/json",
+            ).data
+        )["graph_id"]
+        data = {
+            "file": (
+                BytesIO(b'<http://ex.org/s> <http://ex.org/p> "o" .\n'),
+                "data.nt",
+            )
+        }
+
+        response = self.app.post(
+            f"/api/graphs/{graph_id}/upload", data=data, content_type="multipart/form-data"
+        )
+
+        assert response.status_code == 202
+        job_id = json.loads(response.data)["job_id"]
+        job = job_manager.wait(job_id, timeout=30)
+        assert job["state"] == "done"
+        assert job["result"] == {"graph_id": graph_id, "triples": 1}
+        response = self.app.get(f"/api/jobs/{job_id}")
+        assert json.loads(response.data)["state"] == "done"
+        assert len(graph_manager.get_triples(graph_id)) == 1
+
+    def test_upload_raw_ntriples_body(self):
+        """Test that a raw N-Triples body is streamed into the graph"""
+        graph_id = json.loads(
+            self.app.post(
+                "/api/graphs",
+                data=json.dumps({"name": "Raw Upload Graph"}),
+                content_type="application/json",
+            ).data
+        )["graph_id"]
+        body = "".join(
+            f"<http://ex.org/s{i}> <http://ex.org/p> \"{i}\" .\n" for i in range(5)
+        )
+
+        response = self.app.post(
+            f"/api/graphs/{graph_id}/upload",
+            data=body.encode("utf-8"),
+            content_type="application/n-triples",
+        )
+
+        assert response.status_code == 202
+        job = job_manager.wait(json.loads(response.data)["job_id"], timeout=30)
+        assert job["state"] == "done"
+        assert job["result"]["triples"] == 5
+        assert job["progress"]["triples"] == 5
+        assert len(graph_manager.get_triples(graph_id)) == 5
+
+    def test_export_streams_gzip(self):
+        """Test that an export is streamed and can be gzip-compressed"""
+        import gzip
+        from rdflib import Graph as RDFGraph, URIRef, Literal
+
+        graph_id = json.loads(
+            self.app.post(
+                "/api/graphs",
+                data=json.dumps({"name": "Export Graph"}),
+                content_type="application/json",
+            ).data
+        )["graph_id"]
+        graph = graph_manager.get_graph_object(graph_id).graph
+        graph.add((URIRef("http://ex.org/s"), URIRef("http://ex.org/p"), Literal("o")))
+
+        response = self.app.get(f"/api/graphs/{graph_id}/export?format=nt&gzip=true")
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.content_type == "application/gzip"
+        assert f"graph-{graph_id}.nt.gz" in response.headers["Content-Disposition"]
+        exported = RDFGraph().parse(data=gzip.decompress(response.data), format="nt")
+        assert len(exported) == 1
+
+    def test_get_triples_paginated_and_filtered(self):
+        """Test that triples are listed page by page with pattern filters"""
+        from rdflib import URIRef, Literal
+
+        graph_id = json.loads(
+            self.app.post(
+                "/api/graphs",
+                data=json.dumps({"name": "Paged Graph"}),
+                content_type="application/json",
+            ).data
+        )["graph_id"]
+        graph = graph_manager.get_graph_object(graph_id).graph
+        for i in range(25):
+            graph.add((URIRef(f"http://ex.org/s{i}"), URIRef("http://ex.org/p"), Literal(i)))
+            graph.add((URIRef(f"http://ex.org/s{i}"), URIRef("http://ex.org/q"), Literal("x")))
+
+        seen = []
+        cursor = None
+        while True:
+            url = f"/api/graphs/{graph_id}/triples?predicate=http://ex.org/p&limit=10"
+            response = self.app.get(url + (f"&cursor={cursor}" if cursor else ""))
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data["total"] == 25
+            seen.extend(data["triples"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == 25
+        assert {t["predicate"] for t in seen} == {"http://ex.org/p"}
+
+        response = self.app.get(f"/api/graphs/{graph_id}/triples?subject=http://ex.org/s3")
+        assert len(json.loads(response.data)["triples"]) == 2
+        response = self.app.get(f"/api/graphs/{graph_id}/triples?cursor=%%%")
+        assert response.status_code == 400
+
+        # Reloading the graph renumbers its terms; an older cursor is rejected
+        response = self.app.get(f"/api/graphs/{graph_id}/triples?limit=10")
+        cursor = json.loads(response.data)["next_cursor"]
+        graph_manager.mark_dirty(graph_id)
+        graph_manager._save()
+        graph_manager.graph_objs.pop(graph_id)
+        response = self.app.get(f"/api/graphs/{graph_id}/triples?limit=10&cursor={cursor}")
+        assert response.status_code == 400
+        assert "Stale cursor" in json.loads(response.data)["error"]
+
+    def test_get_neighbors(self):
+        """Test the neighborhood expansion endpoint"""
+        from rdflib import URIRef
+
+        graph_id = json.loads(
+            self.app.post(
+                "/api/graphs",
+                data=json.dumps({"name": "Neighbor Graph"}),
+                content_type="application/json",
+            ).data
+        )["graph_id"]
+        graph = graph_manager.get_graph_object(graph_id).graph
+        for i in range(20):
+            graph.add((URIRef(f"http://ex.org/n{i}"), URIRef("http://ex.org/links"), URIRef("http://ex.org/hub")))
+
+        response = self.app.get(
+            f"/api/graphs/{graph_id}/neighbors?iri=http://ex.org/hub&limit=5&direction=in"
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data["edges"]) == 5
+        assert len(data["nodes"]) == 6
+        assert data["truncated"] is True
+        response = self.app.get(f"/api/graphs/{graph_id}/neighbors")
+        assert response.status_code == 400
@@ -139,6 +139,87 @@ class TestWhooshSearchEngine:
         ]
         assert len(found_entities) > 0
 
+    def test_add_entities_batch(self):
+        """Test bulk indexing with one writer and IRI deduplication"""
+        entities = [
+            {"iri": f"http://example.com/item{i % 50}", "label": f"Item {i % 50}", "graph_id": "g"}
+            for i in range(200)
+        ]
+
+        with patch.object(
+            self.search_engine.index, "writer", wraps=self.search_engine.index.writer
+        ) as mock_writer:
+            count = self.search_engine.add_entities(iter(entities))
+
+        assert count == 50
+        assert mock_writer.call_count == 1
+        assert self.search_engine.index.doc_count() == 50
+        results = self.search_engine.search("Item", search_by="label")
+        assert results["count"] > 0
+
+    def test_language_tagged_labels(self):
+        """Test that all labels are searchable and returned with their language"""
+        self.search_engine.add_entities(
+            [
+                {
+                    "iri": "http://example.com/munich",
+                    "label": "Munich",
+                    "labels": [
+                        {"value": "Munich", "lang": "en"},
+                        {"value": "München", "lang": "de"},
+                    ],
+                    "graph_id": "g",
+                }
+            ]
+        )
+
+        results = self.search_engine.search("München", search_by="label")
+        assert results["count"] == 1
+        assert results["results"][0]["label"] == "Munich"
+        assert {"value": "München", "lang": "de"} in results["results"][0]["labels"]
+
+    def test_add_entities_multiprocess(self):
+        """Test bulk indexing with a multi-process writer"""
+        entities = [
+            {"iri": f"http://example.com/mp{i}", "label": f"Multi {i}", "graph_id": "g"}
+            for i in range(100)
+        ]
+        count = self.search_engine.add_entities(entities, procs=2, multisegment=True)
+
+        assert count == 100
+        assert self.search_engine.index.refresh().doc_count() == 100
+
+    def test_merge_indexes_deduplicates_iris(self):
+        """Test that merging shards indexes every IRI once"""
+        self.search_engine.add_entity({"iri": "http://example.com/shared", "label": "Old"})
+        shards = []
+        for n in range(2):
+            path = os.path.join(self.temp_dir, f"shard{n}")
+            WhooshSearchEngine(path).add_entities(
+                [
+                    {
+                        "iri": "http://example.com/shared",
+                        "label": "Munich",
+                        "labels": [
+                            {"value": "Munich", "lang": "en"},
+                            {"value": "München", "lang": "de"},
+                        ],
+                        "graph_id": f"g{n}",
+                    },
+                    {"iri": f"http://example.com/only{n}", "label": f"Only {n}", "graph_id": f"g{n}"},
+                ]
+            )
+            shards.append(path)
+
+        assert self.search_engine.merge_indexes(shards) == 3
+
+        assert self.search_engine.index.refresh().doc_count() == 3
+        results = self.search_engine.search("München", search_by="label")
+        assert results["count"] == 1
+        assert results["results"][0]["label"] == "Munich"
+        assert {"value": "München", "lang": "de"} in results["results"][0]["labels"]
+        assert self.search_engine.search("Old", search_by="label")["count"] == 0
+
     def test_search_by_iri(self):
         """Test searching by IRI"""
         entity = {
@@ -0,0 +1,134 @@
+import pytest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.graph import GraphManager
+from models.shared import FileLock
+
+EX = "http://ex.org/"
+COUNT = f"SELECT (COUNT(*) AS ?n) WHERE {{ ?s <{EX}p> ?o }}"
+
+
+class TestMultiWorker:
+    """Two managers on one data directory stand in for two worker processes"""
+
+    def setup_method(self):
+        self.tmp = tempfile.mkdtemp()
+        self.a = self._worker()
+        self.b = self._worker()
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _worker(self):
+        return GraphManager(
+            os.path.join(self.tmp, "graph_data.json"),
+            data_dir=os.path.join(self.tmp, "graphs"),
+            multi_worker=True,
+        )
+
+    def _count(self, manager, graph_id):
+        with manager.read_lock(graph_id):
+            return int(next(iter(manager.query(graph_id, COUNT)))[0])
+
+    def test_metadata_changes_are_shared(self):
+        graph_id = self.a.create_graph("Shared")["graph_id"]
+        assert self.b.get_graph(graph_id)["name"] == "Shared"
+
+        self.b.update_graph(graph_id, name="Renamed")
+        other = self.b.create_graph("Other")["graph_id"]
+        assert self.a.get_graph(graph_id)["name"] == "Renamed"
+        assert {g["graph_id"] for g in self.a.list_graphs()} == {graph_id, other}
+
+        # Both workers write the metadata file; neither loses the other's graphs
+        third = self.a.create_graph("Third")["graph_id"]
+        assert self.b.get_graph(third) is not None
+        assert self._worker().get_graph(other) is not None
+
+        self.a.delete_graph(graph_id)
+        assert self.b.get_graph(graph_id) is None
+        assert not self.b.add_triple(graph_id, (f"{EX}s", f"{EX}p", "o"))
+
+    def test_triple_changes_are_replayed(self):
+        graph_id = self.a.create_graph("G")["graph_id"]
+        assert self._count(self.b, graph_id) == 0
+        version = self.b.graph_version(graph_id)
+
+        self.a.add_triple(graph_id, (f"{EX}s1", f"{EX}p", "o"))
+        self.a.sparql_update(graph_id, f"INSERT DATA {{ <{EX}s2> <{EX}p> 2 }}")
+        assert self.b.graph_version(graph_id) != version
+        assert self._count(self.b, graph_id) == 2
+
+        self.b.remove_triple(graph_id, (f"{EX}s1", f"{EX}p", "o"))
+        assert self._count(self.a, graph_id) == 1
+        # Only the new tail of the log was replayed, not a reload
+        assert self.b.get_graph_object(graph_id) is self.b.graph_objs[graph_id]
+
+    def test_compaction_by_another_worker_reloads(self):
+        graph_id = self.a.create_graph("G")["graph_id"]
+        self.a.add_triple(graph_id, (f"{EX}s1", f"{EX}p", "o"))
+        assert self._count(self.b, graph_id) == 1
+        graph_b = self.b.get_graph_object(graph_id)
+
+        self.a.add_triple(graph_id, (f"{EX}s2", f"{EX}p", "o"))
+        assert self.a.compact(graph_id)
+        assert self.a.changelog.size(graph_id) == 0
+        # The stale copy of b must not overwrite the compacted snapshot
+        assert not self.b._write_snapshot(graph_b)
+
+        assert self._count(self.b, graph_id) == 2
+        # The Graph object is reloaded in place
+        assert self.b.get_graph_object(graph_id) is graph_b
+
+        self.b.add_triple(graph_id, (f"{EX}s3", f"{EX}p", "o"))
+        assert self._count(self.a, graph_id) == 3
+
+    def test_concurrent_writers_keep_every_change(self):
+        graph_id = self.a.create_graph("G")["graph_id"]
+        errors = []
+
+        def writer(manager, name):
+            try:
+                for i in range(30):
+                    manager.add_triple(graph_id, (f"{EX}{name}{i}", f"{EX}p", "o"))
+                    if i % 10 == 9:
+                        manager.compact(graph_id)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [
+            threading.Thread(target=writer, args=(manager, name))
+            for manager, name in ((self.a, "a"), (self.b, "b"))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=60)
+        assert errors == []
+        assert self._count(self.a, graph_id) == 60
+        assert self._count(self.b, graph_id) == 60
+        assert self._count(self._worker(), graph_id) == 60
+
+
+def test_file_lock_is_reentrant_and_exclusive(tmp_path):
+    path = str(tmp_path / "g.lock")
+    lock, other = FileLock(path), FileLock(path)
+    acquired = threading.Event()
+
+    def take():
+        with other:
+            acquired.set()
+
+    with lock:
+        with lock:
+            thread = threading.Thread(target=take)
+            thread.start()
+            assert not acquired.wait(0.2)
+    thread.join(timeout=5)
+    assert acquired.is_set()
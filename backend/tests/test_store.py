@@ -0,0 +1,170 @@
+import pytest
+import sys
+import os
+import random
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from rdflib import Graph as RDFGraph, URIRef, Literal, BNode, RDF, RDFS
+from models.store import VibeStore
+
+EX = "http://example.org/"
+
+
+def _random_triples(count, seed=7):
+    rnd = random.Random(seed)
+    triples = set()
+    while len(triples) < count:
+        s = URIRef(f"{EX}s{rnd.randrange(40)}")
+        p = URIRef(f"{EX}p{rnd.randrange(6)}")
+        if rnd.random() < 0.5:
+            o = URIRef(f"{EX}s{rnd.randrange(40)}")
+        else:
+            o = Literal(f"value {rnd.randrange(30)}", lang=rnd.choice([None, "en"]))
+        triples.add((s, p, o))
+    return triples
+
+
+class TestVibeStore:
+    """Test suite for the integer-encoded VibeStore"""
+
+    def setup_method(self):
+        self.triples = _random_triples(500)
+        self.graph = RDFGraph(store=VibeStore())
+        self.reference = RDFGraph(store="Memory")
+        for triple in self.triples:
+            self.graph.add(triple)
+            self.reference.add(triple)
+
+    def test_plugin_registered(self):
+        graph = RDFGraph(store="VibeGraph")
+        assert isinstance(graph.store, VibeStore)
+
+    def test_len_and_duplicates(self):
+        assert len(self.graph) == len(self.triples)
+        self.graph.add(next(iter(self.triples)))
+        assert len(self.graph) == len(self.triples)
+
+    def test_patterns_match_memory_store(self):
+        s, p, o = next(iter(self.triples))
+        patterns = [
+            (None, None, None),
+            (s, None, None),
+            (None, p, None),
+            (None, None, o),
+            (s, p, None),
+            (s, None, o),
+            (None, p, o),
+            (s, p, o),
+            (URIRef(f"{EX}missing"), None, None),
+        ]
+        for pattern in patterns:
+            assert set(self.graph.triples(pattern)) == set(
+                self.reference.triples(pattern)
+            ), pattern
+            assert self.graph.store.count(pattern) == len(
+                set(self.reference.triples(pattern))
+            ), pattern
+
+
+    def test_triples_page_resumes_after_cursor(self):
+        s, p, o = next(iter(self.triples))
+        patterns = [
+            (None, None, None),
+            (s, None, None),
+            (None, p, None),
+            (None, None, o),
+            (s, p, None),
+            (None, p, o),
+        ]
+        for pattern in patterns:
+            expected = set(self.reference.triples(pattern))
+            seen = []
+            page, after = self.graph.store.triples_page(pattern, 7)
+            seen.extend(page)
+            while after is not None:
+                assert len(page) == 7
+                page, after = self.graph.store.triples_page(pattern, 7, after)
+                seen.extend(page)
+            assert len(seen) == len(expected), pattern
+            assert set(seen) == expected, pattern
+
+    def test_triples_page_survives_writes(self):
+        page, after = self.graph.store.triples_page((None, None, None), 50)
+        self.graph.remove(page[-1])
+        self.graph.add((URIRef(f"{EX}new"), RDF.type, RDFS.Class))
+
+        rest = []
+        while after is not None:
+            batch, after = self.graph.store.triples_page((None, None, None), 50, after)
+            rest.extend(batch)
+
+        assert not set(page) & set(rest)
+        assert len(page) + len(rest) == len(self.triples) + 1
+
+    def test_remove_pattern(self):
+        s = next(iter(self.triples))[0]
+        self.graph.remove((s, None, None))
+        self.reference.remove((s, None, None))
+        assert set(self.graph) == set(self.reference)
+        assert len(self.graph) == len(self.reference)
+        assert set(self.graph.triples((None, None, s))) == set(
+            self.reference.triples((None, None, s))
+        )
+
+    def test_large_buckets_buffer_inserts(self):
+        graph = RDFGraph(store=VibeStore())
+        cls = URIRef(f"{EX}Class")
+        for i in range(3000):
+            graph.add((URIRef(f"{EX}item{i}"), RDF.type, cls))
+        graph.remove((URIRef(f"{EX}item10"), RDF.type, cls))
+        assert len(graph) == 2999
+        subjects = list(graph.subjects(RDF.type, cls))
+        assert len(subjects) == 2999
+        assert URIRef(f"{EX}item10") not in subjects
+        assert (URIRef(f"{EX}item2999"), RDF.type, cls) in graph
+
+    def test_bulk_add_ids_deduplicates(self):
+        store = VibeStore()
+        graph = RDFGraph(store=store)
+        triple = (URIRef(f"{EX}a"), RDFS.label, Literal("a"))
+        graph.add(triple)
+        added = store.add_encoded(list(triple), [0, 1, 2, 0, 1, 2])
+        assert added == 0
+        assert len(graph) == 1
+
+    def test_encoded_drops_unused_terms(self):
+        s = next(iter(self.triples))[0]
+        self.graph.remove((s, None, None))
+        self.graph.remove((None, None, s))
+        terms, ids = self.graph.store.encoded()
+
+        assert s not in terms
+        assert len(terms) == len(set(self.graph.all_nodes()) | set(self.graph.predicates()))
+        assert max(ids) == len(terms) - 1
+        copy = RDFGraph(store=VibeStore())
+        copy.store.add_encoded(terms, ids)
+        assert set(copy) == set(self.graph)
+
+    def test_sparql_query_and_update(self):
+        graph = RDFGraph(store=VibeStore())
+        graph.update(
+            'INSERT DATA { <http://example.org/a> <http://example.org/p> "x"@en . '
+            "<http://example.org/a> <http://example.org/q> _:b }"
+        )
+        rows = list(graph.query("SELECT ?o WHERE { <http://example.org/a> <http://example.org/p> ?o }"))
+        assert [str(row[0]) for row in rows] == ["x"]
+        graph.update("DELETE WHERE { ?s <http://example.org/p> ?o }")
+        assert len(graph) == 1
+        assert isinstance(next(graph.objects()), BNode)
+
+    def test_namespaces_and_turtle_serialization(self):
+        graph = RDFGraph(store=VibeStore())
+        graph.bind("ex", EX)
+        graph.add((URIRef(f"{EX}a"), RDFS.label, Literal("A")))
+        assert graph.store.namespace("ex") == URIRef(EX)
+        data = graph.serialize(format="turtle")
+        parsed = RDFGraph().parse(data=data, format="turtle")
+        assert len(parsed) == 1
+        assert "ex:a" in data
@@ -28,7 +28,8 @@ export class GraphViewComponent implements OnInit {
 
   fetchTriples() {
     this.graphId = this.route.snapshot.queryParams["id"] || this.graphId;
-    this.graphService.getTriples(this.graphId).subscribe((data) => {
+    // Only the first page is drawn; large graphs would swamp the layout
+    this.graphService.getTriples(this.graphId, { limit: 500 }).subscribe((data) => {
       this.triples = data.triples;
       this.processTriples();
       this.renderGraph();
@@ -131,8 +132,19 @@ export class GraphViewComponent implements OnInit {
   }
 
   onNodeClick(node: any) {
-    console.log("Node clicked:", node.id);
-    // Placeholder for expansion logic
+    // Expand the clicked node with its immediate neighbours
+    this.graphService.getNeighbors(this.graphId, [node.id]).subscribe((data) => {
+      const known = new Set(this.triples.map((t) => `${t.subject} ${t.predicate} ${t.object}`));
+      data.edges.forEach((e) => {
+        const key = `${e.source} ${e.predicate} ${e.target}`;
+        if (!known.has(key)) {
+          known.add(key);
+          this.triples.push({ subject: e.source, predicate: e.predicate, object: e.target });
+        }
+      });
+      this.processTriples();
+      this.renderGraph();
+    });
   }
 
   addTriple() {
@@ -83,7 +83,7 @@ export class SettingsComponent implements OnInit {
       this.graphService.reindexAll().subscribe(
         () => {
           this.loading = false;
-          this.openSnack("Re‑indexed all graphs successfully.");
+          this.openSnack("Re‑index started; it continues in the background.");
         },
         () => {
           this.loading = false;
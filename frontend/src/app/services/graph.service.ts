@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { Observable, of, timer } from 'rxjs';
+import { filter, map, switchMap, take } from 'rxjs/operators';
 import { BaseService } from './base.service';
 
 export interface Graph {
@@ -18,6 +19,43 @@ export interface Triple {
 
 export interface TripleResult {
   triples: Triple[];
+  next_cursor: string | null;
+  total: number | null;
+  limit: number;
+}
+
+export interface TripleQuery {
+  subject?: string;
+  predicate?: string;
+  object?: string;
+  limit?: number;
+  cursor?: string;
+}
+
+export interface NeighborNode {
+  id: string;
+  kind: 'iri' | 'bnode' | 'literal';
+  label: string;
+  degree?: { out: number; in: number } | null;
+}
+
+export interface NeighborEdge {
+  source: string;
+  predicate: string;
+  target: string;
+}
+
+export interface NeighborResult {
+  nodes: NeighborNode[];
+  edges: NeighborEdge[];
+  truncated: boolean;
+}
+
+export interface NeighborQuery {
+  depth?: number;
+  direction?: 'out' | 'in' | 'both';
+  limit?: number;
+  predicates?: string[];
 }
 
 @Injectable({
@@ -35,8 +73,30 @@ export class GraphService extends BaseService {
     return this.http.get<Graph[]>(this.baseUrl);
   }
 
-  getTriples(graphId: string): Observable<TripleResult> {
-    return this.http.get<TripleResult>(`${this.baseUrl}/${graphId}/triples`);
+  /**
+   * Fetch one page of triples. Pass the previous page's next_cursor as
+   * `cursor` to get the following page.
+   */
+  getTriples(graphId: string, query: TripleQuery = {}): Observable<TripleResult> {
+    const params: Record<string, string> = {};
+    Object.entries(query).forEach(([key, value]) => {
+      if (value !== undefined && value !== null && value !== '') {
+        params[key] = String(value);
+      }
+    });
+    return this.http.get<TripleResult>(`${this.baseUrl}/${graphId}/triples`, { params });
+  }
+
+  /**
+   * Fetch the neighborhood of one or more nodes for the graph view.
+   */
+  getNeighbors(graphId: string, iris: string[], query: NeighborQuery = {}): Observable<NeighborResult> {
+    const params: Record<string, string | string[]> = { iri: iris };
+    if (query.depth) params['depth'] = String(query.depth);
+    if (query.direction) params['direction'] = query.direction;
+    if (query.limit) params['limit'] = String(query.limit);
+    if (query.predicates?.length) params['predicate'] = query.predicates;
+    return this.http.get<NeighborResult>(`${this.baseUrl}/${graphId}/neighbors`, { params });
   }
 
   createTriple(graphId: string, triple: Triple): Observable<any> {
@@ -64,18 +124,27 @@ export class GraphService extends BaseService {
   }
 
   /**
-   * Trigger a full re‑index of all graphs.
-   * @returns Observable that completes when the server responds.
+   * Start a full re‑index of all graphs in the background.
+   * @returns Observable that completes once the re‑index has started.
    */
   reindexAll(): Observable<any> {
     return this.http.post(`${this.baseUrl}/reindex`, {});
   }
 
+  /**
+   * Progress and throughput of the running or last re‑index.
+   */
+  reindexStatus(): Observable<any> {
+    return this.http.get(`${this.baseUrl}/reindex/status`);
+  }
+
   /**
    * Clear all graphs, optionally clearing history and search index.
    */
   clearAll(options?: { clear_history?: boolean; clear_index?: boolean }): Observable<any> {
-    return this.http.post(`${this.baseUrl}/clear`, options ?? {});
+    return this.http
+      .post<any>(`${this.baseUrl}/clear`, options ?? {})
+      .pipe(switchMap((res) => (res?.job_id ? this.waitForJob(res.job_id) : of(res))));
   }
 
   /**
@@ -90,7 +159,27 @@ export class GraphService extends BaseService {
     if (format) {
       formData.append('format', format);
     }
-    return this.http.post(`${this.baseUrl}/${graphId}/upload`, formData);
+    return this.http
+      .post<any>(`${this.baseUrl}/${graphId}/upload`, formData)
+      .pipe(switchMap((res) => (res?.job_id ? this.waitForJob(res.job_id) : of(res))));
+  }
+
+  /**
+   * Poll a background job until it finishes.
+   * Emits the finished job, or errors when the job failed or was cancelled.
+   */
+  waitForJob(jobId: string, intervalMs = 1000): Observable<any> {
+    return timer(0, intervalMs).pipe(
+      switchMap(() => this.http.get<any>(`${this.apiHost}/api/jobs/${jobId}`)),
+      filter((job) => ['done', 'failed', 'cancelled'].includes(job.state)),
+      take(1),
+      map((job) => {
+        if (job.state !== 'done') {
+          throw new Error(job.error || `Job ${job.state}`);
+        }
+        return job;
+      })
+    );
   }
 
   exportGraph(graphId: string, format: string, accept: string): Observable<any> {